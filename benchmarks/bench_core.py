@@ -0,0 +1,128 @@
+'''
+Benchmarks the tool against the in-memory scene of fake_maya, so it runs without Maya:
+
+    python benchmarks/bench_core.py
+    python benchmarks/bench_core.py --sizes 1 10 100 1000 --repeat 20
+
+Every case is timed at each scene size (number of limbs in the scene) and reported with the number of
+maya.cmds calls it made. The last column is the scaling exponent between the smallest and largest scene:
+0 means the cost does not depend on the scene size, 1 means it grows linearly with it.
+The joint index and joint cache callbacks are installed as in the tool: 'get_joints cold' clears the cache
+before each lookup, 'get_joints warm' is served from it.
+The UI cases (update_buttons, load_preset) only run when PySide2 can be imported.
+'''
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# fake_maya lives with the tests, which run against it too
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+
+import fake_maya
+fake_maya.install()
+
+from ik_fk_snap import core
+
+qt_app = None
+
+def measure(func, repeat):
+    '''
+    Returns the mean seconds and cmds calls of one func() call.
+    '''
+    # The tool prints a line per snap, keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        fake_maya.cmds_calls.clear()
+        start = time.perf_counter()
+        for i in range(repeat):
+            func()
+        seconds = (time.perf_counter() - start) / repeat
+    return seconds, sum(fake_maya.cmds_calls.values()) / float(repeat)
+
+def get_core_cases(presets):
+    limb = core.get_limb(presets[len(presets) // 2])
+    ik_controls = [limb['ik_joints'][0], limb['ik_joints'][1], limb['ik_ctrl']]
+    # A new scene: drop the index and the cache of the previous one, the way the tool's callbacks would
+    for index in (core.joint_index, core.joint_cache):
+        index.remove_callbacks()
+        index.install_callbacks()
+
+    def get_joints_cold():
+        core.joint_cache.clear()
+        core.get_joints([limb['fk_controls'][0]])
+
+    return [
+        ('get_joints cold', get_joints_cold),
+        ('get_joints warm', lambda: core.get_joints([limb['fk_controls'][0]])),
+        ('match_fk_to_ik api', lambda: core.match_fk_to_ik(limb['fk_controls'], limb['ik_joints'], uuids=limb['uuids'])),
+        ('match_fk_to_ik cmds', lambda: core.match_fk_to_ik(limb['fk_controls'], limb['ik_joints'], backend='cmds')),
+        ('match_ik_to_fk api', lambda: core.match_ik_to_fk(ik_controls, limb['fk_joints'], limb['ik_pole'], None, uuids=limb['uuids'])),
+        ('match_ik_to_fk cmds', lambda: core.match_ik_to_fk(ik_controls, limb['fk_joints'], limb['ik_pole'], None, backend='cmds')),
+        ('is_joint', lambda: core.joint_index.is_joint(limb['fk_joints'][1])),
+        ('scan_scene', core.scan_scene)
+    ]
+
+def get_ui_cases(presets):
+    try:
+        from PySide2 import QtWidgets
+    except ImportError:
+        return []
+    # Keep a reference so the application is not garbage collected between sizes
+    global qt_app
+    qt_app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    from ik_fk_snap import ui
+
+    store = core.PresetStore('defaultObjectSet')
+    for i, preset in enumerate(presets):
+        store[f'limb{i}'] = preset
+    store.save()
+    window = ui.PinnedObjectWindow()
+    limb = core.get_limb(presets[len(presets) // 2])
+    selections = [[fake_maya.scene.get(limb['fk_controls'][0])], [fake_maya.scene.get(limb['ik_ctrl'])]]
+    state = {'update': 0, 'preset': 0}
+
+    def update_buttons():
+        state['update'] += 1
+        fake_maya.scene.selection = selections[state['update'] % 2]
+        window.update_buttons()
+
+    def load_preset():
+        state['preset'] += 1
+        window.load_preset(1 + state['preset'] % min(2, len(presets)))
+
+    return [('update_buttons', update_buttons), ('load_preset', load_preset)]
+
+def scaling(sizes, values):
+    if len(sizes) < 2 or values[0] <= 0 or values[-1] <= 0:
+        return float('nan')
+    return math.log(values[-1] / values[0]) / math.log(sizes[-1] / float(sizes[0]))
+
+def run(sizes=(1, 10, 100, 1000), repeat=10):
+    results = {}
+    for size in sizes:
+        build_start = time.perf_counter()
+        presets = fake_maya.build_scene(size)
+        print(f"scene with {size} limbs ({len(fake_maya.scene.nodes)} nodes) built in {time.perf_counter() - build_start:.2f}s")
+        for name, func in get_core_cases(presets) + get_ui_cases(presets):
+            results.setdefault(name, []).append(measure(func, repeat))
+
+    header = f"{'case':<22}" + ''.join(f"{f'{size} limbs':>22}" for size in sizes) + f"{'scaling':>10}"
+    print()
+    print(header)
+    print(f"{'':<22}" + ''.join(f"{'ms':>11}{'cmds':>11}" for size in sizes))
+    for name, measurements in results.items():
+        row = f"{name:<22}" + ''.join(f"{seconds * 1000.0:>11.3f}{calls:>11.1f}" for seconds, calls in measurements)
+        print(row + f"{scaling(sizes, [seconds for seconds, calls in measurements]):>10.2f}")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark ik_fk_snap without Maya.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000], help="Limbs per scene")
+    parser.add_argument('--repeat', type=int, default=10, help="Calls timed per case and size")
+    options = parser.parse_args()
+    run(options.sizes, options.repeat)
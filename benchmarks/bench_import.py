@@ -0,0 +1,63 @@
+'''
+Measures how long each part of the tool takes to import, each in a fresh interpreter.
+
+    mayapy benchmarks/bench_import.py
+    python benchmarks/bench_import.py --fake
+
+ik_fk_snap.ui costs what importing the old single module did (Qt, shiboken2, OpenMayaUI and the core).
+ik_fk_snap.core and ik_fk_snap_tool are what scripts and farm jobs pay now.
+--fake uses the in-memory maya modules of fake_maya, so it runs without Maya; the UI then needs PySide2.
+'''
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['ik_fk_snap.core', 'ik_fk_snap_tool', 'ik_fk_snap.ui']
+
+TIMER = '''
+import sys, time
+sys.path[:0] = [{root!r}, {tests!r}]
+if {fake!r}:
+    import fake_maya
+    fake_maya.install()
+else:
+    import maya.cmds
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+def time_import(module, fake=False):
+    '''
+    Returns the seconds it took to import module in a new interpreter, or None when the import failed.
+    maya.cmds itself is imported before the clock starts, so only the tool's own cost is measured.
+    '''
+    code = TIMER.format(root=ROOT, tests=os.path.join(ROOT, 'tests'), fake=fake, module=module)
+    process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if process.returncode != 0:
+        return None
+    return float(process.stdout.strip().splitlines()[-1])
+
+def run(fake=False, repeat=5):
+    timings = {}
+    for module in MODULES:
+        samples = [time_import(module, fake) for i in range(repeat)]
+        timings[module] = None if None in samples else min(samples)
+    baseline = timings['ik_fk_snap.ui']
+    print(f"{'module':<20}{'import ms':>12}{'of ui':>10}")
+    for module, seconds in timings.items():
+        if seconds is None:
+            print(f"{module:<20}{'failed':>12}")
+            continue
+        share = f"{seconds / baseline:.0%}" if baseline else '-'
+        print(f"{module:<20}{seconds * 1000.0:>12.1f}{share:>10}")
+    return timings
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the imports of the ik_fk_snap modules.")
+    parser.add_argument('--fake', action='store_true', help="Use fake_maya instead of Maya")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module, the fastest is reported")
+    options = parser.parse_args()
+    run(options.fake, options.repeat)
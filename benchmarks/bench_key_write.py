@@ -0,0 +1,77 @@
+'''
+Compares key throughput of the bake writers on a long frame range.
+
+Run from Maya's script editor (or mayapy after maya.standalone.initialize()) with the repository on sys.path:
+
+    import bench_key_write
+    bench_key_write.run()
+
+per-frame: one cmds.setKeyframe per channel per frame, timed on the first naive_frames frames only
+cmds: ik_fk_snap.core.set_keys (cutKey/setKeyframe/keyTimeValue block per channel)
+api: ik_fk_snap.key_writer.set_keys (one MFnAnimCurve.addKeys per curve inside one undoable command)
+
+The api write is then undone and redone once, to time the single undo entry it leaves.
+'''
+import time
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from ik_fk_snap import core, key_writer
+
+def build_target(name):
+    node = cmds.spaceLocator(name=name)[0]
+    selection = om.MSelectionList()
+    selection.add(node)
+    return node, {node: selection.getDependNode(0)}
+
+def get_values(frame_count):
+    frames = np.arange(frame_count, dtype=float)
+    rotate = np.stack([np.sin(frames * 0.01), np.cos(frames * 0.02), np.sin(frames * 0.03)], axis=1)
+    translate = np.stack([frames * 0.1, np.sin(frames * 0.05), np.cos(frames * 0.05)], axis=1)
+    return rotate, translate
+
+def keys_per_second(key_count, seconds):
+    return key_count / max(seconds, 1e-9)
+
+def run(frame_count=10000, naive_frames=500, repeat=3):
+    cmds.file(new=True, force=True)
+    frames = core.frame_range(1, frame_count)
+    rotate, translate = get_values(frame_count)
+    results = {}
+
+    node, node_objects = build_target('perFrame_loc')
+    start = time.perf_counter()
+    for frame, rotate_value, translate_value in zip(frames[:naive_frames], rotate, translate):
+        for axis, column in zip('XYZ', range(3)):
+            cmds.setKeyframe(node, attribute='rotate' + axis, time=frame, value=float(np.degrees(rotate_value[column])))
+            cmds.setKeyframe(node, attribute='translate' + axis, time=frame, value=float(translate_value[column]))
+    results['per-frame'] = keys_per_second(naive_frames * 6, time.perf_counter() - start)
+
+    for backend in ('cmds', 'api'):
+        seconds = []
+        for i in range(repeat):
+            node, node_objects = build_target(f'{backend}{i}_loc')
+            start = time.perf_counter()
+            if backend == 'cmds':
+                for attribute, values in (('rotate', np.degrees(rotate)), ('translate', translate)):
+                    for column, axis in enumerate('XYZ'):
+                        core.set_keys(f'{node}.{attribute}{axis}', frames, values[:, column])
+            else:
+                key_writer.set_keys([(node, 'rotate', rotate), (node, 'translate', translate)], frames, node_objects)
+            seconds.append(time.perf_counter() - start)
+        results[backend] = keys_per_second(frame_count * 6, min(seconds))
+
+    start = time.perf_counter()
+    cmds.undo()
+    undo_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    cmds.redo()
+    redo_seconds = time.perf_counter() - start
+
+    print(f"{frame_count} frames x 6 channels")
+    print(f"{'writer':>10} {'keys/s':>14} {'10k frame bake s':>18}")
+    for writer, rate in results.items():
+        print(f"{writer:>10} {rate:>14.0f} {frame_count * 6 / rate:>18.3f}")
+    print(f"api undo {undo_seconds:.3f} s, redo {redo_seconds:.3f} s")
+    return results
@@ -0,0 +1,81 @@
+'''
+Compares the cmds (matchTransform/xform) and API (MFnTransform) snapping backends.
+
+Run from Maya's script editor with the repository on sys.path:
+
+    import bench_transform_write
+    bench_transform_write.run()
+'''
+import time
+import maya.cmds as cmds
+
+from ik_fk_snap import core as tool
+
+def build_chain(prefix, offset):
+    '''
+    Builds a three joint chain and returns the joint names.
+    '''
+    cmds.select(clear=True)
+    joints = []
+    for i, position in enumerate([(0, 10, 0), (0, 5, 1), (0, 0, 0)]):
+        joints.append(cmds.joint(name=f'{prefix}{i + 1}_jnt', position=(position[0] + offset, position[1], position[2])))
+    cmds.select(clear=True)
+    return joints
+
+def build_limb(index):
+    '''
+    Builds an FK chain with controls and an IK chain with a handle, control and pole.
+    Returns a limb dict as used by ik_fk_snap.core.
+    '''
+    offset = index * 3
+    fk_joints = build_chain(f'limb{index}_fk', offset)
+    ik_joints = build_chain(f'limb{index}_ik', offset)
+
+    fk_controls = []
+    parent = None
+    for i, joint in enumerate(fk_joints):
+        ctrl = cmds.circle(name=f'limb{index}_fk{i + 1}_ctrl', normal=(0, 1, 0))[0]
+        if parent:
+            cmds.parent(ctrl, parent)
+        cmds.matchTransform(ctrl, joint)
+        cmds.parentConstraint(ctrl, joint)
+        fk_controls.append(ctrl)
+        parent = ctrl
+
+    handle = cmds.ikHandle(startJoint=ik_joints[0], endEffector=ik_joints[2], solver='ikRPsolver', name=f'limb{index}_ikHandle')[0]
+    ik_ctrl = cmds.circle(name=f'limb{index}_ik_ctrl', normal=(0, 1, 0))[0]
+    cmds.matchTransform(ik_ctrl, ik_joints[2])
+    cmds.parent(handle, ik_ctrl)
+    ik_pole = cmds.spaceLocator(name=f'limb{index}_pole_ctrl')[0]
+    cmds.xform(ik_pole, worldSpace=True, translation=(offset, 5, 5))
+    cmds.poleVectorConstraint(ik_pole, handle)
+
+    # Pose the FK chain away from the IK chain so both directions have work to do
+    cmds.setAttr(fk_controls[0] + '.rotateX', 30)
+    cmds.setAttr(fk_controls[1] + '.rotateX', -45)
+    return {'fk_controls': fk_controls, 'fk_joints': fk_joints, 'ik_joints': ik_joints, 'ik_ctrl': ik_ctrl, 'ik_pole': ik_pole}
+
+def time_call(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def run(limb_counts=(1, 4, 16, 64), repeat=10):
+    print(f"{'limbs':>6} {'direction':>10} {'cmds ms':>10} {'api ms':>10} {'speedup':>8}")
+    for limb_count in limb_counts:
+        cmds.file(new=True, force=True)
+        limbs = [build_limb(i) for i in range(limb_count)]
+        for direction in ('fk_to_ik', 'ik_to_fk'):
+            timings = {}
+            for backend in ('cmds', 'api'):
+                if direction == 'fk_to_ik':
+                    def snap():
+                        for limb in limbs:
+                            tool.match_fk_to_ik(limb['fk_controls'], limb['ik_joints'], backend=backend)
+                else:
+                    def snap():
+                        for limb in limbs:
+                            tool.match_ik_to_fk([None, None, limb['ik_ctrl']], limb['fk_joints'], limb['ik_pole'], None, backend=backend)
+                timings[backend] = time_call(snap, repeat) * 1000.0
+            print(f"{limb_count:>6} {direction:>10} {timings['cmds']:>10.2f} {timings['api']:>10.2f} {timings['cmds'] / timings['api']:>7.1f}x")
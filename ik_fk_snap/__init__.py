@@ -0,0 +1,16 @@
+'''
+IK/FK snapping for Maya.
+
+    import ik_fk_snap
+    ik_fk_snap.show()
+
+The snapping API is in ik_fk_snap.core and has no Qt import. The window in ik_fk_snap.ui
+is only imported when show() is called.
+'''
+
+def show():
+    '''
+    Opens the snap window, importing the UI on first use. Returns the window.
+    '''
+    from ik_fk_snap import ui
+    return ui.show()
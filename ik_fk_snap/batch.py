@@ -0,0 +1,148 @@
+'''
+Snaps or bakes limb presets across many scene files from mayapy, without a UI.
+
+    mayapy -m ik_fk_snap.batch shot010.ma shot020.ma --preset L_arm --preset R_arm --mode fk_to_ik --start 1 --end 120
+    mayapy -m ik_fk_snap.batch --jobs jobs.json --workers 8 --output-dir baked
+
+A jobs file is a JSON list of {"scene", "presets", "mode", "start", "end", "step", "bake",
+"tolerance_translate", "tolerance_rotate"} entries.
+Missing keys take the command line values. Scenes are spread over a pool of worker processes.
+Each worker starts maya.standalone once and then opens, snaps and saves one scene at a time.
+Every job for the same scene runs in a single open/save.
+'''
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def initialize_worker():
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+
+def get_output_path(scene, output_dir=None):
+    if not output_dir:
+        return scene
+    return os.path.join(output_dir, os.path.basename(scene))
+
+def run_scene(scene, jobs, output_dir=None):
+    '''
+    Opens scene, runs its jobs and saves it. Runs inside a worker process.
+    Returns a summary dict; a failed scene is reported through its 'error' entry.
+    '''
+    import maya.cmds as cmds
+    from ik_fk_snap import core
+
+    start_time = time.perf_counter()
+    summary = {'scene': scene, 'output': get_output_path(scene, output_dir), 'limbs': 0, 'frames': 0, 'error': None}
+    try:
+        cmds.file(scene, open=True, force=True)
+        # Nothing is undone in batch mode, so skip recording it
+        cmds.undoInfo(stateWithoutFlush=False)
+        presets = core.PresetStore('defaultObjectSet')
+        for job in jobs:
+            if job.get('scan'):
+                limb_presets = list(core.scan_scene().values())
+            else:
+                limb_presets = [presets[preset_name] for preset_name in (job.get('presets') or presets.keys())]
+            limbs = [core.get_limb(preset) for preset in limb_presets]
+            if not limbs:
+                continue
+
+            if job.get('bake'):
+                start = job['start'] if job.get('start') is not None else cmds.playbackOptions(query=True, minTime=True)
+                end = job['end'] if job.get('end') is not None else cmds.playbackOptions(query=True, maxTime=True)
+                tolerances = {attribute: job[key] for attribute, key in (('translate', 'tolerance_translate'), ('rotate', 'tolerance_rotate'))
+                              if job.get(key) is not None}
+                core.bake_limbs(limbs, job['mode'], start, end, job.get('step') or 1, tolerances=tolerances or None)
+                summary['frames'] += len(limbs) * len(core.frame_range(start, end, job.get('step') or 1))
+            else:
+                if job.get('start') is not None:
+                    cmds.currentTime(job['start'], update=False)
+                core.snap_limbs(limbs, job['mode'])
+                summary['frames'] += len(limbs)
+            summary['limbs'] += len(limbs)
+
+        output = summary['output']
+        if os.path.dirname(output) and not os.path.isdir(os.path.dirname(output)):
+            os.makedirs(os.path.dirname(output))
+        cmds.file(rename=output)
+        cmds.file(save=True, force=True, type='mayaBinary' if output.lower().endswith('.mb') else 'mayaAscii')
+    except Exception as error:
+        summary['error'] = f"{type(error).__name__}: {error}"
+    summary['seconds'] = time.perf_counter() - start_time
+    return summary
+
+def group_jobs(jobs):
+    '''
+    Returns {scene: [job, ...]} keeping the order the scenes and jobs were given in.
+    '''
+    scenes = {}
+    for job in jobs:
+        scenes.setdefault(os.path.abspath(job['scene']), []).append(job)
+    return scenes
+
+def run(jobs, workers=None, output_dir=None):
+    '''
+    Runs jobs over a pool of mayapy worker processes and prints one line per scene.
+    Returns the scene summaries.
+    '''
+    scenes = group_jobs(jobs)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(scenes)))
+    start_time = time.perf_counter()
+    summaries = []
+    # Spawn instead of fork so every worker starts its own Maya session
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initialize_worker) as executor:
+        futures = [executor.submit(run_scene, scene, scene_jobs, output_dir) for scene, scene_jobs in scenes.items()]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            status = f"failed: {summary['error']}" if summary['error'] else f"{summary['limbs']} limbs, {summary['frames']} limb frames"
+            print(f"{summary['scene']}: {status} ({summary['seconds']:.1f}s)")
+
+    seconds = time.perf_counter() - start_time
+    frames = sum(summary['frames'] for summary in summaries)
+    print(f"{len(summaries)} scenes on {workers} workers in {seconds:.1f}s ({frames / max(seconds, 1e-6):.0f} limb frames/s)")
+    return summaries
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(prog='mayapy -m ik_fk_snap.batch', description="Snap or bake IK/FK limb presets across scene files.")
+    parser.add_argument('scenes', nargs='*', help="Scene files to process")
+    parser.add_argument('--jobs', help="JSON file with a list of jobs")
+    parser.add_argument('--preset', dest='presets', action='append', help="Preset to match, can be repeated (default: every preset in the scene)")
+    parser.add_argument('--scan', action='store_true', help="Match every limb found by scanning the scene instead of the stored presets")
+    parser.add_argument('--mode', choices=['fk_to_ik', 'ik_to_fk'], default='fk_to_ik')
+    parser.add_argument('--start', type=float, help="First frame (default: playback start)")
+    parser.add_argument('--end', type=float, help="Last frame (default: playback end)")
+    parser.add_argument('--step', type=float, default=1)
+    parser.add_argument('--no-bake', dest='bake', action='store_false', help="Snap the start frame only instead of baking the range")
+    parser.add_argument('--tolerance-translate', type=float, help="Reduce baked translate keys to this tolerance (cm)")
+    parser.add_argument('--tolerance-rotate', type=float, help="Reduce baked rotate keys to this tolerance (degrees)")
+    parser.add_argument('--workers', type=int, help="Number of worker processes (default: one per core)")
+    parser.add_argument('--output-dir', help="Save the results here instead of over the input scenes")
+    return parser.parse_args(args)
+
+def get_jobs(options):
+    defaults = {'presets': options.presets, 'scan': options.scan, 'mode': options.mode, 'start': options.start,
+                'end': options.end, 'step': options.step, 'bake': options.bake,
+                'tolerance_translate': options.tolerance_translate, 'tolerance_rotate': options.tolerance_rotate}
+    jobs = [dict(defaults, scene=scene) for scene in options.scenes]
+    if options.jobs:
+        with open(options.jobs) as jobs_file:
+            jobs += [dict(defaults, **job) for job in json.load(jobs_file)]
+    return jobs
+
+def main(args=None):
+    options = parse_args(args)
+    jobs = get_jobs(options)
+    if not jobs:
+        print("No scenes given.")
+        return 1
+    summaries = run(jobs, options.workers, options.output_dir)
+    return 1 if any(summary['error'] for summary in summaries) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1510 @@
+'''
+The part of the IK FK snap tool that works without a UI: joint lookup, solving, snapping, baking,
+scene scanning and preset storage. ik_fk_snap.ui builds its window on top of it and
+ik_fk_snap.batch drives it from mayapy.
+'''
+import bisect
+import json
+import math
+import time
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+from functools import wraps
+from ik_fk_snap import key_writer, profiling, snap_math, transform_writer
+
+def undoable(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        cmds.undoInfo(openChunk=True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+    return wrapper
+
+# Constraint types that link controls to joints
+CONSTRAINT_TYPES = [
+    'parentConstraint',
+    'pointConstraint',
+    'orientConstraint',
+    'scaleConstraint',
+    'aimConstraint',
+    'poleVectorConstraint'
+]
+
+@profiling.profiled()
+def get_joints(objectName):
+    '''
+    Returns the joints linked to objectName through constraints.
+    Results are served from joint_cache while its DG callbacks are installed.
+    '''
+    return joint_cache.get(objectName)
+
+def get_joint_uuids(joints):
+    '''
+    Returns {joint: UUID string} for joints returned by get_joints, without looking their names up again.
+    '''
+    return joint_cache.get_uuids(joints)
+
+def find_joints(objectName):
+    '''
+    Looks up the joints linked to objectName through constraints.
+    Returns the joints and the constraints they were found through.
+    '''
+    # Get the currently selected objects in the scene
+    selected_objects = objectName
+    
+    #if not selected_objects:
+    #    cmds.warning("No object selected. Please select an object.")
+    #   return []
+    
+    selected_object = selected_objects
+    
+    # Get all connected nodes to the selected object
+    connected_nodes = cmds.listConnections(selected_object)
+    
+    if not connected_nodes:
+        #print(f"No connected nodes found for '{selected_object}'.")
+        return [], []
+    
+    # Filter the connected nodes for any type of constraint
+    constraints = [node for node in connected_nodes if cmds.nodeType(node) in CONSTRAINT_TYPES]
+    
+    if not constraints:
+        #print(f"No constraints found for '{selected_object}'.")
+        return [], []
+    
+    # Find what each constraint is connected to
+    constraint_targets = {}
+    jointList = []
+    for constraint in constraints:
+        # List connections for each constraint
+        targets = cmds.listConnections(constraint, source=True, destination=False)
+        
+        # Filter targets to include only joints, keeping the unique names so duplicate short names stay apart
+        joint_targets = [target for target in targets if cmds.nodeType(target) == 'joint']
+        jointList.extend(joint_targets)
+        
+        # Store the joint targets for each constraint
+        constraint_targets[constraint] = joint_targets
+    
+    # Remove duplicates from the joint list
+    jointList = sorted(set(jointList))
+    
+    return jointList, constraints
+
+def short_name(node_name):
+    return node_name.split('|')[-1]
+
+class JointCache(object):
+    '''
+    Remembers the joints found for each control by find_joints, and the UUIDs of those joints.
+    An entry is dropped when a connection changes on the control or on one of its constraints, or when one of
+    its joints is renamed or deleted, so looking up a control seen before costs no DG queries.
+    '''
+    def __init__(self):
+        self.entries = {}
+        self.dependents = {}
+        self.uuids = {}
+        self.callback_ids = []
+
+    def get(self, objectName):
+        key = tuple(objectName) if isinstance(objectName, (list, tuple)) else objectName
+        if key in self.entries:
+            return list(self.entries[key])
+        joints, constraints = find_joints(objectName)
+        if self.callback_ids:
+            # Only cache while the callbacks can tell us the entry went stale
+            self.entries[key] = joints
+            self.uuids.update(node_handles.get_uuids(joints))
+            controls = list(key) if isinstance(key, tuple) else [key]
+            for node in controls + constraints + joints:
+                self.dependents.setdefault(short_name(node), set()).add(key)
+        return list(joints)
+
+    def get_uuids(self, joints):
+        '''
+        Returns {joint: UUID string} for joint names, using the UUIDs stored when the joints were found.
+        Names that are not cached (typed joint names) are looked up together.
+        '''
+        uuids = {joint: self.uuids[joint] for joint in joints if joint in self.uuids}
+        missing = [joint for joint in joints if joint and joint not in uuids]
+        if missing:
+            uuids.update(node_handles.get_uuids(missing))
+        return uuids
+
+    def invalidate(self, node_name):
+        self.uuids.pop(node_name, None)
+        for key in self.dependents.pop(short_name(node_name), ()):
+            for joint in self.entries.pop(key, ()):
+                self.uuids.pop(joint, None)
+
+    def clear(self, *args):
+        self.entries.clear()
+        self.dependents.clear()
+        self.uuids.clear()
+
+    def on_connection(self, source_plug, destination_plug, made, client_data):
+        self.invalidate(om.MFnDependencyNode(source_plug.node()).name())
+        self.invalidate(om.MFnDependencyNode(destination_plug.node()).name())
+
+    def on_name_changed(self, node, previous_name, client_data):
+        self.invalidate(previous_name)
+        self.invalidate(om.MFnDependencyNode(node).name())
+
+    def install_callbacks(self):
+        if self.callback_ids:
+            return
+        self.callback_ids = [
+            om.MDGMessage.addConnectionCallback(self.on_connection),
+            om.MNodeMessage.addNameChangedCallback(om.MObject(), self.on_name_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.clear),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.clear)
+        ]
+
+    def remove_callbacks(self):
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+        self.clear()
+
+joint_cache = JointCache()
+
+class JointIndex(object):
+    '''
+    Short names of all joints in the scene, kept current by node added, removed and renamed callbacks.
+    Built with one ls the first time it is asked, so checking a typed name is a dictionary lookup.
+    names is sorted, which lets the QCompleter of the line edits find a prefix with a binary search;
+    version changes with every edit, so views know when to copy it again.
+    '''
+    def __init__(self):
+        self.counts = {}
+        self.names = []
+        self.version = 0
+        self.built = False
+        self.callback_ids = []
+
+    def build(self):
+        self.counts.clear()
+        for name in cmds.ls(type='joint') or []:
+            name = short_name(name)
+            self.counts[name] = self.counts.get(name, 0) + 1
+        self.names = sorted(self.counts)
+        self.built = True
+        self.version += 1
+
+    def add(self, name):
+        if not name:
+            return
+        count = self.counts.get(name, 0)
+        self.counts[name] = count + 1
+        if not count:
+            bisect.insort(self.names, name)
+            self.version += 1
+
+    def discard(self, name):
+        count = self.counts.get(name, 0)
+        if count > 1:
+            self.counts[name] = count - 1
+        elif count:
+            del self.counts[name]
+            del self.names[bisect.bisect_left(self.names, name)]
+            self.version += 1
+
+    def is_joint(self, object_name):
+        path = bool(object_name) and '|' in object_name
+        if not self.callback_ids or path:
+            # Without the callbacks the index could be stale, and a path names one node among those sharing
+            # its short name, which the index cannot tell apart: ask the scene
+            name = object_name if path else short_name(object_name)
+            return bool(name) and cmds.objExists(name) and cmds.nodeType(name) == 'joint'
+        if not self.built:
+            self.build()
+        return short_name(object_name) in self.counts
+
+    def get_names(self):
+        if not self.built:
+            self.build()
+        return self.names
+
+    def clear(self, *args):
+        self.counts.clear()
+        self.names = []
+        self.built = False
+        self.version += 1
+
+    def on_added(self, node, client_data):
+        if self.built:
+            self.add(om.MFnDependencyNode(node).name())
+
+    def on_removed(self, node, client_data):
+        if self.built:
+            self.discard(om.MFnDependencyNode(node).name())
+
+    def on_name_changed(self, node, previous_name, client_data):
+        # Fires for every renamed node, only joints are indexed
+        if not self.built or not previous_name or not node.hasFn(om.MFn.kJoint):
+            return
+        self.discard(previous_name)
+        self.add(om.MFnDependencyNode(node).name())
+
+    def install_callbacks(self):
+        if self.callback_ids:
+            return
+        self.callback_ids = [
+            om.MDGMessage.addNodeAddedCallback(self.on_added, 'joint'),
+            om.MDGMessage.addNodeRemovedCallback(self.on_removed, 'joint'),
+            om.MNodeMessage.addNameChangedCallback(om.MObject(), self.on_name_changed),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.clear),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.clear)
+        ]
+
+    def remove_callbacks(self):
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+        self.clear()
+
+joint_index = JointIndex()
+
+def create_pole_ref(ik2_object, fk2_control_joint_object):
+    if ik2_object and fk2_control_joint_object:
+        new_name = "ik2_pole_" + ik2_object + "_ref"
+        if cmds.objExists(new_name):
+            cmds.select(new_name)
+            cmds.confirmDialog(title='IK pole Ref', message=f'IK pole Ref Exists <br> Click OK to Select it.       ', button=['OK'])
+            #cmds.inViewMessage(message="IK pole Ref Exists. Click OK to Select it.",position='midCenter',fade=True,fadeStayTime=2000,fadeInTime=500,fadeOutTime=500)
+        else:
+            locator = cmds.spaceLocator()[0]
+
+            locator = cmds.rename(locator, new_name)
+            
+            cmds.matchTransform(locator, ik2_object)
+            
+            cmds.parent(locator, fk2_control_joint_object)
+            cmds.confirmDialog(title='IK pole Ref', message=f'IK pole Ref Created. Pin it to IK1.       ', button=['OK'])
+            print("IK pole Ref Created")
+    else:
+        cmds.confirmDialog(title='IK pole Ref', message='Input IK pole control and FK2 Joint.       ', button=['OK'])
+
+def get_pole_offset(pole_ref, fk2_joint, uuids=None):
+    '''
+    Returns the matrix of pole_ref relative to the FK2 joint as a list of 16 floats, the form presets keep it in.
+    Returns None unless pole_ref is parented below the joint, like the locator create_pole_ref makes,
+    because only then the offset stays the same while the limb moves.
+    '''
+    if not pole_ref or not fk2_joint:
+        return None
+    try:
+        node_objects = get_node_objects([pole_ref, fk2_joint], uuids)
+    except RuntimeError:
+        return None
+    if not all(node_object.hasFn(om.MFn.kDagNode) for node_object in node_objects.values()):
+        return None
+    ref_path = om.MDagPath.getAPathTo(node_objects[pole_ref])
+    joint_path = om.MDagPath.getAPathTo(node_objects[fk2_joint])
+    if not ref_path.fullPathName().startswith(joint_path.fullPathName() + '|'):
+        return None
+    offset = np.reshape(list(ref_path.inclusiveMatrix()), (4, 4)) @ np.linalg.inv(np.reshape(list(joint_path.inclusiveMatrix()), (4, 4)))
+    return [float(value) for value in offset.ravel()]
+
+@profiling.profiled(payload=lambda args, result: len(args[0]))
+@undoable      
+def match_fk_to_ik(fk_controls, ik_joints, backend='api', uuids=None, control_offsets=None):
+    '''
+    Matches the FK controls to the corresponding IK joints.
+    backend 'api' solves the rotations itself and sets them with MFnTransform, 'cmds' uses matchTransform.
+    uuids ({name: UUID}) lets the api backend find the nodes without looking up their names.
+    control_offsets ({preset slot: matrix}, see calibrate_limb) lines up the joints the controls drive instead
+    of the controls themselves. The cmds backend ignores them.
+    '''
+    if backend == 'api' and api_backend_available():
+        limb = {'fk_controls': list(fk_controls), 'ik_joints': list(ik_joints), 'uuids': uuids or {},
+                'control_offsets': control_offsets}
+        snap_limbs([limb], 'fk_to_ik')
+    else:
+        for fk_ctrl, ik_jnt in zip(fk_controls, ik_joints):
+            cmds.matchTransform(fk_ctrl, ik_jnt, pos=False, rot=True)
+    print("FK controls matched to IK joints.")
+
+@profiling.profiled(payload=lambda args, result: 3)
+def calculate_pole_vector(start_joint, mid_joint, end_joint, pole_vector_ctrl, pole_distance=1.0):
+    # Get world space positions of the joints
+    start_pos = cmds.xform(start_joint, query=True, worldSpace=True, translation=True)
+    mid_pos = cmds.xform(mid_joint, query=True, worldSpace=True, translation=True)
+    end_pos = cmds.xform(end_joint, query=True, worldSpace=True, translation=True)
+
+    # Calculate the final pole vector position
+    pole_pos = snap_math.pole_positions([start_pos], [mid_pos], [end_pos], pole_distance)[0]
+
+    # Set the pole vector control position
+    cmds.xform(pole_vector_ctrl, worldSpace=True, translation=list(pole_pos))
+
+@profiling.profiled(payload=lambda args, result: len(args[1]))
+@undoable
+def match_ik_to_fk(ik_controls, fk_joints, ik_pole, ik_pole_locator, backend='api', uuids=None, pole_offset=None,
+                   control_offsets=None):
+    '''
+    Matches the IK controls to the corresponding FK joints and uses a locator for the pole vector.
+    pole_offset is the locator's matrix relative to the FK2 joint (get_pole_offset), as stored in presets.
+    Without it the offset is read from ik_pole_locator, and without a locator under FK2 the pole is placed
+    in the plane of the FK joints.
+    control_offsets is used like in match_fk_to_ik.
+    backend 'api' solves the transforms itself and sets them with MFnTransform, 'cmds' uses matchTransform and xform.
+    uuids ({name: UUID}) lets the api backend find the nodes without looking up their names.
+    '''
+    if pole_offset is None:
+        pole_offset = get_pole_offset(ik_pole_locator, fk_joints[1], uuids)
+    if backend == 'api' and api_backend_available():
+        limb = {'ik_ctrl': ik_controls[2], 'ik_pole': ik_pole, 'fk_joints': list(fk_joints), 'uuids': uuids or {},
+                'pole_offset': pole_offset, 'control_offsets': control_offsets}
+        snap_limbs([limb], 'ik_to_fk', pole_distance=0.5)
+        return
+    
+    # Match ik3_ctrl to fk3_jnt
+    cmds.matchTransform(ik_controls[2], fk_joints[2], pos=True, rot=True)
+    
+    # Match ik2_pole to the locator
+    if pole_offset is not None:
+        fk2_matrix = np.reshape(cmds.xform(fk_joints[1], query=True, worldSpace=True, matrix=True), (4, 4))
+        pole_pos = snap_math.translations(np.reshape(pole_offset, (4, 4)) @ fk2_matrix)
+        cmds.xform(ik_pole, worldSpace=True, translation=list(pole_pos))
+    else:
+        calculate_pole_vector(fk_joints[0],fk_joints[1],fk_joints[2], ik_pole, pole_distance=0.5)
+
+def api_backend_available():
+    '''
+    Returns True when the ikFkSnapApply command can be loaded, so API writes stay undoable.
+    '''
+    try:
+        transform_writer.load_plugin()
+        return True
+    except RuntimeError:
+        cmds.warning("ikFkSnapApply plugin could not be loaded, using matchTransform instead.")
+        return False
+    
+def frame_range(start, end, step=1):
+    '''
+    Returns the frames from start to end (inclusive) spaced by step.
+    '''
+    if step <= 0:
+        raise ValueError("Bake step must be greater than zero.")
+    count = int(math.floor((end - start) / float(step) + 1e-6)) + 1
+    return [start + i * step for i in range(max(count, 0))]
+
+class NodeHandles(object):
+    '''
+    MObjectHandles of the nodes the tool works on, keyed by node UUID.
+    A node is looked up once and its handle reused while it is still valid,
+    so renamed controls and duplicate short names keep resolving to the right node.
+    '''
+    def __init__(self):
+        self.handles = {}
+
+    def get_handle(self, uuid):
+        handle = self.handles.get(uuid)
+        if handle is not None and handle.isValid() and handle.isAlive():
+            return handle
+        return None
+
+    def resolve(self, nodes, uuids=None):
+        '''
+        Returns {node: MObject} for node names, found through uuids[node] when a UUID is known.
+        Valid cached handles are used as they are; the rest are looked up in one MSelectionList.
+        Nodes that cannot be found are left out.
+        '''
+        uuids = uuids or {}
+        objects = {}
+        selection = om.MSelectionList()
+        selection_index = {}
+        for node in dict.fromkeys(nodes):
+            if not node:
+                continue
+            handle = self.get_handle(uuids.get(node))
+            if handle is not None:
+                objects[node] = handle.object()
+                continue
+            for item in ([om.MUuid(uuids[node])] if uuids.get(node) else []) + [node]:
+                length = selection.length()
+                try:
+                    selection.add(item)
+                except RuntimeError:
+                    continue
+                if selection.length() > length:
+                    selection_index[node] = length
+                    break
+        
+        for node, i in selection_index.items():
+            node_object = selection.getDependNode(i)
+            handle = om.MObjectHandle(node_object)
+            self.handles[om.MFnDependencyNode(node_object).uuid().asString()] = handle
+            objects[node] = node_object
+        return objects
+
+    def get_uuids(self, nodes):
+        '''
+        Returns {node: UUID string} for the node names that exist.
+        '''
+        return {node: om.MFnDependencyNode(node_object).uuid().asString() for node, node_object in self.resolve(nodes).items()}
+
+    def get_names(self, nodes, uuids):
+        '''
+        Returns {stored name: current name} for nodes, following renames through their UUIDs.
+        '''
+        return {node: node_name(node_object) for node, node_object in self.resolve(nodes, uuids).items()}
+
+def node_name(node_object):
+    '''
+    Returns the shortest unique name of a node.
+    '''
+    if node_object.hasFn(om.MFn.kDagNode):
+        return om.MDagPath.getAPathTo(node_object).partialPathName()
+    return om.MFnDependencyNode(node_object).name()
+
+node_handles = NodeHandles()
+
+def get_node_objects(nodes, uuids=None):
+    '''
+    Resolves nodes into MObjects through node_handles.
+    Returns {name: MObject}.
+    '''
+    nodes = list(dict.fromkeys(nodes))
+    node_objects = node_handles.resolve(nodes, uuids)
+    for node in nodes:
+        if node not in node_objects:
+            raise RuntimeError(f"Cannot find '{node}' in the scene.")
+    return node_objects
+
+@profiling.profiled(payload=lambda args, result: len(args[0]) * len(args[1]))
+def sample_matrices(requests, frames, node_objects=None):
+    '''
+    Evaluates matrix attributes for every frame in a single sweep.
+    requests is a list of (node, attribute) pairs such as (ctrl, 'worldMatrix').
+    Each frame is pulled through a DG context, so currentTime is never changed.
+    Returns {(node, attribute): (N,4,4) array}.
+    '''
+    requests = list(dict.fromkeys(requests))
+    if node_objects is None:
+        node_objects = get_node_objects(node for node, attribute in requests)
+    
+    plugs = []
+    for node, attribute in requests:
+        fn_node = om.MFnDependencyNode(node_objects[node])
+        plugs.append(fn_node.findPlug(attribute, False).elementByLogicalIndex(0))
+    
+    values = np.empty((len(requests), len(frames), 16))
+    for f, frame in enumerate(frames):
+        context = om.MDGContext(om.MTime(frame, om.MTime.uiUnit()))
+        for r, plug in enumerate(plugs):
+            values[r, f] = list(om.MFnMatrixData(plug.asMObject(context)).matrix())
+    values = values.reshape(len(requests), len(frames), 4, 4)
+    return {request: values[r] for r, request in enumerate(requests)}
+
+@profiling.profiled(payload=lambda args, result: len(args[0]) * len(args[1]))
+def sample_vectors(requests, frames, node_objects):
+    '''
+    Evaluates three channel attributes such as translate for every frame, like sample_matrices.
+    Returns {(node, attribute): (N,3) array} in internal units.
+    '''
+    requests = list(dict.fromkeys(requests))
+    plugs = [om.MFnDependencyNode(node_objects[node]).findPlug(attribute, False) for node, attribute in requests]
+    values = np.empty((len(requests), len(frames), 3))
+    for f, frame in enumerate(frames):
+        context = om.MDGContext(om.MTime(frame, om.MTime.uiUnit()))
+        for r, plug in enumerate(plugs):
+            values[r, f] = [plug.child(i).asDouble(context) for i in range(3)]
+    return {request: values[r] for r, request in enumerate(requests)}
+
+def set_keys(plug, frames, values):
+    '''
+    Keys every frame/value pair on plug with a fixed number of commands.
+    Existing keys inside the range are replaced, keys outside it are kept.
+    '''
+    curves = cmds.listConnections(plug, source=True, destination=False, type='animCurve')
+    if curves:
+        cmds.cutKey(curves[0], time=(frames[0], frames[-1]), clear=True)
+        cmds.setKeyframe(plug, time=frames, insert=True)
+    else:
+        cmds.setKeyframe(plug, time=frames)
+        curves = cmds.listConnections(plug, source=True, destination=False, type='animCurve')
+    
+    # The new keys sit next to each other on the curve, so they can be written as one keyTimeValue block
+    key_times = cmds.keyframe(curves[0], query=True, timeChange=True)
+    first = min(range(len(key_times)), key=lambda i: abs(key_times[i] - frames[0]))
+    time_values = []
+    for frame, value in zip(frames, values):
+        time_values.extend((frame, float(value)))
+    cmds.setAttr(f'{curves[0]}.keyTimeValue[{first}:{first + len(frames) - 1}]', *time_values)
+
+# What places a transform besides translate and rotate, in the order snap_math.pivot_translations takes them
+PIVOT_ATTRIBUTES = ('rotatePivot', 'rotatePivotTranslate', 'scalePivot', 'scalePivotTranslate', 'scale')
+
+def get_rotation_data(nodes, node_objects=None):
+    '''
+    Reads what the solver needs to rotate and place each node, through the API and without any commands.
+    Returns {node: {'offsets': (rotate_axis, joint_orient, rotate_order), 'rotate': radians, 'path': long name,
+    'pivots': (rotatePivot, rotatePivotTranslate, scalePivot, scalePivotTranslate, scale)}}.
+    '''
+    if node_objects is None:
+        node_objects = get_node_objects(nodes)
+    data = {}
+    for node in dict.fromkeys(nodes):
+        fn_node = om.MFnDagNode(node_objects[node])
+        
+        def read(attribute):
+            return np.array([fn_node.findPlug(attribute + axis, False).asDouble() for axis in 'XYZ'])
+        
+        joint_orient = read('jointOrient') if fn_node.hasAttribute('jointOrient') else np.zeros(3)
+        rotate_order = fn_node.findPlug('rotateOrder', False).asInt()
+        data[node] = {
+            'offsets': (read('rotateAxis'), joint_orient, rotate_order),
+            'rotate': read('rotate'),
+            'path': fn_node.fullPathName(),
+            'pivots': tuple(read(attribute) for attribute in PIVOT_ATTRIBUTES)
+        }
+    return data
+
+def get_chain_parents(long_names):
+    '''
+    Returns, for each node, the index of the closest earlier node in the list that is one of its ancestors (or None).
+    '''
+    parents = []
+    for i, long_name in enumerate(long_names):
+        parent = None
+        for j in range(i):
+            if long_name.startswith(long_names[j] + '|'):
+                parent = j
+        parents.append(parent)
+    return parents
+
+# The button slots of a preset. Presets also keep entries that are not slots, such as pole_offset and control_offsets
+PRESET_SLOTS = ('FK1', 'FK2', 'FK3', 'IK1', 'IK2', 'IK3')
+
+def get_limb(pinned_objects):
+    '''
+    Returns the controls and joints of one limb from a preset or from get_current_pinned_objects.
+    The stored UUIDs of the nodes are kept in limb['uuids']. The pole reference offset and the control offsets,
+    when the preset has them, are kept in limb['pole_offset'] and limb['control_offsets'] as 4x4 arrays.
+    '''
+    uuids = {}
+    for slot in PRESET_SLOTS:
+        pinned_data = pinned_objects.get(slot)
+        if not pinned_data:
+            continue
+        if pinned_data.get('object_uuid'):
+            uuids[pinned_data['object_name']] = pinned_data['object_uuid']
+        if pinned_data.get('control_joint_uuid'):
+            uuids[pinned_data['control_joint_obj']] = pinned_data['control_joint_uuid']
+    return {
+        'fk_controls': [pinned_objects[name]['object_name'] for name in ('FK1', 'FK2', 'FK3')],
+        'fk_joints': [pinned_objects[name]['control_joint_obj'] for name in ('FK1', 'FK2', 'FK3')],
+        'ik_joints': [pinned_objects[name]['control_joint_obj'] for name in ('IK1', 'IK2', 'IK3')],
+        'ik_ctrl': pinned_objects['IK3']['object_name'],
+        'ik_pole': pinned_objects['IK2']['object_name'],
+        'uuids': uuids,
+        'pole_offset': np.reshape(pinned_objects['pole_offset'], (4, 4)) if pinned_objects.get('pole_offset') else None,
+        'control_offsets': {slot: np.reshape(offset, (4, 4)) for slot, offset in (pinned_objects.get('control_offsets') or {}).items()}
+    }
+
+def get_preset_names(pinned_objects, uuids=None):
+    '''
+    Returns {stored name: current name} for the controls and joints in the slots of a preset,
+    following renames through the stored UUIDs (those of get_limb when uuids is None).
+    '''
+    if uuids is None:
+        uuids = get_limb(pinned_objects)['uuids']
+    stored_names = [pinned_objects[slot][key] for slot in PRESET_SLOTS if pinned_objects.get(slot)
+                    for key in ('object_name', 'control_joint_obj')]
+    return node_handles.get_names(stored_names, uuids)
+
+def get_control_pairs(limb):
+    '''
+    Returns {preset slot: (control, joint it drives)} for the controls of limb.
+    '''
+    pairs = {f'FK{i + 1}': pair for i, pair in enumerate(zip(limb['fk_controls'], limb['fk_joints']))}
+    pairs['IK3'] = (limb['ik_ctrl'], limb['ik_joints'][2])
+    return pairs
+
+def world_matrix(node_object):
+    return np.reshape(list(om.MDagPath.getAPathTo(node_object).inclusiveMatrix()), (4, 4))
+
+# Largest distance between the IK control and the IK end joint a calibration accepts, relative to the chain length
+CALIBRATION_TOLERANCE = 1e-3
+
+def check_calibration(limb, offsets, node_objects):
+    '''
+    Returns {preset slot: reason} for the offsets of calibrate_limb that would not hold in other poses.
+    A joint whose rotation is not driven (by its control's constraint) does not follow the control rigidly.
+    The IK end joint only sits on the IK control while the chain reaches it: when the control's rotate pivot
+    is away from the joint (stretched out of reach) or the chain is fully extended, the offset is measured
+    at the wrong place.
+    '''
+    rejected = {}
+    for slot, (control, joint) in get_control_pairs(limb).items():
+        if slot in offsets and not is_rotation_driven(node_objects[joint]):
+            rejected[slot] = f"the rotation of '{joint}' is not driven by '{control}'"
+    if 'IK3' in offsets and 'IK3' not in rejected:
+        positions = [world_matrix(node_objects[joint])[3, :3] for joint in limb['ik_joints']]
+        chain_length = np.linalg.norm(positions[1] - positions[0]) + np.linalg.norm(positions[2] - positions[1])
+        rotate_pivot = get_rotation_data([limb['ik_ctrl']], node_objects)[limb['ik_ctrl']]['pivots'][0]
+        pivot = snap_math.transform_points(rotate_pivot, world_matrix(node_objects[limb['ik_ctrl']]))
+        distance = np.linalg.norm(pivot - positions[2])
+        if distance > CALIBRATION_TOLERANCE * chain_length:
+            rejected['IK3'] = f"'{limb['ik_ctrl']}' is {distance:.3g} away from the IK end joint, the chain does not reach it"
+        elif np.linalg.norm(positions[2] - positions[0]) > (1.0 - CALIBRATION_TOLERANCE) * chain_length:
+            rejected['IK3'] = "the IK chain is fully extended, its end joint may stop short of the control"
+    return rejected
+
+@profiling.profiled()
+def calibrate_limb(limb, node_objects=None):
+    '''
+    Measures the matrix of each control relative to the joint it drives, for presets to keep as 'control_offsets'.
+    The offsets do not change with the pose while the joints follow their controls rigidly, so one measurement
+    (at bind pose, or again after the rig changed) serves every later snap.
+    Offsets that check_calibration rejects are left out with a warning, those controls snap uncalibrated.
+    node_objects ({name: MObject}) skips resolving the limb. Returns {preset slot: 16 floats}.
+    '''
+    if node_objects is None:
+        limb, node_objects = resolve_limb(limb)
+    offsets = {}
+    for slot, (control, joint) in get_control_pairs(limb).items():
+        offset = world_matrix(node_objects[control]) @ np.linalg.inv(world_matrix(node_objects[joint]))
+        offsets[slot] = [float(value) for value in offset.ravel()]
+    for slot, reason in check_calibration(limb, offsets, node_objects).items():
+        cmds.warning(f"{slot} not calibrated: {reason}.")
+        del offsets[slot]
+    return offsets
+
+def resolve_limb(limb):
+    '''
+    Returns limb with its nodes renamed to their current names and the MObjects of those nodes.
+    Nodes with a stored UUID are found through it, so no name lookup happens while their handles are valid.
+    '''
+    uuids = limb.get('uuids', {})
+    nodes = []
+    for key in ('fk_controls', 'fk_joints', 'ik_joints', 'ik_ctrl', 'ik_pole'):
+        value = limb.get(key)
+        nodes += value if isinstance(value, list) else [value] if value else []
+    node_objects = get_node_objects(nodes, uuids)
+    
+    # Only nodes found through a UUID can have been renamed
+    names = {node: node_name(node_object) if uuids.get(node) else node for node, node_object in node_objects.items()}
+    resolved = dict(limb)
+    for key, value in limb.items():
+        if key in ('fk_controls', 'fk_joints', 'ik_joints'):
+            resolved[key] = [names[node] for node in value]
+        elif key in ('ik_ctrl', 'ik_pole'):
+            resolved[key] = names[value]
+    return resolved, {names[node]: node_object for node, node_object in node_objects.items()}
+
+# Largest difference from Maya's IK solver a predicted chain may show on the frames it is checked on (cm, degrees)
+IK_PREDICTION_TOLERANCE = {'translate': 1e-3, 'rotate': 1e-2}
+# Shorter bakes evaluate the IK handles, checking a prediction would cost about as much
+IK_PREDICTION_MIN_FRAMES = 10
+# check_ik_models evaluates the IK handles on every this many frames (and the last one)
+IK_PREDICTION_CHECK_STEP = 8
+
+def get_limb_requests(limb, mode):
+    '''
+    Returns the matrices to sample and the controls that will be rotated to snap limb in mode ('fk_to_ik' or 'ik_to_fk').
+    '''
+    if mode == 'fk_to_ik':
+        requests = [(node, 'worldMatrix') for node in limb['fk_controls'] + limb['ik_joints']]
+        requests += [(node, 'parentMatrix') for node in limb['fk_controls']]
+        return requests, limb['fk_controls']
+    requests = [(node, 'worldMatrix') for node in limb['fk_joints']]
+    requests += [(limb['ik_ctrl'], 'parentMatrix'), (limb['ik_pole'], 'parentMatrix')]
+    return requests, [limb['ik_ctrl']]
+
+def get_keyed_attributes(limb, mode):
+    '''
+    Returns the (node, attribute) pairs that solve_limb gives values for, the ones a bake of limb in mode keys.
+    '''
+    if mode == 'fk_to_ik':
+        return [(node, 'rotate') for node in limb['fk_controls']]
+    return [(limb['ik_ctrl'], 'translate'), (limb['ik_ctrl'], 'rotate'), (limb['ik_pole'], 'translate')]
+
+def get_key_times(plan, first, last):
+    '''
+    Returns the sorted times of the keys from first to last on the channels a bake of plan keys.
+    '''
+    plugs = [f'{node}.{attribute}{axis}' for limb in plan['limbs'] for node, attribute in get_keyed_attributes(limb, plan['mode'])
+             for axis in 'XYZ']
+    return sorted(set(cmds.keyframe(plugs, query=True, time=(first, last), timeChange=True) or []))
+
+def solve_limb(limb, mode, samples, rotation_data, pole_distance=0.5):
+    '''
+    Returns the new values of the limb's controls as a list of (node, attribute, (N,3) array),
+    where attribute is 'rotate' (radians) or 'translate'.
+    '''
+    # A calibrated control is placed so that the joint it drives lines up, rather than the control itself
+    offsets = limb.get('control_offsets') or {}
+    if mode == 'fk_to_ik':
+        fk_controls = limb['fk_controls']
+        target_worlds = [samples[(ik_jnt, 'worldMatrix')] for ik_jnt in limb['ik_joints']]
+        target_worlds = [np.reshape(offsets[f'FK{i + 1}'], (4, 4)) @ target_world if f'FK{i + 1}' in offsets else target_world
+                         for i, target_world in enumerate(target_worlds)]
+        rotations = snap_math.fk_rotations(
+            [samples[(fk_ctrl, 'worldMatrix')] for fk_ctrl in fk_controls],
+            [samples[(fk_ctrl, 'parentMatrix')] for fk_ctrl in fk_controls],
+            target_worlds,
+            get_chain_parents([rotation_data[fk_ctrl]['path'] for fk_ctrl in fk_controls]),
+            [rotation_data[fk_ctrl]['offsets'] for fk_ctrl in fk_controls],
+            [rotation_data[fk_ctrl]['rotate'] for fk_ctrl in fk_controls])
+        return [(fk_ctrl, 'rotate', values) for fk_ctrl, values in zip(fk_controls, rotations)]
+    
+    ik_ctrl = limb['ik_ctrl']
+    ik_pole = limb['ik_pole']
+    positions = [snap_math.translations(samples[(jnt, 'worldMatrix')]) for jnt in limb['fk_joints']]
+    ctrl_parent = samples[(ik_ctrl, 'parentMatrix')]
+    ctrl_target = samples[(limb['fk_joints'][2], 'worldMatrix')]
+    if 'IK3' in offsets:
+        ctrl_target = np.reshape(offsets['IK3'], (4, 4)) @ ctrl_target
+    rotate_axis, joint_orient, rotate_order = rotation_data[ik_ctrl]['offsets']
+    ctrl_rotate = snap_math.local_rotations(ctrl_target, ctrl_parent,
+                                           rotate_axis, joint_orient, rotate_order, rotation_data[ik_ctrl]['rotate'])
+    # Without calibration the control's rotate pivot goes onto the joint, as matchTransform does
+    ctrl_translate = snap_math.pivot_translations(ctrl_target, ctrl_parent, rotation_data[ik_ctrl]['pivots'],
+                                                  align_pivot='IK3' not in offsets)
+    
+    if limb.get('pole_offset') is not None:
+        # The pole reference moves with the FK2 joint
+        pole_pos = snap_math.translations(np.reshape(limb['pole_offset'], (4, 4)) @ samples[(limb['fk_joints'][1], 'worldMatrix')])
+    else:
+        pole_pos = snap_math.pole_positions(positions[0], positions[1], positions[2], pole_distance)
+    pole_translate = snap_math.local_translations(pole_pos, samples[(ik_pole, 'parentMatrix')])
+    return [(ik_ctrl, 'translate', ctrl_translate), (ik_ctrl, 'rotate', ctrl_rotate), (ik_pole, 'translate', pole_translate)]
+
+def is_driven(plugs):
+    return bool(cmds.listConnections(plugs, source=True, destination=False))
+
+def is_rotation_driven(node_object):
+    '''
+    Returns True when the rotate plug of node_object or one of its children has an incoming connection.
+    '''
+    plug = om.MFnDependencyNode(node_object).findPlug('rotate', False)
+    return plug.isDestination or any(plug.child(i).isDestination for i in range(3))
+
+def channel_plugs(node, attribute):
+    return [f'{node}.{attribute}'] + [f'{node}.{attribute}{axis}' for axis in 'XYZ']
+
+def get_ik_model(limb):
+    '''
+    Returns what predict_ik_worlds needs to solve the limb's IK joints without evaluating its IK handle,
+    or None and the reason the chain cannot be modeled.
+    Only rotate plane handles on three joints without stretch, twist, roll or IK/FK blending are modeled.
+    The last joint may follow the chain or be constrained to the IK control.
+    '''
+    ik_joints = limb['ik_joints']
+    handles = list(dict.fromkeys(cmds.listConnections(f'{ik_joints[0]}.message', source=False, destination=True, type='ikHandle') or []))
+    if len(handles) != 1:
+        return None, "it does not start exactly one ikHandle"
+    handle = handles[0]
+    if cmds.ikHandle(handle, query=True, solver=True) != 'ikRPsolver':
+        return None, f"'{handle}' is not a rotate plane handle"
+
+    long_names = cmds.ls(ik_joints, long=True)
+    for child, parent in zip(long_names[1:], long_names[:-1]):
+        if (cmds.listRelatives(child, parent=True, fullPath=True) or [None])[0] != parent:
+            return None, "its joints are not parented directly under each other"
+    effector = cmds.ikHandle(handle, query=True, endEffector=True)
+    effector_offset = np.subtract(cmds.getAttr(f'{effector}.translate')[0], cmds.getAttr(f'{ik_joints[2]}.translate')[0])
+    if (cmds.listRelatives(effector, parent=True, fullPath=True) or [None])[0] != long_names[1] or np.abs(effector_offset).max() > 1e-6:
+        return None, f"the end effector of '{handle}' is not on its last joint"
+
+    for attribute, value in (('twist', 0.0), ('roll', 0.0), ('ikBlend', 1.0)):
+        if is_driven(f'{handle}.{attribute}') or abs(cmds.getAttr(f'{handle}.{attribute}') - value) > 1e-6:
+            return None, f"'{handle}.{attribute}' is animated or not {value:g}"
+    stretch_plugs = [plug for joint in ik_joints for plug in channel_plugs(joint, 'scale')]
+    stretch_plugs += [plug for joint in ik_joints[1:] for plug in channel_plugs(joint, 'translate')]
+    if is_driven(stretch_plugs):
+        return None, "its joints stretch"
+
+    end_driver = None
+    rotate_sources = list(dict.fromkeys(cmds.listConnections(channel_plugs(ik_joints[2], 'rotate'), source=True, destination=False) or []))
+    if rotate_sources:
+        constraint = rotate_sources[0]
+        targets = set(cmds.ls(cmds.listConnections(f'{constraint}.target', source=True, destination=False) or [], long=True))
+        targets.discard(cmds.ls(constraint, long=True)[0])
+        if len(rotate_sources) > 1 or cmds.nodeType(constraint) not in CONSTRAINT_TYPES or not limb.get('ik_ctrl') \
+                or targets != set(cmds.ls(limb['ik_ctrl'], long=True)):
+            return None, "its last joint is rotated by something other than a constraint to the IK control"
+        end_driver = limb['ik_ctrl']
+    return {'handle': handle, 'ik_joints': list(ik_joints), 'end_driver': end_driver}, None
+
+def get_ik_model_requests(model):
+    '''
+    Returns the matrices and the vectors predict_ik_worlds samples for model. None of them depends on the IK solve.
+    '''
+    handle = model['handle']
+    first_joint = model['ik_joints'][0]
+    matrices = [(handle, 'worldMatrix'), (handle, 'parentMatrix'), (first_joint, 'parentMatrix')]
+    if model['end_driver']:
+        matrices.append((model['end_driver'], 'worldMatrix'))
+    return matrices, [(handle, 'poleVector'), (first_joint, 'translate')]
+
+def predict_ik_worlds(model, samples, vectors, references):
+    '''
+    Returns the world matrices of the model's three IK joints on every sampled frame, solved with snap_math.two_bone_ik
+    from the handle, its pole vector and the root joint.
+    references are the joints' world matrices evaluated by Maya on the first frame. The bone lengths, the bend
+    direction and the orientation of each joint relative to its bone are taken from them.
+    '''
+    handle = model['handle']
+    first_joint = model['ik_joints'][0]
+    root = snap_math.transform_points(vectors[(first_joint, 'translate')], samples[(first_joint, 'parentMatrix')])
+    goal = snap_math.translations(samples[(handle, 'worldMatrix')])
+    # The pole vector is stored in the space of the handle's parent
+    pole_vector = np.einsum('...i,...ij->...j', vectors[(handle, 'poleVector')], samples[(handle, 'parentMatrix')][..., :3, :3])
+
+    reference_positions = [snap_math.translations(reference) for reference in references]
+    upper_length = np.linalg.norm(reference_positions[1] - reference_positions[0])
+    lower_length = np.linalg.norm(reference_positions[2] - reference_positions[1])
+    mid, end, normal = snap_math.two_bone_ik(root[:1], goal[:1], pole_vector[:1], upper_length, lower_length)
+    up = np.cross(normal[0], snap_math.normalize(goal[0] - root[0]))
+    bend = 1.0 if np.dot(reference_positions[1] - reference_positions[0], up) >= 0.0 else -1.0
+
+    mid, end, normal = snap_math.two_bone_ik(root, goal, pole_vector, upper_length, lower_length, bend)
+    rotations = [snap_math.bone_frames(root, mid, normal), snap_math.bone_frames(mid, end, normal)]
+    if model['end_driver']:
+        rotations.append(samples[(model['end_driver'], 'worldMatrix')][..., :3, :3])
+    else:
+        rotations.append(rotations[1])
+
+    worlds = []
+    for reference, joint_rotations, positions in zip(references, rotations, [root, mid, end]):
+        offset = reference[:3, :3] @ np.linalg.inv(joint_rotations[0])
+        world = np.zeros(positions.shape[:-1] + (4, 4))
+        world[..., :3, :3] = offset @ joint_rotations
+        world[..., 3, :3] = positions
+        world[..., 3, 3] = 1.0
+        worlds.append(world)
+    return worlds
+
+@profiling.profiled(payload=lambda args, result: len(args[0]['models']))
+def check_ik_models(plan, frames):
+    '''
+    Evaluates Maya's solver on every IK_PREDICTION_CHECK_STEP of frames and the last one only, to check the prediction
+    of each model of plan.
+    Chains that are off by more than IK_PREDICTION_TOLERANCE there go back to the requests sampled on every frame,
+    so they are sampled with the rest (chunk by chunk in a BakeJob). The joints evaluated on the first frame
+    are kept as the model's 'references'.
+    Returns the largest position (cm) and rotation (degrees) difference of the chains that stay predicted.
+    '''
+    check_frames = list(frames[::IK_PREDICTION_CHECK_STEP])
+    if check_frames[-1] != frames[-1]:
+        check_frames.append(frames[-1])
+    model_requests = [get_ik_model_requests(model) for model in plan['models']]
+    joint_requests = [[(joint, 'worldMatrix') for joint in model['ik_joints']] for model in plan['models']]
+    samples = sample_matrices([request for matrix_requests, vector_requests in model_requests for request in matrix_requests]
+                              + [request for requests in joint_requests for request in requests],
+                              check_frames, plan['node_objects'])
+    vectors = sample_vectors([request for matrix_requests, vector_requests in model_requests for request in vector_requests],
+                             check_frames, plan['node_objects'])
+
+    errors = [0.0, 0.0]
+    models = []
+    for model, requests in zip(plan['models'], joint_requests):
+        checks = [samples[request] for request in requests]
+        worlds = predict_ik_worlds(model, samples, vectors, [check[0] for check in checks])
+        position_error = max(np.linalg.norm(snap_math.translations(world) - snap_math.translations(check), axis=-1).max()
+                             for world, check in zip(worlds, checks))
+        rotation_error = max(np.degrees(snap_math.rotation_differences(world, check)).max()
+                             for world, check in zip(worlds, checks))
+        if position_error > IK_PREDICTION_TOLERANCE['translate'] or rotation_error > IK_PREDICTION_TOLERANCE['rotate']:
+            print(f"IK prediction of '{model['handle']}' is off by {position_error:.4f} cm, {rotation_error:.4f} deg, sampling it instead.")
+            plan['requests'] += requests
+            continue
+        model['references'] = [check[0] for check in checks]
+        models.append(model)
+        errors = [max(errors[0], position_error), max(errors[1], rotation_error)]
+    plan['models'] = models
+    return errors
+
+@profiling.profiled(payload=lambda args, result: len(args[0]))
+def predict_ik_samples(models, samples, vectors):
+    '''
+    Adds the world matrices of every model's IK joints on every frame to samples without evaluating the IK handles.
+    samples and vectors hold what get_ik_model_requests asks for; the models were checked by check_ik_models.
+    The prediction starts from the joints evaluated on the first frame, so it runs over every frame at once:
+    models whose joints samples already holds are left as they are, for a BakeJob solving in chunks.
+    '''
+    for model in models:
+        requests = [(joint, 'worldMatrix') for joint in model['ik_joints']]
+        if requests[0] in samples:
+            continue
+        samples.update(zip(requests, predict_ik_worlds(model, samples, vectors, model['references'])))
+
+def prepare_limbs(limbs, mode, frames, predict_ik=False):
+    '''
+    Resolves the limbs and collects what has to be sampled to solve them over frames.
+    With predict_ik, FK to IK bakes predict the IK joints (predict_ik_samples) instead of evaluating the IK handles
+    on every frame, for the chains get_ik_model can model and check_ik_models finds close to Maya's solver.
+    Returns a plan for sample_limbs and solve_samples.
+    '''
+    plan = {'mode': mode, 'requests': [], 'vector_requests': [], 'controls': [], 'node_objects': {}, 'limbs': [], 'models': [],
+            'ik_errors': None}
+    predict_ik = predict_ik and mode == 'fk_to_ik' and len(frames) >= IK_PREDICTION_MIN_FRAMES
+    for limb in limbs:
+        limb, limb_objects = resolve_limb(limb)
+        plan['limbs'].append(limb)
+        plan['node_objects'].update(limb_objects)
+        limb_requests, limb_controls = get_limb_requests(limb, mode)
+        if predict_ik:
+            model, reason = get_ik_model(limb)
+            if model is None:
+                print(f"Sampling the IK chain of '{limb['ik_joints'][0]}', {reason}.")
+            else:
+                plan['node_objects'].update(get_node_objects([model['handle']]))
+                joint_requests = [(joint, 'worldMatrix') for joint in limb['ik_joints']]
+                matrix_requests, vector_requests = get_ik_model_requests(model)
+                limb_requests = [request for request in limb_requests if request not in joint_requests] + matrix_requests
+                plan['vector_requests'] += vector_requests
+                plan['models'].append(model)
+        plan['requests'] += limb_requests
+        plan['controls'] += limb_controls
+    if plan['models']:
+        plan['ik_errors'] = check_ik_models(plan, frames)
+    if plan['models']:
+        position_error, rotation_error = plan['ik_errors']
+        print(f"IK joints predicted over {len(frames)} frames, largest difference from Maya's solver: "
+              f"{position_error:.5f} cm, {rotation_error:.5f} deg.")
+    return plan
+
+def sample_limbs(plan, frames):
+    '''
+    Samples the matrices and vectors of plan on frames. Returns ({request: (N,4,4)}, {request: (N,3)}).
+    '''
+    samples = sample_matrices(plan['requests'], frames, plan['node_objects'])
+    vectors = sample_vectors(plan['vector_requests'], frames, plan['node_objects']) if plan['vector_requests'] else {}
+    return samples, vectors
+
+def solve_samples(plan, frames, samples, vectors, pole_distance=0.5, rotation_data=None):
+    '''
+    Solves the limbs of plan from their samples over frames.
+    rotation_data (get_rotation_data of the plan's controls) is read when not given. A BakeJob solving in chunks
+    passes the same one with the rotate values each chunk ended on, so the euler angles continue from them.
+    Returns the (node, attribute, values) list of every limb.
+    '''
+    if plan['models']:
+        predict_ik_samples(plan['models'], samples, vectors)
+    if rotation_data is None:
+        rotation_data = get_rotation_data(plan['controls'], plan['node_objects'])
+    
+    results = []
+    for limb in plan['limbs']:
+        results += solve_limb(limb, plan['mode'], samples, rotation_data, pole_distance)
+    return results
+
+def solve_limbs(limbs, mode, frames, pole_distance=0.5, predict_ik=False):
+    '''
+    Solves several limbs over frames with one sampling sweep for all of them.
+    Returns the (node, attribute, values) list of every limb and the MObjects of the nodes involved.
+    '''
+    plan = prepare_limbs(limbs, mode, frames, predict_ik)
+    samples, vectors = sample_limbs(plan, frames)
+    return solve_samples(plan, frames, samples, vectors, pole_distance), plan['node_objects']
+
+@profiling.profiled(payload=lambda args, result: len(args[0]))
+@undoable
+def snap_limbs(limbs, mode, pole_distance=0.5):
+    '''
+    Snaps every limb on the current frame. All transforms are queried in one pass and set with one command.
+    '''
+    frame = cmds.currentTime(query=True)
+    results, node_objects = solve_limbs(limbs, mode, [frame], pole_distance)
+    if api_backend_available():
+        transform_writer.set_transforms([(node, attribute, values[0]) for node, attribute, values in results], node_objects)
+    else:
+        for node, attribute, values in results:
+            cmds.setAttr(f'{node}.{attribute}', *(np.degrees(values[0]) if attribute == 'rotate' else values[0]))
+    print(f"{len(limbs)} limbs matched.")
+
+@undoable
+def write_bake(results, frames, node_objects, layer='active', tolerances=None, key_bake=None):
+    '''
+    Keys solved limb values on frames. Keys go into the anim curves through MFnAnimCurve, on the selected
+    animation layer unless layer is given (None keys the base layer).
+    tolerances ({'translate': cm, 'rotate': degrees}) reduces the baked keys to the fewest that stay within them.
+    key_bake is the key_writer.KeyBake of results when a BakeJob already prepared or reduced part of it.
+    '''
+    if key_bake is not None or api_backend_available():
+        if key_bake is None:
+            key_bake = key_writer.KeyBake(results, frames, node_objects,
+                                          key_writer.get_active_layer() if layer == 'active' else layer, tolerances)
+        report = key_bake.write()
+        if tolerances:
+            errors = ', '.join(f"{attribute} {error:.4f}{' deg' if attribute == 'rotate' else ' cm'}"
+                               for attribute, error in report['errors'].items())
+            print(f"Key reduction removed {report['removed']} of {report['keys'] + report['removed']} keys, largest error: {errors}.")
+    else:
+        if tolerances:
+            cmds.warning("Key reduction needs the ikFkSnapApply plugin, every frame is keyed.")
+        for node, attribute, values in results:
+            if attribute == 'rotate':
+                values = np.degrees(values)
+            for column, axis in enumerate('XYZ'):
+                set_keys(f'{node}.{attribute}{axis}', frames, values[:, column])
+
+class BakeJob(object):
+    '''
+    A bake of several limbs split into chunks, so it can run from idle callbacks without freezing Maya.
+    Each step() does about chunk_seconds of the current stage: 'sample' the frames (through DG contexts, so
+    the current time and the viewport are left alone meanwhile), 'solve' them, 'reduce' the keys of each
+    attribute, then 'write' them all in one undoable command. cancel() before the write leaves the scene untouched.
+    The bake cancels itself when a new scene is opened or one of its nodes is deleted between steps,
+    rather than sampling nodes that are gone.
+    With tolerances the times of the keys the controls already have in the range are baked as well, even off step,
+    since the key reduction keeps them.
+    '''
+    def __init__(self, limbs, mode, start, end, step=1, pole_distance=0.5, layer='active', tolerances=None,
+                 predict_ik=True, chunk_seconds=0.05):
+        self.limb_count = len(limbs)
+        self.frames = frame_range(start, end, step)
+        if not self.frames:
+            raise ValueError("The bake range has no frames.")
+        self.plan = prepare_limbs(limbs, mode, self.frames, predict_ik)
+        if tolerances:
+            key_times = [key_time for key_time in get_key_times(self.plan, self.frames[0], self.frames[-1])
+                         if np.abs(np.subtract(self.frames, key_time)).min() > 1e-6]
+            self.frames = sorted(self.frames + key_times)
+        self.handles = [om.MObjectHandle(node_object) for node_object in self.plan['node_objects'].values()]
+        self.callback_ids = []
+        self.pole_distance = pole_distance
+        self.layer = layer
+        self.tolerances = tolerances
+        self.chunk_seconds = chunk_seconds
+        self.chunk_size = 1
+        self.stage = 'sample'
+        self.chunks = []
+        self.frames_done = 0
+        self.frames_solved = 0
+        self.attribute_count = sum(len(get_keyed_attributes(limb, mode)) for limb in self.plan['limbs'])
+        self.samples = None
+        self.vectors = None
+        self.rotation_data = None
+        self.results = []
+        self.key_bake = None
+        self.started = None
+        self.done = False
+        self.cancelled = False
+
+    def step(self):
+        '''
+        Runs the next chunk of the current stage, or writes the keys once every other stage is done.
+        Returns True while there is work left.
+        '''
+        if self.done or self.cancelled:
+            return False
+        if not all(handle.isValid() and handle.isAlive() for handle in self.handles):
+            cmds.warning("A node of the bake was deleted, the bake is cancelled and no keys were changed.")
+            self.cancel()
+            return False
+        if self.stage == 'write':
+            self.finish()
+            return False
+        if self.started is None:
+            self.started = time.perf_counter()
+            self.install_callbacks()
+        chunk_start = time.perf_counter()
+        stage = self.stage
+        count = {'sample': self.sample, 'solve': self.solve, 'reduce': self.reduce}[stage](self.chunk_size)
+        if self.chunk_seconds is None:
+            return True
+        if self.stage != stage:
+            # Stages cost differently per item, the next one starts small again
+            self.chunk_size = 1
+            return True
+        # Size the next chunk to take about chunk_seconds, growing at most fourfold so one slow guess cannot stall Maya
+        seconds = time.perf_counter() - chunk_start
+        self.chunk_size = max(1, min(int(count * self.chunk_seconds / max(seconds, 1e-6)), count * 4))
+        return True
+
+    def sample(self, count):
+        frames = self.frames[self.frames_done:self.frames_done + count]
+        self.chunks.append(sample_limbs(self.plan, frames))
+        self.frames_done += len(frames)
+        if self.frames_done == len(self.frames):
+            self.samples = {request: np.concatenate([chunk[0][request] for chunk in self.chunks]) for request in self.chunks[0][0]}
+            self.vectors = {request: np.concatenate([chunk[1][request] for chunk in self.chunks]) for request in self.chunks[0][1]}
+            self.chunks = []
+            predict_ik_samples(self.plan['models'], self.samples, self.vectors)
+            self.rotation_data = get_rotation_data(self.plan['controls'], self.plan['node_objects'])
+            self.stage = 'solve'
+        return len(frames)
+
+    def solve(self, count):
+        start = self.frames_solved
+        frames = self.frames[start:start + count]
+        end = start + len(frames)
+        samples = {request: values[start:end] for request, values in self.samples.items()}
+        vectors = {request: values[start:end] for request, values in self.vectors.items()}
+        self.results.append(solve_samples(self.plan, frames, samples, vectors, self.pole_distance, self.rotation_data))
+        # The next chunk continues the euler angles from the last solved frame
+        for node, attribute, values in self.results[-1]:
+            if attribute == 'rotate':
+                self.rotation_data[node]['rotate'] = values[-1]
+        self.frames_solved = end
+        if end == len(self.frames):
+            self.results = [(node, attribute, np.concatenate([chunk[i][2] for chunk in self.results]))
+                            for i, (node, attribute, values) in enumerate(self.results[0])]
+            self.samples = self.vectors = None
+            self.stage = 'write'
+            if api_backend_available():
+                layer = key_writer.get_active_layer() if self.layer == 'active' else self.layer
+                self.key_bake = key_writer.KeyBake(self.results, self.frames, self.plan['node_objects'], layer, self.tolerances)
+                # Adding plugs to the layer edits the scene, that is left to the undoable write
+                if not self.key_bake.edits_layer():
+                    self.key_bake.prepare()
+                    self.stage = 'reduce'
+        return len(frames)
+
+    def reduce(self, count):
+        if not self.key_bake.reduce(count):
+            self.stage = 'write'
+        return count
+
+    def finish(self):
+        self.remove_callbacks()
+        write_bake(self.results, self.frames, self.plan['node_objects'], self.layer, self.tolerances, self.key_bake)
+        self.done = True
+        print(f"{self.limb_count} limbs baked over {len(self.frames)} frames.")
+
+    def cancel(self):
+        self.remove_callbacks()
+        self.cancelled = True
+        self.chunks = []
+        self.samples = self.vectors = self.key_bake = None
+
+    def on_scene_change(self, client_data):
+        cmds.warning("The scene is being replaced, the bake is cancelled and no keys were changed.")
+        self.cancel()
+
+    def install_callbacks(self):
+        self.callback_ids = [
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeNew, self.on_scene_change),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeOpen, self.on_scene_change)
+        ]
+
+    def remove_callbacks(self):
+        if self.callback_ids:
+            om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+
+    def run(self):
+        '''
+        Runs the whole bake now, each stage in one go.
+        '''
+        self.chunk_seconds = None
+        self.chunk_size = max(len(self.frames), self.attribute_count)
+        while self.step():
+            pass
+
+    def progress(self):
+        '''
+        Returns the work done and the total work, counting sampled and solved frames, reduced attributes and the write.
+        '''
+        reduced = self.key_bake.reduced if self.key_bake is not None else 0
+        if self.stage == 'write' or self.done:
+            reduced = self.attribute_count
+        total = 2 * len(self.frames) + self.attribute_count + 1
+        return self.frames_done + self.frames_solved + reduced + (1 if self.done else 0), total
+
+    def frames_per_second(self):
+        if self.started is None:
+            return 0.0
+        return self.frames_done / max(time.perf_counter() - self.started, 1e-6)
+
+@profiling.profiled(payload=lambda args, result: len(args[0]))
+@undoable
+def bake_limbs(limbs, mode, start, end, step=1, pole_distance=0.5, layer='active', tolerances=None, predict_ik=True):
+    '''
+    Snaps and keys every limb on every frame from start to end, see write_bake for layer and tolerances.
+    FK to IK bakes predict the IK joints analytically where they can (predict_ik, see prepare_limbs).
+    BakeJob runs the same bake in chunks.
+    '''
+    BakeJob(limbs, mode, start, end, step, pole_distance, layer, tolerances, predict_ik).run()
+
+def bake_fk_to_ik(fk_controls, ik_joints, start, end, step=1):
+    '''
+    Matches the FK controls to the IK joints on every frame from start to end and keys them.
+    '''
+    bake_limbs([{'fk_controls': list(fk_controls), 'ik_joints': list(ik_joints)}], 'fk_to_ik', start, end, step)
+
+def bake_ik_to_fk(ik_controls, fk_joints, ik_pole, start, end, step=1, pole_distance=0.5, pole_offset=None):
+    '''
+    Matches the IK control and pole to the FK joints on every frame from start to end and keys them.
+    pole_offset places the pole like match_ik_to_fk does.
+    '''
+    limb = {'ik_ctrl': ik_controls[2], 'ik_pole': ik_pole, 'fk_joints': list(fk_joints), 'pole_offset': pole_offset}
+    bake_limbs([limb], 'ik_to_fk', start, end, step, pole_distance)
+
+class SceneIndex(object):
+    '''
+    The ikHandles, joints and constraints of the scene, indexed from a fixed number of bulk queries.
+    Every node is stored by its long name; driven_by and drives map a node to the constraints it is driven by or drives.
+    '''
+    def __init__(self):
+        self.joints = set(cmds.ls(type='joint', long=True) or [])
+        self.handles = cmds.ls(type='ikHandle', long=True) or []
+        effectors = cmds.ls(type='ikEffector', long=True) or []
+        constraints = cmds.ls(type=CONSTRAINT_TYPES, long=True) or []
+        self.pole_constraints = set(cmds.ls(type='poleVectorConstraint', long=True) or [])
+        # Transforms with a curve shape, the only ones taken as an IK control without a constraint to prove it
+        self.curve_transforms = {shape.rsplit('|', 1)[0] for shape in cmds.ls(type='nurbsCurve', long=True) or []}
+        
+        self.start_joints = {}
+        self.effectors = {}
+        self.end_joints = {}
+        self.pole_vectors = {}
+        self.constrained = {}
+        self.targets = {constraint: [] for constraint in constraints}
+        self.driven_by = {}
+        self.drives = {}
+        
+        # One listConnections call returns every incoming connection as (destination plug, source plug)
+        nodes = self.handles + effectors + constraints
+        connections = cmds.listConnections(nodes, source=True, destination=False, connections=True, plugs=True, fullNodeName=True) if nodes else None
+        connections = connections or []
+        for destination_plug, source_plug in zip(connections[::2], connections[1::2]):
+            destination, destination_attr = destination_plug.split('.', 1)
+            source, source_attr = source_plug.split('.', 1)
+            if destination_attr == 'startJoint':
+                self.start_joints[destination] = source
+            elif destination_attr == 'endEffector':
+                self.effectors[destination] = source
+            elif destination_attr.startswith('translate') and source in self.joints:
+                self.end_joints[destination] = source
+            elif destination_attr.startswith('poleVector') and source in self.pole_constraints:
+                self.pole_vectors[destination] = source
+            elif destination_attr == 'constraintParentInverseMatrix':
+                self.constrained[destination] = source
+            elif destination_attr.startswith('target[') and source != destination and destination in self.targets:
+                if source not in self.targets[destination]:
+                    self.targets[destination].append(source)
+        
+        for constraint, targets in self.targets.items():
+            if constraint in self.constrained:
+                self.driven_by.setdefault(self.constrained[constraint], []).append(constraint)
+            for target in targets:
+                self.drives.setdefault(target, []).append(constraint)
+
+    def drivers(self, node):
+        '''
+        Returns the nodes that drive node through constraints.
+        '''
+        return [target for constraint in self.driven_by.get(node, []) for target in self.targets[constraint]]
+
+    def get_chain(self, handle):
+        '''
+        Returns the start, mid and end joint of a handle, or None when it does not solve a three joint chain.
+        '''
+        start = self.start_joints.get(handle)
+        end = self.end_joints.get(self.effectors.get(handle))
+        if not start or not end:
+            return None
+        mid = end.rsplit('|', 1)[0]
+        if mid not in self.joints or mid.rsplit('|', 1)[0] != start:
+            return None
+        return [start, mid, end]
+
+    def get_ik_control(self, handle, end_joint):
+        '''
+        Returns the control that orients the end joint or moves the handle, falling back to the handle's parent
+        when it is a curve control. Returns None otherwise, the pole vector target is never taken as the IK control.
+        '''
+        for node in (end_joint, handle):
+            controls = [target for constraint in self.driven_by.get(node, []) if constraint not in self.pole_constraints
+                        for target in self.targets[constraint] if target not in self.joints]
+            if controls:
+                return controls[0]
+        parent = handle.rsplit('|', 1)[0]
+        return parent if parent in self.curve_transforms else None
+
+    def get_pole(self, handle):
+        targets = self.targets.get(self.pole_vectors.get(handle), [])
+        return targets[0] if targets else None
+
+    def get_fk(self, ik_joint):
+        '''
+        Returns the FK control and FK joint that drive the same joint as ik_joint (a blended bind joint), or (None, None).
+        An FK joint without a constraint is taken as its own control, an FK control without a joint as its own joint.
+        '''
+        for constraint in self.drives.get(ik_joint, []):
+            for target in self.targets[constraint]:
+                if target == ik_joint:
+                    continue
+                if target not in self.joints:
+                    return target, target
+                controls = [driver for driver in self.drivers(target) if driver not in self.joints]
+                return (controls[0] if controls else target), target
+        return None, None
+
+def find_limbs(scene_index=None):
+    '''
+    Finds every IK/FK limb in the scene.
+    Returns a list of limb dicts keyed like get_limb (long names) with the handle in limb['handle'].
+    '''
+    scene_index = scene_index or SceneIndex()
+    limbs = []
+    for handle in scene_index.handles:
+        ik_joints = scene_index.get_chain(handle)
+        if not ik_joints:
+            continue
+        ik_ctrl = scene_index.get_ik_control(handle, ik_joints[2])
+        ik_pole = scene_index.get_pole(handle)
+        fk = [scene_index.get_fk(ik_joint) for ik_joint in ik_joints]
+        if not ik_ctrl or not ik_pole or not all(fk_ctrl for fk_ctrl, fk_joint in fk):
+            continue
+        limbs.append({
+            'handle': handle,
+            'fk_controls': [fk_ctrl for fk_ctrl, fk_joint in fk],
+            'fk_joints': [fk_joint for fk_ctrl, fk_joint in fk],
+            'ik_joints': ik_joints,
+            'ik_ctrl': ik_ctrl,
+            'ik_pole': ik_pole
+        })
+    return limbs
+
+def limb_preset(limb, names, uuids):
+    '''
+    Returns a preset for limb in the format of get_current_pinned_objects, with every slot pinned.
+    names and uuids map the limb's long names to short names and UUIDs.
+    '''
+    slots = {
+        'FK1': (limb['fk_controls'][0], limb['fk_joints'][0]),
+        'FK2': (limb['fk_controls'][1], limb['fk_joints'][1]),
+        'FK3': (limb['fk_controls'][2], limb['fk_joints'][2]),
+        'IK1': (limb['ik_joints'][0], limb['ik_joints'][0]),
+        'IK2': (limb['ik_pole'], limb['ik_joints'][1]),
+        'IK3': (limb['ik_ctrl'], limb['ik_joints'][2])
+    }
+    preset = {}
+    for slot, (node, joint) in slots.items():
+        preset[slot] = {
+            'object_name': names[node],
+            'object_uuid': uuids.get(node),
+            'pinned': True,
+            'control_joint_obj': names[joint],
+            'control_joint_uuid': uuids.get(joint),
+            'mode': 'line_edit',
+            'selected_index': 0
+        }
+    return preset
+
+@profiling.profiled()
+def scan_scene():
+    '''
+    Builds a preset for every limb in the scene, named after its ikHandle.
+    The presets have no control offsets: those are only right when measured at bind pose, which the scene
+    may not be in, so Calibrate Preset measures them later. Returns {preset name: preset}.
+    '''
+    limbs = find_limbs()
+    nodes = [node for limb in limbs for key in ('fk_controls', 'fk_joints', 'ik_joints') for node in limb[key]]
+    nodes += [limb[key] for limb in limbs for key in ('ik_ctrl', 'ik_pole', 'handle')]
+    node_objects = node_handles.resolve(nodes)
+    names = {node: node_name(node_object) for node, node_object in node_objects.items()}
+    uuids = {node: om.MFnDependencyNode(node_object).uuid().asString() for node, node_object in node_objects.items()}
+    presets = {}
+    for limb in limbs:
+        presets[names[limb['handle']]] = limb_preset(limb, names, uuids)
+    return presets
+
+class PresetStore(object):
+    '''
+    Limb presets stored on defaultObjectSet with one record per preset.
+
+    Layout version 2:
+        ikFkSnapPresetVersion   layout version
+        ikFkSnapPresetIndex     JSON {preset name: record index}
+        ikFkSnapPresetData[i]   JSON of one preset
+
+    Only the name index is read when the store is created; a record is parsed the first time its preset is used.
+    save() writes just the records that were changed or deleted since the last save.
+    Scenes that still have the old single 'presets' attribute are read from it without touching the scene;
+    the next save() writes them in this layout and leaves the old attribute for older versions of the tool.
+    '''
+    version = 2
+    version_attr = 'ikFkSnapPresetVersion'
+    index_attr = 'ikFkSnapPresetIndex'
+    data_attr = 'ikFkSnapPresetData'
+
+    def __init__(self, node='defaultObjectSet'):
+        self.node = node
+        self.index = {}
+        self.records = {}
+        self.changed = set()
+        self.removed = set()
+        self.index_changed = False
+        self.load()
+
+    def has_attr(self, attribute):
+        return cmds.objExists(self.node) and cmds.attributeQuery(attribute, node=self.node, exists=True)
+
+    def load(self):
+        if self.has_attr(self.index_attr):
+            self.index = json.loads(cmds.getAttr(f'{self.node}.{self.index_attr}') or '{}')
+        elif self.has_attr('presets'):
+            # Version 1 kept every preset in one JSON string, its presets count as changes until saved
+            presets = json.loads(cmds.getAttr(f'{self.node}.presets') or '{}')
+            for preset_name, preset in presets.items():
+                self[preset_name] = preset
+
+    def keys(self):
+        return list(self.index.keys())
+
+    def __contains__(self, preset_name):
+        return preset_name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, preset_name):
+        if preset_name not in self.records:
+            record = cmds.getAttr(f'{self.node}.{self.data_attr}[{self.index[preset_name]}]')
+            self.records[preset_name] = json.loads(record)
+        return self.records[preset_name]
+
+    def get(self, preset_name, default=None):
+        return self[preset_name] if preset_name in self.index else default
+
+    def __setitem__(self, preset_name, preset):
+        if preset_name not in self.index:
+            self.index[preset_name] = max(list(self.index.values()) + list(self.removed) + [-1]) + 1
+            self.index_changed = True
+        self.records[preset_name] = preset
+        self.changed.add(preset_name)
+
+    def __delitem__(self, preset_name):
+        self.removed.add(self.index.pop(preset_name))
+        self.records.pop(preset_name, None)
+        self.changed.discard(preset_name)
+        self.index_changed = True
+
+    def create_attrs(self):
+        if not cmds.objExists(self.node):
+            cmds.createNode('objectSet', name=self.node)
+        if not self.has_attr(self.version_attr):
+            cmds.addAttr(self.node, longName=self.version_attr, attributeType='long')
+            cmds.setAttr(f'{self.node}.{self.version_attr}', self.version)
+        if not self.has_attr(self.index_attr):
+            cmds.addAttr(self.node, longName=self.index_attr, dataType='string')
+        if not self.has_attr(self.data_attr):
+            cmds.addAttr(self.node, longName=self.data_attr, dataType='string', multi=True)
+
+    def save(self):
+        if not (self.changed or self.removed or self.index_changed):
+            return
+        self.create_attrs()
+        for record_index in self.removed:
+            if record_index not in self.index.values():
+                cmds.removeMultiInstance(f'{self.node}.{self.data_attr}[{record_index}]', b=True)
+        for preset_name in self.changed:
+            record = json.dumps(self.records[preset_name])
+            cmds.setAttr(f'{self.node}.{self.data_attr}[{self.index[preset_name]}]', record, type='string')
+        if self.index_changed:
+            cmds.setAttr(f'{self.node}.{self.index_attr}', json.dumps(self.index), type='string')
+        self.changed.clear()
+        self.removed.clear()
+        self.index_changed = False
@@ -0,0 +1,74 @@
+'''
+Reduces dense baked keys to the fewest keys that stay within a tolerance. Works on NumPy arrays only.
+
+Keys are cubic Hermite segments with fixed tangents whose slopes come from the baked samples,
+which is how Maya evaluates non-weighted curves with fixed tangents, so the reported error is the
+error the animator will see on the curve.
+'''
+import numpy as np
+
+def hermite(frames, key_frames, key_values, key_slopes):
+    '''
+    Evaluates the curve through (key_frames, key_values) with key_slopes (value per frame) at frames.
+    key_values and key_slopes are (K,C) arrays, the result is (N,C).
+    '''
+    frames = np.asarray(frames, dtype=float)
+    if len(key_frames) == 1:
+        return np.repeat(key_values[:1], len(frames), axis=0)
+    segment = np.clip(np.searchsorted(key_frames, frames, side='right') - 1, 0, len(key_frames) - 2)
+    start = key_frames[segment]
+    length = key_frames[segment + 1] - start
+    t = ((frames - start) / length)[:, None]
+    t2 = t * t
+    t3 = t2 * t
+    length = length[:, None]
+    return ((2 * t3 - 3 * t2 + 1) * key_values[segment]
+            + (t3 - 2 * t2 + t) * length * key_slopes[segment]
+            + (-2 * t3 + 3 * t2) * key_values[segment + 1]
+            + (t3 - t2) * length * key_slopes[segment + 1])
+
+def get_errors(values, fitted, vector=False):
+    '''
+    Returns the error per frame: the distance between the vectors when vector is True
+    (positions), the largest channel difference otherwise (euler angles).
+    '''
+    difference = fitted - values
+    if vector:
+        return np.linalg.norm(difference, axis=1)
+    return np.abs(difference).max(axis=1)
+
+def reduce_keys(frames, values, tolerance, keep_frames=(), vector=False):
+    '''
+    Picks the keys to keep from a dense bake of one attribute.
+
+    frames is (N,) and values (N,C) for the C channels of the attribute, which share their key times.
+    keep_frames are frames that always keep a key (the key times the curve had before the bake).
+    Every pass adds the worst frame of each segment that is out of tolerance, until none is.
+    Returns the kept indices, the (K,C) tangent slopes at them (value per frame) and the largest error.
+    '''
+    frames = np.asarray(frames, dtype=float)
+    values = np.asarray(values, dtype=float).reshape(len(frames), -1)
+    count = len(frames)
+    slopes = np.gradient(values, frames, axis=0) if count > 1 else np.zeros_like(values)
+    if count <= 2:
+        return np.arange(count), slopes, 0.0
+
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, -1]] = True
+    keep_frames = np.asarray(keep_frames, dtype=float)
+    if keep_frames.size:
+        nearest = np.clip(np.searchsorted(frames, keep_frames), 0, count - 1)
+        keep[nearest[np.abs(frames[nearest] - keep_frames) < 1e-6]] = True
+
+    frame_indices = np.arange(count)
+    while True:
+        indices = np.flatnonzero(keep)
+        errors = get_errors(values, hermite(frames, frames[indices], values[indices], slopes[indices]), vector)
+        over = errors > tolerance
+        if not over.any():
+            return indices, slopes[indices], float(errors.max())
+        # Worst frame of every segment: sort by segment, then by error from high to low
+        segment = np.searchsorted(indices, frame_indices, side='right') - 1
+        order = np.lexsort((-errors, segment))
+        worst = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        keep[worst[over[worst]]] = True
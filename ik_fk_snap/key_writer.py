@@ -0,0 +1,327 @@
+'''
+Writes baked keys straight into animation curves through MFnAnimCurve.
+Each curve is found or created once and gets all of its keys from one addKeys call.
+The write runs inside the ikFkSnapApply command (snap_plugin.py), so it is a single undo step
+that keeps the new and the replaced keys as packed arrays.
+With tolerances the dense bake is thinned out by key_reduction first and the kept keys get fixed tangents.
+'''
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+from ik_fk_snap import key_reduction, transform_writer
+
+CURVE_TYPES = {'rotate': 'animCurveTA', 'translate': 'animCurveTL'}
+TIME_TOLERANCE = 1e-6
+# Layers weighted less than this cannot be keyed to a result, their curves barely change it
+WEIGHT_TOLERANCE = 1e-6
+
+def get_active_layer():
+    '''
+    Returns the selected animation layer, or None when there are no layers or only the base layer is selected.
+    '''
+    root = cmds.animLayer(query=True, root=True)
+    if not root:
+        return None
+    for layer in cmds.ls(type='animLayer') or []:
+        if layer != root and cmds.animLayer(layer, query=True, selected=True):
+            return layer
+    return None
+
+def get_node_objects(plug_names):
+    selection = om.MSelectionList()
+    for plug_name in plug_names:
+        selection.add(plug_name)
+    return [selection.getDependNode(i) for i in range(selection.length())]
+
+def get_base_curves(plugs, modifier):
+    '''
+    Returns {plug name: anim curve MObject} for keys on the base layer and the plug names whose curve is new.
+    Missing curves are created and connected through modifier, so they exist once it is run.
+    '''
+    curves = {}
+    created = set()
+    layered = []
+    for plug_name, (plug, attribute) in plugs.items():
+        if plug.isDestination:
+            source = plug.source().node()
+            if source.hasFn(om.MFn.kAnimCurve):
+                curves[plug_name] = source
+            else:
+                # Driven through an animation layer blend node or something else
+                layered.append(plug_name)
+            continue
+        curve = modifier.createNode(CURVE_TYPES.get(attribute, 'animCurveTU'))
+        modifier.renameNode(curve, plug_name.replace('.', '_'))
+        modifier.connect(om.MFnDependencyNode(curve).findPlug('output', False), plug)
+        curves[plug_name] = curve
+        created.add(plug_name)
+
+    root = cmds.animLayer(query=True, root=True) if layered else None
+    for plug_name in layered:
+        curve_names = cmds.animLayer(root, query=True, findCurveForPlug=plug_name) if root else None
+        if not curve_names:
+            raise RuntimeError(f"Cannot key '{plug_name}', it is driven by another node.")
+        curves[plug_name] = get_node_objects(curve_names[:1])[0]
+    return curves, created
+
+def get_layer_curves(plugs, layer, frame):
+    '''
+    Returns {plug name: anim curve MObject} of the plugs on layer, adding the plugs to it where needed.
+    '''
+    curve_names = {plug_name: cmds.animLayer(layer, query=True, findCurveForPlug=plug_name) for plug_name in plugs}
+    missing = [plug_name for plug_name, names in curve_names.items() if not names]
+    if missing:
+        cmds.animLayer(layer, edit=True, attribute=missing)
+        cmds.setKeyframe(missing, animLayer=layer, time=frame)
+        for plug_name in missing:
+            curve_names[plug_name] = cmds.animLayer(layer, query=True, findCurveForPlug=plug_name)
+    return {plug_name: get_node_objects(names[:1])[0] for plug_name, names in curve_names.items()}
+
+def get_layer_weights(layer, frames, contexts):
+    '''
+    Returns the weight of layer on each frame, times the weights of the layers it is nested in.
+    Raises RuntimeError when the layer is muted or has no weight on a frame, since its keys would then do nothing.
+    '''
+    root = cmds.animLayer(query=True, root=True)
+    weights = np.ones(len(contexts))
+    node = layer
+    while node and node != root:
+        if cmds.animLayer(node, query=True, mute=True):
+            raise RuntimeError(f"Cannot key layer '{layer}', layer '{node}' is muted.")
+        weight_plug = om.MFnDependencyNode(get_node_objects([node])[0]).findPlug('weight', False)
+        weights *= [weight_plug.asDouble(context) for context in contexts]
+        node = cmds.animLayer(node, query=True, parent=True)
+    if np.abs(weights).min() < WEIGHT_TOLERANCE:
+        frame = frames[int(np.abs(weights).argmin())]
+        raise RuntimeError(f"Cannot key layer '{layer}', it has no weight on frame {frame:g}.")
+    return weights
+
+def get_layer_values(plugs, curves, channel_values, frames, layer):
+    '''
+    Returns the layer curve values that make each plug evaluate to channel_values.
+    An additive layer adds weight * its value to the layers below, an override layer blends from them
+    to its value by weight. Either way the plug changes by weight times the change of the layer curve,
+    so the layer curve moves by the plug's error divided by the layer's weight on that frame.
+    '''
+    layer_values = {}
+    times = [om.MTime(frame, om.MTime.uiUnit()) for frame in frames]
+    contexts = [om.MDGContext(time) for time in times]
+    weights = get_layer_weights(layer, frames, contexts)
+    for plug_name, (plug, attribute) in plugs.items():
+        fn_curve = oma.MFnAnimCurve(curves[plug_name])
+        current = np.array([plug.asDouble(context) for context in contexts])
+        layer_current = np.array([fn_curve.evaluate(time) for time in times])
+        layer_values[plug_name] = layer_current + (np.asarray(channel_values[plug_name], dtype=float) - current) / weights
+    return layer_values
+
+def get_range_indices(fn_curve, first, last):
+    '''
+    Returns the indices and the frames of the keys of a curve from first to last, and its number of keys.
+    '''
+    unit = om.MTime.uiUnit()
+    key_times = np.array([fn_curve.input(i).asUnits(unit) for i in range(fn_curve.numKeys)])
+    indices = np.flatnonzero((key_times >= first - TIME_TOLERANCE) & (key_times <= last + TIME_TOLERANCE))
+    return indices, key_times[indices], len(key_times)
+
+def get_key_times(curve, first, last):
+    '''
+    Returns the frames of the keys of curve from first to last.
+    '''
+    return get_range_indices(oma.MFnAnimCurve(curve), first, last)[1]
+
+def to_ui_units(value, attribute):
+    if attribute == 'rotate':
+        return om.MAngle.internalToUI(value)
+    if attribute == 'translate':
+        return om.MDistance.internalToUI(value)
+    return value
+
+class CurveKeys(object):
+    '''
+    The keys of an anim curve from first to last as packed arrays: times, values, in/out tangent types,
+    in/out tangent x/y and the tangent and weight locks. restore() puts them back after they were replaced.
+    '''
+    def __init__(self, fn_curve, first, last):
+        indices, self.times = get_range_indices(fn_curve, first, last)[:2]
+        self.values = np.array([fn_curve.value(i) for i in indices])
+        self.tangent_types = np.array([(fn_curve.inTangentType(i), fn_curve.outTangentType(i)) for i in indices],
+                                      dtype=np.int16).reshape(-1, 2)
+        self.tangents = np.array([fn_curve.getTangentXY(i, True) + fn_curve.getTangentXY(i, False) for i in indices]).reshape(-1, 4)
+        self.locks = np.array([(fn_curve.tangentsLocked(i), fn_curve.weightsLocked(i)) for i in indices], dtype=bool).reshape(-1, 2)
+
+    def restore(self, fn_curve):
+        if not len(self.times):
+            return
+        unit = om.MTime.uiUnit()
+        times = [om.MTime(key_time, unit) for key_time in self.times]
+        fixed = oma.MFnAnimCurve.kTangentFixed
+        fn_curve.addKeys(om.MTimeArray(times), om.MDoubleArray(self.values.tolist()), fixed, fixed, fn_curve.numKeys > 0)
+        for time, tangent_types, tangents, locks in zip(times, self.tangent_types, self.tangents, self.locks):
+            index = fn_curve.find(time)
+            fn_curve.setTangentsLocked(index, False)
+            fn_curve.setWeightsLocked(index, False)
+            # getTangentXY reports internal units, so they are set back unconverted
+            fn_curve.setTangent(index, float(tangents[0]), float(tangents[1]), True, None, False)
+            fn_curve.setTangent(index, float(tangents[2]), float(tangents[3]), False, None, False)
+            # Types go last so tangents Maya computes (auto, spline...) are computed again
+            fn_curve.setInTangentType(index, int(tangent_types[0]))
+            fn_curve.setOutTangentType(index, int(tangent_types[1]))
+            fn_curve.setTangentsLocked(index, bool(locks[0]))
+            fn_curve.setWeightsLocked(index, bool(locks[1]))
+
+class KeyWrite(object):
+    '''
+    Replaces the keys of anim curves between first and last and restores them on undo.
+    curves is a list of (anim curve MObject, attribute, frames, values, slopes) with values in internal units
+    (radians, cm). slopes (value per frame) gives each key a fixed tangent, None keeps the default tangents.
+    modifier holds the curves that had to be created and runs before the keys are added.
+    Redo writes from those arrays again and undo from the CurveKeys taken on the first run,
+    instead of an MAnimCurveChange that records every key edit.
+    '''
+    def __init__(self, curves, first, last, modifier=None):
+        self.curves = curves
+        self.first = first
+        self.last = last
+        self.modifier = modifier
+        self.previous = None
+
+    def clear_range(self, fn_curve, remove_all=False):
+        '''
+        Removes the keys from first to last. Returns False when that was every key; those are then left
+        for addKeys to replace all at once, unless remove_all.
+        '''
+        indices, key_times, key_count = get_range_indices(fn_curve, self.first, self.last)
+        if len(indices) == key_count and not remove_all:
+            return False
+        for i in reversed(indices.tolist()):
+            fn_curve.remove(i)
+        return len(indices) < key_count
+
+    def redo(self):
+        if self.modifier is not None:
+            self.modifier.doIt()
+        take_previous = self.previous is None
+        if take_previous:
+            self.previous = []
+
+        unit = om.MTime.uiUnit()
+        for curve, attribute, frames, values, slopes in self.curves:
+            fn_curve = oma.MFnAnimCurve(curve)
+            if take_previous:
+                self.previous.append(CurveKeys(fn_curve, self.first, self.last))
+            keep_existing = self.clear_range(fn_curve)
+            times = [om.MTime(frame, unit) for frame in frames]
+            tangent_type = oma.MFnAnimCurve.kTangentGlobal if slopes is None else oma.MFnAnimCurve.kTangentFixed
+            fn_curve.addKeys(om.MTimeArray(times), om.MDoubleArray([float(value) for value in values]),
+                             tangent_type, tangent_type, keep_existing)
+            if slopes is not None:
+                for time, slope in zip(times, slopes):
+                    index = fn_curve.find(time)
+                    slope = to_ui_units(float(slope), attribute)
+                    fn_curve.setTangent(index, 1.0, slope, True, None, True)
+                    fn_curve.setTangent(index, 1.0, slope, False, None, True)
+
+    def undo(self):
+        for (curve, attribute, frames, values, slopes), keys in zip(self.curves, self.previous):
+            fn_curve = oma.MFnAnimCurve(curve)
+            self.clear_range(fn_curve, remove_all=True)
+            keys.restore(fn_curve)
+        if self.modifier is not None:
+            self.modifier.undoIt()
+
+class KeyBake(object):
+    '''
+    The keys of a bake, found their curves (prepare), reduced one attribute at a time (reduce) and then written
+    in one undoable command (write). set_keys runs every step at once, a BakeJob spreads the reduction over
+    idle steps. values are (node, attribute, (N,3) values) in internal units: radians for rotate,
+    centimeters for translate. node_objects is {name: MObject}. With layer the keys go on that animation layer.
+    tolerances ({'translate': cm, 'rotate': degrees}) reduces the keys of those attributes; the key times
+    the curves already had in the range are always kept.
+    '''
+    def __init__(self, values, frames, node_objects, layer=None, tolerances=None):
+        self.frames = np.asarray(frames, dtype=float)
+        self.layer = layer
+        self.tolerances = tolerances or {}
+        self.plugs = {}
+        self.channel_values = {}
+        self.attributes = []
+        for node, attribute, node_values in values:
+            fn_node = om.MFnDependencyNode(node_objects[node])
+            plug_names = []
+            for column, axis in enumerate('XYZ'):
+                plug_name = f'{node}.{attribute}{axis}'
+                self.plugs[plug_name] = (fn_node.findPlug(attribute + axis, False), attribute)
+                self.channel_values[plug_name] = node_values[:, column]
+                plug_names.append(plug_name)
+            self.attributes.append((attribute, plug_names))
+        self.modifier = om.MDGModifier()
+        self.curves = None
+        self.created = set()
+        self.curve_keys = []
+        self.reduced = 0
+        self.report = {'keys': 0, 'removed': 0, 'errors': {}}
+
+    def edits_layer(self):
+        '''
+        Returns True when prepare has to add plugs to the layer, a scene edit that belongs in the undoable write.
+        '''
+        return bool(self.layer) and not all(cmds.animLayer(self.layer, query=True, findCurveForPlug=plug_name)
+                                            for plug_name in self.plugs)
+
+    def prepare(self):
+        '''
+        Finds the curves to key, adding plugs that are not on the layer yet to it, and the values they get there.
+        '''
+        if self.layer:
+            self.curves = get_layer_curves(self.plugs, self.layer, self.frames[0])
+            self.channel_values = get_layer_values(self.plugs, self.curves, self.channel_values, self.frames, self.layer)
+        else:
+            self.curves, self.created = get_base_curves(self.plugs, self.modifier)
+
+    def reduce(self, count):
+        '''
+        Reduces the keys of the next count attributes. Returns True while attributes are left.
+        '''
+        frames = self.frames
+        for attribute, plug_names in self.attributes[self.reduced:self.reduced + count]:
+            attribute_values = np.stack([self.channel_values[plug_name] for plug_name in plug_names], axis=1)
+            tolerance = self.tolerances.get(attribute)
+            if tolerance is None:
+                indices, slopes = np.arange(len(frames)), None
+            else:
+                if attribute == 'rotate':
+                    tolerance = np.radians(tolerance)
+                key_times = [get_key_times(self.curves[plug_name], frames[0], frames[-1])
+                             for plug_name in plug_names if plug_name not in self.created]
+                indices, slopes, error = key_reduction.reduce_keys(frames, attribute_values, tolerance,
+                                                                   np.concatenate(key_times) if key_times else (),
+                                                                   vector=attribute == 'translate')
+                error = np.degrees(error) if attribute == 'rotate' else error
+                self.report['errors'][attribute] = max(self.report['errors'].get(attribute, 0.0), error)
+            for column, plug_name in enumerate(plug_names):
+                self.curve_keys.append((self.curves[plug_name], attribute, frames[indices], attribute_values[indices, column],
+                                        None if slopes is None else slopes[:, column]))
+            self.report['keys'] += len(indices) * len(plug_names)
+            self.report['removed'] += (len(frames) - len(indices)) * len(plug_names)
+            self.reduced += 1
+        return self.reduced < len(self.attributes)
+
+    def write(self):
+        '''
+        Runs what is left of prepare and reduce, then keys every curve in one undoable command.
+        Returns {'keys': keys written, 'removed': keys saved by the reduction, 'errors': {attribute: largest error}}
+        with errors in centimeters and degrees.
+        '''
+        if self.curves is None:
+            self.prepare()
+        self.reduce(len(self.attributes))
+        transform_writer.apply(KeyWrite(self.curve_keys, self.frames[0], self.frames[-1], self.modifier))
+        return self.report
+
+def set_keys(values, frames, node_objects, layer=None, tolerances=None):
+    '''
+    Keys (node, attribute, (N,3) values) on every frame in one undoable command, see KeyBake.
+    Returns the report of KeyBake.write.
+    '''
+    return KeyBake(values, frames, node_objects, layer, tolerances).write()
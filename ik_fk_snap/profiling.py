@@ -0,0 +1,241 @@
+'''
+Runtime instrumentation for the snap tool.
+
+    from ik_fk_snap import profiling
+    profiling.enable()
+    ... use the tool ...
+    print(profiling.summary())
+    profiling.export_chrome_trace('C:/temp/ik_fk_snap_trace.json')
+    profiling.disable()
+
+While enabled, every maya.cmds call made by the tool's modules and every function marked with @profiled
+is recorded with its duration and payload size (number of nodes, keys or presets it handled).
+Records are grouped by the user action (button press, selection update) they happened in.
+Setting the IK_FK_SNAP_PROFILE environment variable enables recording from startup.
+When disabled, the decorators only check a flag.
+'''
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Modules whose cmds calls are recorded while profiling is enabled
+INSTRUMENTED_MODULES = ['ik_fk_snap.core', 'ik_fk_snap.key_writer', 'ik_fk_snap.transform_writer', 'ik_fk_snap.ui']
+
+enabled = False
+_needs_patch = False
+events = []
+_stack = []
+_actions = []
+_patched = {}
+
+def now():
+    return time.perf_counter()
+
+def payload_size(value):
+    if isinstance(value, (list, tuple, dict, set)):
+        return len(value)
+    return 1 if value is not None else 0
+
+class CmdsProxy(object):
+    '''
+    Stands in for maya.cmds and records every command called through it.
+    '''
+    def __init__(self, cmds):
+        self._cmds = cmds
+
+    def __getattr__(self, name):
+        command = getattr(self._cmds, name)
+        if not callable(command):
+            return command
+
+        @wraps(command)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return command(*args, **kwargs)
+            start = now()
+            try:
+                result = command(*args, **kwargs)
+            finally:
+                record(f'cmds.{name}', 'cmds', start, now() - start)
+            events[-1]['payload'] = payload_size(result) if result is not None else payload_size(args[0] if args else None)
+            return result
+        return wrapper
+
+def record(name, category, start, duration, payload=0):
+    events.append({
+        'name': name,
+        'category': category,
+        'start': start,
+        'duration': duration,
+        'payload': payload,
+        'depth': len(_stack),
+        'action': _actions[-1] if _actions else None
+    })
+
+def profiled(name=None, payload=None):
+    '''
+    Records the duration of each call to the decorated function.
+    payload(args, result) returns the size of the work done, by default the size of the result.
+    args holds the arguments in the order of the signature, also when the caller passed them by keyword.
+    '''
+    def decorator(func):
+        event_name = name or func.__name__
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            if _needs_patch:
+                patch_modules()
+            start = now()
+            _stack.append(event_name)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _stack.pop()
+                record(event_name, 'function', start, now() - start)
+            events[-1]['payload'] = get_payload(signature, payload, args, kwargs, result)
+            return result
+        return wrapper
+    return decorator
+
+def get_payload(signature, payload, args, kwargs, result):
+    '''
+    Returns the payload of a profiled call, the size of the result when payload is None or fails.
+    The call has already been made, so a payload that does not fit its arguments must not raise.
+    '''
+    if payload is None:
+        return payload_size(result)
+    try:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return payload(bound.args, result)
+    except Exception:
+        return payload_size(result)
+
+@contextmanager
+def action(name):
+    '''
+    Groups everything recorded inside the block under one user action.
+    '''
+    if not enabled:
+        yield
+        return
+    if _needs_patch:
+        patch_modules()
+    start = now()
+    _actions.append(name)
+    _stack.append(name)
+    try:
+        yield
+    finally:
+        _stack.pop()
+        record(name, 'action', start, now() - start)
+        _actions.pop()
+
+def user_action(name):
+    '''
+    Decorator form of action() for UI handlers.
+    '''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with action(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def patch_modules():
+    global _needs_patch
+    _needs_patch = False
+    for module_name in INSTRUMENTED_MODULES:
+        module = sys.modules.get(module_name)
+        cmds = getattr(module, 'cmds', None)
+        if cmds is None or isinstance(cmds, CmdsProxy):
+            continue
+        _patched[module_name] = cmds
+        module.cmds = CmdsProxy(cmds)
+
+def restore_modules():
+    for module_name, cmds in _patched.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            module.cmds = cmds
+    _patched.clear()
+
+def enable():
+    '''
+    Starts recording. Modules imported later are picked up by calling enable() again.
+    '''
+    global enabled
+    enabled = True
+    patch_modules()
+
+def disable():
+    global enabled
+    enabled = False
+    restore_modules()
+
+def reset():
+    del events[:]
+
+def get_stats():
+    '''
+    Returns {(action, name): {'calls', 'total', 'max', 'payload'}} over the recorded events, times in seconds.
+    '''
+    stats = {}
+    for event in events:
+        key = (event['action'] if event['category'] != 'action' else event['name'], event['name'])
+        entry = stats.setdefault(key, {'calls': 0, 'total': 0.0, 'max': 0.0, 'payload': 0})
+        entry['calls'] += 1
+        entry['total'] += event['duration']
+        entry['max'] = max(entry['max'], event['duration'])
+        entry['payload'] += event['payload']
+    return stats
+
+def summary():
+    '''
+    Returns the recorded events as a text table: one block per action, slowest entries first.
+    '''
+    stats = get_stats()
+    lines = [f"{'action / call':<44}{'calls':>8}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'payload':>9}"]
+    actions = sorted({key[0] for key in stats}, key=lambda action_name: str(action_name))
+    for action_name in actions:
+        lines.append(str(action_name) if action_name else '(outside any action)')
+        entries = sorted(((name, entry) for (entry_action, name), entry in stats.items() if entry_action == action_name),
+                         key=lambda item: -item[1]['total'])
+        for name, entry in entries:
+            lines.append(f"  {name:<42}{entry['calls']:>8}{entry['total'] * 1000.0:>11.2f}"
+                         f"{entry['total'] * 1000.0 / entry['calls']:>10.3f}{entry['max'] * 1000.0:>10.3f}{entry['payload']:>9}")
+    return '\n'.join(lines)
+
+def export_chrome_trace(path):
+    '''
+    Writes the recorded events as a Chrome trace (chrome://tracing, Perfetto). Returns path.
+    '''
+    origin = min([event['start'] for event in events] or [0.0])
+    trace_events = []
+    for event in events:
+        trace_events.append({
+            'name': event['name'],
+            'cat': event['category'],
+            'ph': 'X',
+            'ts': (event['start'] - origin) * 1e6,
+            'dur': event['duration'] * 1e6,
+            'pid': os.getpid(),
+            'tid': 1,
+            'args': {'payload': event['payload'], 'action': event['action']}
+        })
+    with open(path, 'w') as trace_file:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, trace_file)
+    return path
+
+if os.environ.get('IK_FK_SNAP_PROFILE'):
+    # The tool's modules are still importing, their cmds are swapped at the first recorded call
+    enabled = True
+    _needs_patch = True
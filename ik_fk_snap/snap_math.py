@@ -0,0 +1,229 @@
+'''
+Vectorized snapping math. Works on NumPy arrays only, so it has no Maya import.
+
+Matrices follow the Maya convention: row vectors, world = local * parent.
+Positions are (N,3) arrays, matrices are (N,4,4) arrays and angles are radians.
+'''
+import numpy as np
+
+# Axis order and parity of each rotateOrder value (xyz, yzx, zxy, xzy, yxz, zyx)
+ROTATE_ORDER_AXES = [(0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0)]
+ROTATE_ORDER_PARITY = [0, 0, 0, 1, 1, 1]
+EPSILON = 1e-8
+
+def normalize(vectors):
+    '''
+    Returns the vectors scaled to unit length. Zero length vectors are returned unchanged.
+    '''
+    vectors = np.asarray(vectors, dtype=float)
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(lengths < EPSILON, 1.0, lengths)
+
+def pole_positions(start, mid, end, pole_distance=1.0):
+    '''
+    Returns the pole vector position for every frame of a three joint chain.
+    The pole sits in the plane of the chain, pushed away from the mid joint by the chain length times pole_distance.
+    '''
+    start = np.asarray(start, dtype=float)
+    mid = np.asarray(mid, dtype=float)
+    end = np.asarray(end, dtype=float)
+
+    start_to_end_normalized = normalize(end - start)
+    projection_length = np.sum((mid - start) * start_to_end_normalized, axis=-1, keepdims=True)
+    projection = start_to_end_normalized * projection_length
+    pole_vec = normalize(mid - (start + projection))
+
+    chain_length = np.linalg.norm(mid - start, axis=-1, keepdims=True) + np.linalg.norm(end - mid, axis=-1, keepdims=True)
+    return mid + pole_vec * chain_length * pole_distance
+
+def two_bone_ik(root, goal, pole_vector, upper_length, lower_length, bend=1.0):
+    '''
+    Solves a two bone chain from root toward goal in the plane of pole_vector, the way a rotate plane IK handle does.
+    root, goal and pole_vector are (N,3) arrays, the pole vector is a world direction from the root.
+    bend is 1.0 when the mid joint bends toward the pole and -1.0 when it bends away from it.
+    A goal out of reach leaves the chain straight, pointing at it.
+    Returns the mid and end positions and the normal of the chain plane, (N,3) arrays each.
+    '''
+    root = np.asarray(root, dtype=float)
+    axis = np.asarray(goal, dtype=float) - root
+    distance = np.clip(np.linalg.norm(axis, axis=-1, keepdims=True),
+                       abs(upper_length - lower_length) + EPSILON, upper_length + lower_length)
+    aim = normalize(axis)
+    pole_vector = np.asarray(pole_vector, dtype=float)
+    up = normalize(pole_vector - aim * np.sum(pole_vector * aim, axis=-1, keepdims=True))
+
+    # Law of cosines for the angle between the upper bone and the root to goal axis
+    cos = np.clip((upper_length ** 2 + distance ** 2 - lower_length ** 2) / (2.0 * upper_length * distance), -1.0, 1.0)
+    sin = np.sqrt(1.0 - cos ** 2)
+    mid = root + upper_length * (cos * aim + bend * sin * up)
+    end = root + distance * aim
+    return mid, end, np.cross(aim, up)
+
+def bone_frames(start, end, normal):
+    '''
+    Returns the (N,3,3) orthonormal frames of bones from start to end: the rows are the bone direction,
+    the in-plane axis and the plane normal, which must be perpendicular to the bone.
+    '''
+    aim = normalize(np.asarray(end, dtype=float) - np.asarray(start, dtype=float))
+    normal = normalize(normal)
+    return np.stack([aim, np.cross(normal, aim), normal], axis=-2)
+
+def rotation_differences(rotations, target_rotations):
+    '''
+    Returns the angle in radians between the orientations of two arrays of matrices, scale is ignored.
+    '''
+    relative = rotation_matrices(rotations) @ np.swapaxes(rotation_matrices(target_rotations), -1, -2)
+    return np.arccos(np.clip((np.trace(relative, axis1=-2, axis2=-1) - 1.0) / 2.0, -1.0, 1.0))
+
+def translations(matrices):
+    '''
+    Returns the translation row of each 4x4 matrix.
+    '''
+    return np.asarray(matrices, dtype=float)[..., 3, :3]
+
+def transform_points(points, matrices):
+    '''
+    Returns the points multiplied by the matrices (one matrix per point).
+    '''
+    points = np.asarray(points, dtype=float)
+    matrices = np.asarray(matrices, dtype=float)
+    return np.einsum('...i,...ij->...j', points, matrices[..., :3, :3]) + matrices[..., 3, :3]
+
+def rotation_matrices(matrices):
+    '''
+    Returns the 3x3 rotation of each matrix with scale removed.
+    '''
+    return normalize(np.asarray(matrices, dtype=float)[..., :3, :3])
+
+def axis_rotations(angles, axis):
+    '''
+    Returns the row vector rotation matrices about one axis for an array of angles.
+    '''
+    angles = np.asarray(angles, dtype=float)
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    matrices = np.zeros(angles.shape + (3, 3))
+    j, k = (axis + 1) % 3, (axis + 2) % 3
+    matrices[..., axis, axis] = 1.0
+    matrices[..., j, j] = cos
+    matrices[..., j, k] = sin
+    matrices[..., k, j] = -sin
+    matrices[..., k, k] = cos
+    return matrices
+
+def euler_to_matrix(angles, rotate_order=0):
+    '''
+    Returns the (N,3,3) rotation matrices of (N,3) euler angles in the given rotateOrder.
+    '''
+    angles = np.asarray(angles, dtype=float)
+    first, second, third = ROTATE_ORDER_AXES[rotate_order]
+    return (axis_rotations(angles[..., first], first)
+            @ axis_rotations(angles[..., second], second)
+            @ axis_rotations(angles[..., third], third))
+
+def matrix_to_euler(rotations, rotate_order=0):
+    '''
+    Returns the (N,3) euler angles of (N,3,3) rotation matrices in the given rotateOrder.
+    '''
+    # Work on the column vector form, which is the transpose of the Maya matrix
+    m = np.swapaxes(np.asarray(rotations, dtype=float), -1, -2)
+    i, j, k = ROTATE_ORDER_AXES[rotate_order]
+    parity = ROTATE_ORDER_PARITY[rotate_order]
+
+    cy = np.sqrt(m[..., i, i] ** 2 + m[..., j, i] ** 2)
+    gimbal = cy < EPSILON
+    ai = np.where(gimbal, np.arctan2(-m[..., j, k], m[..., j, j]), np.arctan2(m[..., k, j], m[..., k, k]))
+    aj = np.arctan2(-m[..., k, i], cy)
+    ak = np.where(gimbal, 0.0, np.arctan2(m[..., j, i], m[..., i, i]))
+    if parity:
+        ai, aj, ak = -ai, -aj, -ak
+
+    angles = np.empty(m.shape[:-2] + (3,))
+    angles[..., i] = ai
+    angles[..., j] = aj
+    angles[..., k] = ak
+    return angles
+
+def unwrap_euler(angles, reference=None):
+    '''
+    Removes 360 degree jumps between consecutive frames of (N,3) euler angles.
+    When reference is given, the first frame is moved to the turn closest to it.
+    '''
+    angles = np.unwrap(np.asarray(angles, dtype=float), axis=0)
+    if reference is not None and len(angles):
+        turns = np.round((np.asarray(reference, dtype=float) - angles[0]) / (2 * np.pi))
+        angles = angles + turns * 2 * np.pi
+    return angles
+
+def local_rotations(target_world, parent_world, rotate_axis=(0, 0, 0), joint_orient=(0, 0, 0), rotate_order=0, reference=None):
+    '''
+    Returns the (N,3) rotate values that give a node the world orientation of target_world under parent_world.
+    rotate_axis and joint_orient are the node's XYZ euler offsets, reference its current rotate values.
+    '''
+    rotate_axis = euler_to_matrix(rotate_axis)
+    joint_orient = euler_to_matrix(joint_orient)
+    local = (np.swapaxes(rotate_axis, -1, -2)
+             @ rotation_matrices(target_world)
+             @ np.swapaxes(rotation_matrices(parent_world), -1, -2)
+             @ np.swapaxes(joint_orient, -1, -2))
+    return unwrap_euler(matrix_to_euler(local, rotate_order), reference)
+
+def local_translations(target_positions, parent_world):
+    '''
+    Returns the (N,3) translate values that put a node at target_positions under parent_world.
+    '''
+    return transform_points(target_positions, np.linalg.inv(parent_world))
+
+def pivot_translations(target_world, parent_world, pivots, align_pivot=True):
+    '''
+    Returns the (N,3) translate values of a transform given the orientation of target_world under parent_world,
+    with its pivots (rotate_pivot, rotate_pivot_translate, scale_pivot, scale_pivot_translate, scale) accounted for.
+    With align_pivot its rotate pivot lands on the position of target_world, the way matchTransform places it;
+    otherwise the origin of its world matrix does.
+    '''
+    rotate_pivot, rotate_pivot_translate, scale_pivot, scale_pivot_translate, scale = (
+        np.asarray(value, dtype=float) for value in pivots)
+    rotation = rotation_matrices(target_world) @ np.swapaxes(rotation_matrices(parent_world), -1, -2)
+    point = rotate_pivot if align_pivot else np.zeros(3)
+    # The point before the rotation about the rotate pivot: Maya scales it about the scale pivot first
+    offset = (point - scale_pivot) * scale + scale_pivot + scale_pivot_translate - rotate_pivot
+    positions = local_translations(translations(target_world), parent_world)
+    return positions - rotate_pivot - rotate_pivot_translate - np.einsum('i,...ij->...j', offset, rotation)
+
+def match_world_rotation(world, target_world, old_parent, new_parent):
+    '''
+    Returns world after it takes the orientation of target_world and follows its parent from old_parent to new_parent.
+    Scale is kept.
+    '''
+    world = np.asarray(world, dtype=float)
+    scale = np.linalg.norm(world[..., :3, :3], axis=-1, keepdims=True)
+    matched = np.array(world)
+    matched[..., :3, :3] = rotation_matrices(target_world) * scale
+    position = transform_points(translations(world), np.linalg.inv(old_parent))
+    matched[..., 3, :3] = transform_points(position, new_parent)
+    return matched
+
+def fk_rotations(control_worlds, control_parents, target_worlds, chain_parents, offsets, references=None):
+    '''
+    Returns the rotate values that line up a chain of FK controls with target_worlds on every frame.
+
+    control_worlds, control_parents and target_worlds are (C,N,4,4) arrays for C controls over N frames.
+    chain_parents holds, for each control, the index of an earlier control it is parented under (or None),
+    so the rotation of a matched control is carried down to its children.
+    offsets holds (rotate_axis, joint_orient, rotate_order) per control, references the current rotate values.
+    Returns a (C,N,3) array.
+    '''
+    references = references if references is not None else [None] * len(control_worlds)
+    new_worlds = []
+    rotations = []
+    for i in range(len(control_worlds)):
+        parent = control_parents[i]
+        new_parent = parent
+        chain_parent = chain_parents[i]
+        if chain_parent is not None:
+            new_parent = parent @ np.linalg.inv(control_worlds[chain_parent]) @ new_worlds[chain_parent]
+
+        rotate_axis, joint_orient, rotate_order = offsets[i]
+        rotations.append(local_rotations(target_worlds[i], new_parent, rotate_axis, joint_orient, rotate_order, references[i]))
+        new_worlds.append(match_world_rotation(control_worlds[i], target_worlds[i], parent, new_parent))
+    return np.array(rotations)
@@ -0,0 +1,43 @@
+'''
+Scripted command plugin that puts the tool's API edits on Maya's undo queue.
+Loaded on demand by ik_fk_snap.transform_writer.
+
+A snap or bake is one ikFkSnapApply entry. The operation it holds keeps its before and after values
+as packed NumPy arrays (TransformWrite, KeyWrite), so even long bakes use little undo memory.
+'''
+import maya.api.OpenMaya as om
+
+def maya_useNewAPI():
+    pass
+
+class IkFkSnapApplyCommand(om.MPxCommand):
+    command_name = 'ikFkSnapApply'
+
+    def __init__(self):
+        super(IkFkSnapApplyCommand, self).__init__()
+        self.operation = None
+
+    @staticmethod
+    def creator():
+        return IkFkSnapApplyCommand()
+
+    def doIt(self, args):
+        # The operation is handed over by transform_writer.apply right before the command runs
+        from ik_fk_snap import transform_writer
+        self.operation = transform_writer.take_pending()
+        self.operation.redo()
+
+    def redoIt(self):
+        self.operation.redo()
+
+    def undoIt(self):
+        self.operation.undo()
+
+    def isUndoable(self):
+        return True
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin, 'munor.3d', '1.0').registerCommand(IkFkSnapApplyCommand.command_name, IkFkSnapApplyCommand.creator)
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(IkFkSnapApplyCommand.command_name)
@@ -0,0 +1,93 @@
+'''
+Writes control transforms through MFnTransform instead of matchTransform/xform.
+Every write is wrapped in the ikFkSnapApply command (snap_plugin.py) so it can be undone.
+'''
+import os
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+PLUGIN_PATH = os.path.join(os.path.dirname(__file__), 'snap_plugin.py')
+_pending = []
+
+def load_plugin():
+    if not cmds.pluginInfo(PLUGIN_PATH, query=True, loaded=True):
+        cmds.loadPlugin(PLUGIN_PATH, quiet=True)
+
+def take_pending():
+    return _pending.pop(0)
+
+def get_dag_paths(nodes):
+    '''
+    Resolves node names into MDagPaths with a single MSelectionList.
+    Returns {name: MDagPath}.
+    '''
+    nodes = list(dict.fromkeys(nodes))
+    selection = om.MSelectionList()
+    for node in nodes:
+        selection.add(node)
+    return dict(zip(nodes, (selection.getDagPath(i) for i in range(selection.length()))))
+
+class TransformWrite(object):
+    '''
+    Sets rotate (radians) and translate values on transforms and restores the previous values on undo.
+    values is a list of (MDagPath, attribute, [x, y, z]) with attribute 'rotate' or 'translate'.
+    The new and the previous values are kept as (M,3) arrays, not as API objects.
+    '''
+    def __init__(self, values):
+        self.paths = [path for path, attribute, value in values]
+        self.rotate = np.array([attribute == 'rotate' for path, attribute, value in values], dtype=bool)
+        self.values = np.array([value for path, attribute, value in values], dtype=float).reshape(-1, 3)
+        self.previous = None
+
+    def read(self):
+        values = np.empty_like(self.values)
+        for i, (path, rotate) in enumerate(zip(self.paths, self.rotate)):
+            fn_transform = om.MFnTransform(path)
+            if rotate:
+                value = fn_transform.rotation(om.MSpace.kTransform, asQuaternion=False)
+            else:
+                value = fn_transform.translation(om.MSpace.kTransform)
+            values[i] = (value.x, value.y, value.z)
+        return values
+
+    def write(self, values):
+        for path, rotate, value in zip(self.paths, self.rotate, values):
+            fn_transform = om.MFnTransform(path)
+            if rotate:
+                order = fn_transform.rotationOrder() - 1  # MTransformationMatrix orders start at 1
+                fn_transform.setRotation(om.MEulerRotation(value[0], value[1], value[2], order), om.MSpace.kTransform)
+            else:
+                fn_transform.setTranslation(om.MVector(value[0], value[1], value[2]), om.MSpace.kTransform)
+
+    def redo(self):
+        if self.previous is None:
+            self.previous = self.read()
+        self.write(self.values)
+
+    def undo(self):
+        self.write(self.previous)
+
+def apply(operation):
+    '''
+    Runs operation (an object with redo/undo) as one undoable ikFkSnapApply command.
+    '''
+    load_plugin()
+    _pending.append(operation)
+    try:
+        cmds.ikFkSnapApply()
+    finally:
+        # Nothing is left behind if the command failed before taking the operation
+        if operation in _pending:
+            _pending.remove(operation)
+
+def set_transforms(values, node_objects=None):
+    '''
+    Sets (node, attribute, [x, y, z]) values in one undoable command. Rotations are in radians.
+    node_objects ({name: MObject}) skips the name lookup for nodes that were already resolved.
+    '''
+    if node_objects is None:
+        paths = get_dag_paths(node for node, attribute, value in values)
+    else:
+        paths = {node: om.MDagPath.getAPathTo(node_objects[node]) for node, attribute, value in values}
+    apply(TransformWrite([(paths[node], attribute, value) for node, attribute, value in values]))
@@ -0,0 +1,1028 @@
+'''
+The IK FK snap window. Imported by ik_fk_snap.show() the first time the window is opened,
+so scripts that only use ik_fk_snap.core never load Qt.
+'''
+from PySide2 import QtWidgets, QtGui, QtCore
+import maya.cmds as cmds
+import maya.utils
+import maya.OpenMayaUI as omui
+from shiboken2 import wrapInstance, isValid
+from functools import lru_cache
+from ik_fk_snap import profiling
+from ik_fk_snap.core import (get_joints, get_joint_uuids, joint_cache, joint_index, get_pole_offset, match_fk_to_ik, match_ik_to_fk,
+                             node_handles, get_limb, get_preset_names, calibrate_limb, snap_limbs, BakeJob, scan_scene, PresetStore,
+                             PRESET_SLOTS)
+
+def get_maya_main_window():
+    main_window_ptr = omui.MQtUtil.mainWindow()
+    if main_window_ptr is not None:
+        return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
+    else:
+        return None
+
+@lru_cache(maxsize=None)
+def hex_value(hex_color, factor):
+    color = QtGui.QColor(hex_color)
+    h, s, v, a = color.getHsvF()
+    v = min(max(v * factor, 0), 1)
+    color.setHsvF(h, s, v, a)
+    return color.name()
+
+# Extra window height while the bake progress row is shown
+BAKE_PROGRESS_HEIGHT = 30
+
+ICON_MAP = {
+    'transform': ':transform.svg',
+    'mesh': ':mesh.svg',
+    'camera': ':camera.svg',
+    'light': ':light.svg',
+    'joint': ':kinJoint.png',
+    'nurbsCurve': ':out_nurbsCurve.png',
+    'locator': ':out_locator.png',
+    'ikHandle': ':ikHandle.svg',
+    'cluster': ':cluster.svg',
+    'parentConstraint': ':parentConstraint.svg',
+    'pointConstraint': ':pointConstraint.svg',
+    'orientConstraint': ':orientConstraint.svg',
+    'aimConstraint': ':aimConstraint.svg',
+    'poleVectorConstraint': ':poleVectorConstraint.svg',
+    'nurbsSurface': ':nurbsSurface.svg',
+    'follicle': ':follicle.svg',
+    'hairSystem': ':hairSystem.svg',
+    'dynamicConstraint': ':dynamicConstraint.svg',
+    'particleSystem': ':particleSystem.svg',
+    'emitter': ':emitter.svg',
+    'field': ':field.svg',
+}
+
+# Stylesheets, icons and pixmaps are built once per state and shared by every widget
+@lru_cache(maxsize=None)
+def get_cached_icon(icon_path):
+    return QtGui.QIcon(icon_path)
+
+@lru_cache(maxsize=None)
+def get_cached_pixmap(icon_path, size):
+    return get_cached_icon(icon_path).pixmap(size, size)
+
+@lru_cache(maxsize=None)
+def frame_style(color):
+    return f'''QFrame{{background-color: {color};border-radius: 3px; border: 0px solid #444444;}}'''
+
+@lru_cache(maxsize=None)
+def label_style(color):
+    return f"QLabel{{background-color: transparent; color: {color}; border: 0px;}}"
+
+@lru_cache(maxsize=None)
+def pin_button_style(color, pinned):
+    hover_color = hex_value(color, 0.8) if pinned else color
+    return f'''QPushButton{{background-color: transparent;border-radius: 3px; border: 0px solid #444444;}} 
+                                          QPushButton:hover {{background-color: {hover_color} ;}}
+                                          QToolTip {{background-color: {color}; color: #ffffff; border:0px;}}'''
+
+@lru_cache(maxsize=None)
+def combo_box_style(valid):
+    if not valid:
+        na = '#71131B'
+        return f'''QComboBox{{background-color: {na}; color: white;}}
+                                    QToolTip {{background-color: {na}; color: white; border:0px;}} '''
+    return f'''QComboBox{{background-color: #222222; color: white;}}
+                                    QComboBox:hover {{background-color: {hex_value('#222222', .8)};}}
+                                    QToolTip {{background-color: #222222; color: white; border:0px;}} '''
+
+@lru_cache(maxsize=None)
+def line_edit_style(valid):
+    return f'''QLineEdit{{background-color: #222222; color: {'#6FB8E8' if valid else 'white'};}}'''
+
+@lru_cache(maxsize=None)
+def preset_dropdown_style(color):
+    return f'''QComboBox{{background-color: {color}; border-radius: 3px;}} 
+                                               QComboBox:hover {{background-color: {hex_value(color, 1.2)};}} 
+                                               QComboBox:drop-down {{border:none}} 
+                                               QComboBox QAbstractItemView {{background-color: {color}; selection-background-color: {hex_value(color, 0.8)};}} 
+                                               QToolTip {{background-color: {color}; color: white; border:0px;}} '''
+
+def get_selection():
+    '''
+    Returns the selected nodes by unique name, and their UUIDs when a single node is selected.
+    '''
+    selected_objects = cmds.ls(selection=True) or []
+    selected_uuids = cmds.ls(selection=True, uuid=True) if len(selected_objects) == 1 else []
+    return selected_objects, selected_uuids
+
+def set_style_sheet(widget, style):
+    # Restyling is expensive in Qt, so skip it when nothing changed
+    if widget.styleSheet() != style:
+        widget.setStyleSheet(style)
+
+class CustomDelegate(QtWidgets.QStyledItemDelegate):
+    def __init__(self, parent=None):
+        super(CustomDelegate, self).__init__(parent)
+
+    def sizeHint(self, option, index):
+        # Set the desired height for each item
+        size = super(CustomDelegate, self).sizeHint(option, index)
+        size.setHeight(20)  # Set the height to 30 pixels
+        return size
+    
+class JointNameModel(QtCore.QStringListModel):
+    '''
+    The joint names of joint_index for the line edit completers, copied again only when the index changed.
+    '''
+    def __init__(self, parent=None):
+        super(JointNameModel, self).__init__(parent)
+        self.version = None
+
+    def refresh(self):
+        if self.version != joint_index.version or not joint_index.built:
+            names = joint_index.get_names()
+            self.version = joint_index.version
+            self.setStringList(names)
+
+@lru_cache(maxsize=None)
+def get_joint_name_model():
+    # One model shared by every button, 50k names are copied into Qt once, not per line edit
+    return JointNameModel()
+
+class JointListModel(QtCore.QStringListModel):
+    '''
+    The joints listed by one dropdown. set_joints only touches the rows that differ from the list shown,
+    so the combo box keeps its current row and an unchanged list costs no Qt work.
+    '''
+    def __init__(self, parent=None):
+        super(JointListModel, self).__init__(parent)
+        self.joints = []
+
+    def set_joints(self, joints):
+        '''
+        Shows joints, returns False when they were already shown.
+        '''
+        joints = list(joints)
+        old = self.joints
+        if joints == old:
+            return False
+        # Keep the rows the two lists start and end with, replace or resize the middle
+        shortest = min(len(old), len(joints))
+        start = 0
+        while start < shortest and old[start] == joints[start]:
+            start += 1
+        end = 0
+        while end < shortest - start and old[-1 - end] == joints[-1 - end]:
+            end += 1
+        removed = len(old) - start - end
+        added = len(joints) - start - end
+        replaced = min(removed, added)
+        if removed > replaced:
+            self.removeRows(start + replaced, removed - replaced)
+        elif added > replaced:
+            self.insertRows(start + replaced, added - replaced)
+        for row in range(start, start + added):
+            self.setData(self.index(row), joints[row])
+        self.joints = joints
+        return True
+
+class PinnedObjectButton(QtWidgets.QFrame):
+    def __init__(self, parent=None, selColor="#487593", onlyText = False):
+        super(PinnedObjectButton, self).__init__(parent)
+        self.pinned = False
+        self.pinned_state = None
+        self.combo_box_valid = None
+        self.icon_type = None
+        self.object_name = None
+        self.object_uuid = None
+        self.shown = False
+        self.deSelColor = "#333333"
+        self.selColor = selColor
+        self.onlyText = onlyText
+        self.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.setFrameShadow(QtWidgets.QFrame.Raised)
+        self.setStyleSheet(f'''QFrame{{background-color: {self.deSelColor};border-radius: 4px; border: 0px solid #444444;}}''')
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        self.setFixedHeight(24) 
+        self.layout = QtWidgets.QHBoxLayout(self)
+        self.layout.setContentsMargins(2, 1, 3, 1)
+        self.layout.setSpacing(1)
+        
+        self.icon_label = QtWidgets.QLabel(self)
+        self.icon_label.setStyleSheet("QLabel{background-color: transparent; color:white; border: 0px;}")
+        self.icon_label.setFixedSize(20, 20)
+        
+        self.name_label = QtWidgets.QLabel("No Valid Selection", self)
+        self.name_label.setStyleSheet("QLabel{background-color: transparent; color:white; border: 0px;}")
+        self.name_label.setAlignment(QtCore.Qt.AlignCenter)
+        
+        
+
+        self.pin_button = QtWidgets.QPushButton(self)
+        self.pin_button.setStyleSheet(f'''QPushButton{{background-color: transparent;border-radius: 4px; border: 0px solid #444444;}} QPushButton:hover {{background-color: {self.selColor} ;}}''')
+        self.pin_button.setCheckable(True)
+        self.pin_button.setChecked(False)
+        self.pin_button.setIcon(get_cached_icon(":/pinRegular.png"))
+        self.pin_button.clicked.connect(self.toggle_pin)
+        self.pin_button.setFixedSize(16, 16)
+
+        self.combo_box = QtWidgets.QComboBox(self)
+        self.combo_box.setStyleSheet(f'''QComboBox{{background-color: #222222; color: #6FB8E8;}}
+                                     QComboBox:hover {{background-color: {hex_value('#222222', .8)};}}
+                                     QToolTip {{background-color: #222222; color: white; border:0px;}} ''')
+        
+        self.combo_box.setToolTip(f" Select Joint")
+        #self.combo_box.setMaximumWidth(140)
+        self.combo_box.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+        self.combo_box.setVisible(False)
+        self.joint_model = JointListModel(self.combo_box)
+        self.combo_box.setModel(self.joint_model)
+        delegate = CustomDelegate(self.combo_box)
+        self.combo_box.setItemDelegate(delegate)
+        
+        self.line_edit = QtWidgets.QLineEdit(self)
+        self.line_edit.setStyleSheet(f'''QLineEdit{{background-color: #222222; color: white;}}
+                                     QComboBox:hover {{background-color: {hex_value('#222222', .8)};}}
+                                     QToolTip {{background-color: #222222; color: white; border:0px;}} ''')
+        
+        self.line_edit.setToolTip(f" Type Joint name")
+        #if self.onlyText == False:
+            #self.line_edit.setMaximumWidth(140)
+        self.line_edit.setVisible(True)
+        self.line_edit.textChanged.connect(self.validate_joint_name)
+
+        # The names are sorted, so the completer finds a prefix with a binary search instead of a scan
+        self.completer = QtWidgets.QCompleter(get_joint_name_model(), self.line_edit)
+        self.completer.setModelSorting(QtWidgets.QCompleter.CaseSensitivelySortedModel)
+        self.completer.setCaseSensitivity(QtCore.Qt.CaseSensitive)
+        self.completer.setMaxVisibleItems(12)
+        self.line_edit.setCompleter(self.completer)
+
+        self.layout.addWidget(self.icon_label)
+        self.layout.addWidget(self.name_label)
+        self.layout.addSpacing(5 if self.onlyText else 10)
+        self.layout.addWidget(self.combo_box)
+        self.layout.addWidget(self.line_edit)
+        self.layout.addSpacing(5)
+        self.layout.addWidget(self.pin_button)
+        
+        self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        
+        self.update_button()
+        self.update_onlyText()
+
+    def update_onlyText(self):
+        if self.onlyText == True:
+            pixmap = get_cached_pixmap(':kinJoint.png', 20)  # Set the size to match the label's fixed size
+            self.icon_label.setPixmap(pixmap)
+            self.name_label.setVisible(False)
+            #self.line_edit.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+
+    def validate_joint_name(self):
+        # Get the text from the QLineEdit
+        object_name = self.line_edit.text().strip()
+        get_joint_name_model().refresh()
+        
+        # Check the joint index instead of querying the scene on every keystroke
+        if joint_index.is_joint(object_name):
+            # Change the text color to blue if the object is a joint
+            set_style_sheet(self.line_edit, line_edit_style(True))
+            return True
+        else:
+            # Revert to the default color if the object is not a joint or does not exist
+            set_style_sheet(self.line_edit, line_edit_style(False))
+            return False
+
+
+    def toggle_pin(self):
+        self.pinned = self.pin_button.isChecked()
+        if self.pinned:
+            # Save the selected index of the combo box
+            self.saved_index = self.combo_box.currentIndex()
+        self.update_button()
+
+    def update_button(self):
+        self.update_pin_style()
+        
+        #self.update_combo_box()
+        self.update_selection()
+
+    def update_pin_style(self):
+        if self.pinned != self.pinned_state:
+            # Only restyle when the pinned state actually changed
+            self.pinned_state = self.pinned
+            if self.pinned:
+                set_style_sheet(self, frame_style(self.selColor))
+                set_style_sheet(self.name_label, label_style('#ffffff'))
+                self.name_label.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+                #self.name_label.setAlignment(QtCore.Qt.AlignLeft)
+                #self.name_label.setWordWrap(False)
+                self.pin_button.setIcon(get_cached_icon(":/nodeGrapherPinned.svg"))
+                set_style_sheet(self.pin_button, pin_button_style(self.selColor, True))
+                self.pin_button.setToolTip(f"Unpin Object and Joint")
+                
+            else:
+                set_style_sheet(self, frame_style(self.deSelColor))
+                set_style_sheet(self.name_label, label_style('#AAAAAA'))
+                self.pin_button.setIcon(get_cached_icon(":/pinRegular.png"))
+                set_style_sheet(self.pin_button, pin_button_style(self.selColor, False))
+                self.pin_button.setToolTip(f"Pin Object and Joint")
+
+    @profiling.profiled('update_selection')
+    def update_selection(self, selected_objects=None, selected_uuids=None):
+        if selected_objects is None:
+            selected_objects, selected_uuids = get_selection()
+        if len(selected_objects) == 1:
+            self.show_object(selected_objects[0], selected_uuids[0] if selected_uuids else None)
+        else:
+            self.show_object(None)
+
+    def show_object(self, object_name, object_uuid=None):
+        '''
+        Shows object_name (or no object when None) with its icon and joints, without touching the scene selection.
+        object_uuid, when known, is kept as the node's UUID instead of looking the name up.
+        '''
+        changed = object_name != self.object_name or not self.shown
+        self.shown = True
+        if object_name:
+            if object_uuid:
+                self.object_uuid = object_uuid
+            elif object_name != self.object_name or not self.object_uuid:
+                self.object_uuid = node_handles.get_uuids([object_name]).get(object_name)
+            self.object_name = object_name
+            if changed:
+                self.name_label.setText(self.object_name.split('|')[-1])
+                self.name_label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+                self.update_icon()
+                self.pin_button.setVisible(True)
+                self.icon_label.setVisible(True)
+                self.update_onlyText()
+            self.set_joints(get_joints([self.object_name]))
+        elif changed:
+            self.object_name = None
+            self.object_uuid = None
+            self.name_label.setText("No Valid Selection")
+            self.name_label.setAlignment(QtCore.Qt.AlignCenter)
+            self.icon_label.clear()
+            self.icon_type = None
+            self.icon_label.setVisible(False)
+            self.pin_button.setVisible(False)
+            self.set_joints([])
+            self.combo_box.setVisible(False)
+            self.line_edit.setVisible(True)
+            self.update_onlyText()
+        self.update_combo_box_color()
+
+    def update_combo_box(self):
+        selected_objects = cmds.ls(selection=True, shortNames=True)
+        if len(selected_objects) == 1:
+            self.set_joints(get_joints([self.object_name]))
+
+    def set_joints(self, joints):
+        '''
+        Updates the dropdown rows that changed, keeping the chosen joint when it is still listed.
+        '''
+        chosen = self.combo_box.currentText()
+        if not self.joint_model.set_joints(joints) or not chosen:
+            return
+        index = self.combo_box.findText(chosen, QtCore.Qt.MatchExactly | QtCore.Qt.MatchCaseSensitive)
+        if index != -1 and index != self.combo_box.currentIndex():
+            self.combo_box.setCurrentIndex(index)
+
+    def update_combo_box_color(self):
+        valid = self.combo_box.count() != 0
+        if valid == self.combo_box_valid:
+            return
+        self.combo_box_valid = valid
+        set_style_sheet(self.combo_box, combo_box_style(valid))
+        if not valid:
+            self.combo_box.setToolTip(f"Cannot find joint. Switch to text mode and type joint name")
+        else:
+            self.combo_box.setToolTip(f"Select Joint")
+
+
+    def show_context_menu(self, position):
+        menu = QtWidgets.QMenu()
+        switch_action = menu.addAction("Switch to Text" if self.combo_box.isVisible() else "Switch to Drop Down")
+        action = menu.exec_(self.mapToGlobal(position))
+        if action == switch_action:
+            self.switch_widget()
+
+    def switch_widget(self):
+        if self.combo_box.isVisible():
+            self.combo_box.setVisible(False)
+            self.line_edit.setVisible(True)
+        else:
+            self.combo_box.setVisible(True)
+            self.line_edit.setVisible(False)
+        if self.line_edit.isVisible():
+            get_joint_name_model().refresh()
+
+    def get_control_joint_obj(self):
+        if self.combo_box.isVisible():
+            return self.combo_box.currentText()
+        else:
+            return self.line_edit.text()
+
+    def update_icon(self):
+        object_type = self.get_object_type(self.object_name)
+        if object_type == self.icon_type:
+            return
+        self.icon_type = object_type
+        self.icon_label.setPixmap(get_cached_pixmap(ICON_MAP.get(object_type, ':default.svg'), 16))
+
+    def get_object_type(self, object_name):
+        shapes = cmds.listRelatives(object_name, shapes=True, fullPath=True)
+        if shapes:
+            try:
+                return cmds.objectType(shapes[0])
+            except:
+                pass
+        else:
+            return cmds.objectType(object_name)
+
+    def get_icon(self, object_type):
+        return get_cached_icon(ICON_MAP.get(object_type, ':default.svg'))
+
+class PinnedObjectWindow(QtWidgets.QDialog):
+    def __init__(self, parent=None):
+        super(PinnedObjectWindow, self).__init__(parent)
+        self.setWindowTitle("FK & IK Match")
+        self.setGeometry(1150, 360, 360, 250)
+        self.setMinimumWidth(280)
+        self.setFixedHeight(386)
+        self.presets = self.load_presets_from_default_set()
+        self.setupUI()
+        self.installEventFilter(self)
+        joint_cache.install_callbacks()
+        joint_index.install_callbacks()
+        self.update_pending = False
+        self.last_selection = None
+        self.bake_job = None
+        self.selection_script_job = cmds.scriptJob(event=["SelectionChanged", self.schedule_update_buttons], protected=True)
+
+    def setupUI(self):
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setAlignment(QtCore.Qt.AlignTop)
+
+        preset_frame = QtWidgets.QFrame()
+        preset_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        preset_frame.layout = QtWidgets.QHBoxLayout(preset_frame)
+        main_layout.addWidget(preset_frame)
+
+        presetBox_col = QtWidgets.QHBoxLayout()
+        preset_frame.layout.addLayout(presetBox_col)
+        label = QtWidgets.QLabel("Select Preset ", self)
+        label.setStyleSheet("QLabel{background-color: transparent; color: #CCCCCC; border: 0px;}")
+        label.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+
+        presetBox_col.addWidget(label)
+        self.preset_dropdown = QtWidgets.QComboBox(self)
+        self.preset_dropdown.addItem("Create Limb Preset")
+        self.presetBoxColor_0 = "#333333"
+        self.preset_dropdown.setStyleSheet(preset_dropdown_style(self.presetBoxColor_0))
+        self.preset_dropdown.setToolTip(f" Select Preset")
+        delegate = CustomDelegate(self.preset_dropdown)
+        self.preset_dropdown.setItemDelegate(delegate)
+        self.preset_dropdown.setFixedHeight(22)
+        self.preset_dropdown.currentIndexChanged.connect(self.load_preset)
+        presetBox_col.addWidget(self.preset_dropdown)
+
+        presetButton_col = QtWidgets.QHBoxLayout()
+        preset_frame.layout.addLayout(presetButton_col)
+        self.save_preset_button = QtWidgets.QPushButton("", self)
+        self.button_style(self.save_preset_button, "#333333", "Save preset")
+        self.save_preset_button.setIcon(QtGui.QIcon(":save.png"))
+        self.save_preset_button.setIconSize(QtCore.QSize(20, 20))
+        self.save_preset_button.setFixedWidth(24)
+        self.save_preset_button.clicked.connect(lambda: self.save_current_as_preset())
+        presetButton_col.addWidget(self.save_preset_button)
+
+        self.delete_preset_button = QtWidgets.QPushButton("", self)
+        self.button_style(self.delete_preset_button, "#333333", "Delete Preset")
+        self.delete_preset_button.setIcon(QtGui.QIcon(":delete.png"))
+        self.delete_preset_button.setIconSize(QtCore.QSize(20, 20))
+        self.delete_preset_button.setFixedWidth(24)
+        self.delete_preset_button.clicked.connect(lambda: self.delete_selected_preset())
+        presetButton_col.addWidget(self.delete_preset_button)
+
+        self.scan_scene_button = QtWidgets.QPushButton("", self)
+        self.button_style(self.scan_scene_button, "#333333", "Scan Scene: create a preset for every IK/FK limb")
+        self.scan_scene_button.setIcon(QtGui.QIcon(":search.png"))
+        self.scan_scene_button.setIconSize(QtCore.QSize(20, 20))
+        self.scan_scene_button.setFixedWidth(24)
+        self.scan_scene_button.clicked.connect(lambda: self.scan_scene_presets())
+        presetButton_col.addWidget(self.scan_scene_button)
+
+        self.calibrate_preset_button = QtWidgets.QPushButton("", self)
+        self.button_style(self.calibrate_preset_button, "#333333", "Calibrate Preset: measure each control's offset from its joint (best at bind pose)")
+        self.calibrate_preset_button.setIcon(QtGui.QIcon(":kinJoint.png"))
+        self.calibrate_preset_button.setIconSize(QtCore.QSize(20, 20))
+        self.calibrate_preset_button.setFixedWidth(24)
+        self.calibrate_preset_button.clicked.connect(lambda: self.calibrate_selected_preset())
+        presetButton_col.addWidget(self.calibrate_preset_button)
+
+        objPin_frame = QtWidgets.QFrame()
+        objPin_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        objPin_frame.layout = QtWidgets.QVBoxLayout(objPin_frame)
+        grid_layout = QtWidgets.QGridLayout(objPin_frame)
+        grid_layout.setAlignment(QtCore.Qt.AlignTop)
+        grid_layout.setSpacing(8)
+
+        self.fk1_button = PinnedObjectButton(self)
+        grid_layout.addWidget(self.create_label("FK 1 :"), 0, 0, QtCore.Qt.AlignRight)
+        self.fk1_button.setToolTip(f"FK1: Shoulder or hip FK Control | Shoulder or hip FK Joint")
+        grid_layout.addWidget(self.fk1_button, 0, 1)
+
+        self.fk2_button = PinnedObjectButton(self)
+        grid_layout.addWidget(self.create_label("FK 2 :"), 1, 0, QtCore.Qt.AlignRight)
+        self.fk2_button.setToolTip(f"FK2: Elbow or Knee FK Control | Elbow or Knee FK Joint")
+        grid_layout.addWidget(self.fk2_button, 1, 1)
+
+        self.fk3_button = PinnedObjectButton(self)
+        grid_layout.addWidget(self.create_label("FK 3 :"), 2, 0, QtCore.Qt.AlignRight)
+        self.fk3_button.setToolTip(f"FK3: Wrist or Ankle FK Control | Wrist or Ankle FK Joint")
+        grid_layout.addWidget(self.fk3_button, 2, 1)
+
+        self.ik1_button = PinnedObjectButton(self,selColor="#7452A7",onlyText=True)
+        grid_layout.addWidget(self.create_label("IK 1 :"), 3, 0, QtCore.Qt.AlignRight)
+        self.ik1_button.setToolTip(f"IK 1: <Shoulder or hip IK joint>")
+        grid_layout.addWidget(self.ik1_button, 3, 1)
+
+        self.ik2_button = PinnedObjectButton(self,selColor="#7452A7")
+        grid_layout.addWidget(self.create_label("IK POLE :"), 4, 0, QtCore.Qt.AlignRight)
+        self.ik2_button.setToolTip(f"IK POLE: IK Pole Control | Elbow or Knee Joint")
+        grid_layout.addWidget(self.ik2_button, 4, 1)
+
+        self.ik3_button = PinnedObjectButton(self,selColor="#7452A7")
+        grid_layout.addWidget(self.create_label("IK CTRL :"), 5, 0, QtCore.Qt.AlignRight)
+        self.ik3_button.setToolTip(f"IK CTRL: Wrist or Ankle IK Control | Wrist or Ankle IK Joint")
+        grid_layout.addWidget(self.ik3_button, 5, 1)
+
+        self.pinButtonList = [('FK1', self.fk1_button), ('FK2', self.fk2_button), ('FK3', self.fk3_button), 
+                              ('IK1', self.ik1_button), ('IK2', self.ik2_button), ('IK3', self.ik3_button)]
+        objPin_frame.layout.addLayout(grid_layout)
+        main_layout.addWidget(objPin_frame)
+        self.setLayout(main_layout)
+        self.populate_dropdown()
+
+        execute_frame = QtWidgets.QFrame()
+        execute_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        execute_frame.layout = QtWidgets.QHBoxLayout(execute_frame)
+        # Add buttons for FK to IK and IK to FK
+        #button_layout = QtWidgets.QHBoxLayout()
+        
+        fk_to_ik_button = QtWidgets.QPushButton("FK to IK")
+        self.button_style(fk_to_ik_button, "#333333", "Match FK to IK")
+        fk_to_ik_button.clicked.connect(lambda: self.execute_fk_to_ik())
+        execute_frame.layout.addWidget(fk_to_ik_button)
+        
+        ik_to_fk_button = QtWidgets.QPushButton("IK to FK")
+        self.button_style(ik_to_fk_button, "#333333", "Match IK to FK")
+        ik_to_fk_button.clicked.connect(lambda: self.execute_ik_to_fk())
+        execute_frame.layout.addWidget(ik_to_fk_button)
+
+        all_limbs_button = QtWidgets.QPushButton("All Limbs")
+        self.button_style(all_limbs_button, "#333333", "Match several limb presets in one step")
+        all_limbs_menu = QtWidgets.QMenu(all_limbs_button)
+        all_limbs_menu.addAction("FK to IK", lambda: self.execute_all_limbs('fk_to_ik'))
+        all_limbs_menu.addAction("IK to FK", lambda: self.execute_all_limbs('ik_to_fk'))
+        all_limbs_button.setMenu(all_limbs_menu)
+        execute_frame.layout.addWidget(all_limbs_button)
+        
+        '''# Add the new "Create Pole Ref" button
+        self.create_pole_ref_button = QtWidgets.QPushButton("Create Pole Ref")
+        self.button_style(self.create_pole_ref_button, "#333333", "<b>Create Pole Reference:</b> <br> This locator should be pinned to IK1")
+        self.create_pole_ref_button.setFixedWidth(95)
+        self.create_pole_ref_button.setVisible(True)
+        self.create_pole_ref_button.clicked.connect(self.execute_create_pole_ref)
+
+        execute_frame.layout.addWidget(self.create_pole_ref_button)'''
+        
+        main_layout.addWidget(execute_frame)
+
+        bake_frame = QtWidgets.QFrame()
+        bake_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        bake_frame.layout = QtWidgets.QHBoxLayout(bake_frame)
+        bake_frame.layout.setContentsMargins(9, 4, 9, 4)
+
+        self.bake_checkbox = QtWidgets.QCheckBox("Bake Range", self)
+        self.bake_checkbox.setStyleSheet("QCheckBox{background-color: transparent; color: #CCCCCC; border: 0px;}")
+        self.bake_checkbox.setToolTip("Snap and key every frame from Start to End instead of the current frame")
+        bake_frame.layout.addWidget(self.bake_checkbox)
+
+        start_time = cmds.playbackOptions(query=True, minTime=True)
+        end_time = cmds.playbackOptions(query=True, maxTime=True)
+        self.start_frame_box = self.create_frame_box(start_time, "Start Frame")
+        self.end_frame_box = self.create_frame_box(end_time, "End Frame")
+        self.step_box = self.create_frame_box(1, "Step")
+        self.step_box.setMinimum(1)
+        for label_text, box in (("Start", self.start_frame_box), ("End", self.end_frame_box), ("Step", self.step_box)):
+            bake_frame.layout.addWidget(self.create_label(label_text))
+            bake_frame.layout.addWidget(box)
+
+        main_layout.addWidget(bake_frame)
+
+        reduce_frame = QtWidgets.QFrame()
+        reduce_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        reduce_frame.layout = QtWidgets.QHBoxLayout(reduce_frame)
+        reduce_frame.layout.setContentsMargins(9, 4, 9, 4)
+
+        self.reduce_checkbox = QtWidgets.QCheckBox("Reduce Keys", self)
+        self.reduce_checkbox.setStyleSheet("QCheckBox{background-color: transparent; color: #CCCCCC; border: 0px;}")
+        self.reduce_checkbox.setToolTip("After baking, keep only the keys needed to stay within the tolerances")
+        reduce_frame.layout.addWidget(self.reduce_checkbox)
+
+        self.translate_tolerance_box = self.create_tolerance_box(0.01, "Position tolerance (cm)")
+        self.rotate_tolerance_box = self.create_tolerance_box(0.1, "Rotation tolerance (degrees)")
+        for label_text, box in (("Pos", self.translate_tolerance_box), ("Rot", self.rotate_tolerance_box)):
+            reduce_frame.layout.addWidget(self.create_label(label_text))
+            reduce_frame.layout.addWidget(box)
+
+        main_layout.addWidget(reduce_frame)
+
+        self.bake_progress_frame = QtWidgets.QFrame()
+        self.bake_progress_frame.setStyleSheet("QFrame { border: 0px solid gray; border-radius: 5px; background-color: #212121; }")
+        self.bake_progress_frame.layout = QtWidgets.QHBoxLayout(self.bake_progress_frame)
+        self.bake_progress_frame.layout.setContentsMargins(9, 4, 9, 4)
+
+        self.bake_progress_bar = QtWidgets.QProgressBar(self)
+        self.bake_progress_bar.setStyleSheet("QProgressBar{background-color: #333333; color: white; border-radius: 3px; text-align: center;}"
+                                             "QProgressBar::chunk{background-color: #487593; border-radius: 3px;}")
+        self.bake_progress_bar.setFixedHeight(22)
+        self.bake_progress_frame.layout.addWidget(self.bake_progress_bar)
+
+        self.cancel_bake_button = QtWidgets.QPushButton("Cancel", self)
+        self.button_style(self.cancel_bake_button, "#333333", "Stop the bake and leave the keys as they were")
+        self.cancel_bake_button.setFixedWidth(60)
+        self.cancel_bake_button.clicked.connect(lambda: self.cancel_bake())
+        self.bake_progress_frame.layout.addWidget(self.cancel_bake_button)
+
+        self.bake_progress_frame.setVisible(False)
+        main_layout.addWidget(self.bake_progress_frame)
+        self.setLayout(main_layout)
+
+    def create_frame_box(self, value, tooltip):
+        box = QtWidgets.QSpinBox(self)
+        box.setRange(-100000, 100000)
+        box.setValue(int(value))
+        box.setStyleSheet("QSpinBox{background-color: #333333; color: white; border-radius: 3px;}")
+        box.setToolTip(tooltip)
+        box.setFixedHeight(22)
+        return box
+
+    def create_tolerance_box(self, value, tooltip):
+        box = QtWidgets.QDoubleSpinBox(self)
+        box.setRange(0.0001, 100.0)
+        box.setDecimals(4)
+        box.setSingleStep(0.01)
+        box.setValue(value)
+        box.setStyleSheet("QDoubleSpinBox{background-color: #333333; color: white; border-radius: 3px;}")
+        box.setToolTip(tooltip)
+        box.setFixedHeight(22)
+        return box
+
+    def get_bake_tolerances(self):
+        if not self.reduce_checkbox.isChecked():
+            return None
+        return {'translate': self.translate_tolerance_box.value(), 'rotate': self.rotate_tolerance_box.value()}
+    
+    '''def execute_create_pole_ref(self):
+        pinned_objects = self.get_current_pinned_objects()
+        create_pole_ref(pinned_objects['IK2']['object_name'], pinned_objects['FK2']['control_joint_obj'])'''
+
+    def start_bake(self, limbs, mode):
+        '''
+        Bakes limbs over the frame range as a BakeJob that runs a chunk at a time whenever Maya is idle,
+        so the viewport stays usable. The keys are only written once every frame is sampled, solved and reduced.
+        '''
+        if self.bake_job is not None:
+            cmds.warning("A bake is already running.")
+            return
+        self.bake_job = BakeJob(limbs, mode, self.start_frame_box.value(), self.end_frame_box.value(), self.step_box.value(),
+                                tolerances=self.get_bake_tolerances())
+        self.bake_progress_bar.setRange(0, self.bake_job.progress()[1])
+        self.bake_progress_bar.setValue(0)
+        self.bake_progress_bar.setFormat(f"Sampling 0 / {len(self.bake_job.frames)} frames")
+        self.set_bake_progress_visible(True)
+        maya.utils.executeDeferred(self.run_bake_step, self.bake_job)
+
+    @profiling.user_action('Bake Step')
+    def run_bake_step(self, job):
+        # Steps queued for a cancelled bake or a closed window do nothing
+        if job is not self.bake_job:
+            return
+        if job.cancelled:
+            # The job cancelled itself (new scene, deleted node)
+            self.end_bake()
+            return
+        try:
+            running = job.step()
+        except Exception:
+            self.end_bake()
+            raise
+        if not running:
+            self.end_bake()
+            return
+        self.bake_progress_bar.setValue(job.progress()[0])
+        if job.stage == 'sample':
+            self.bake_progress_bar.setFormat(f"Sampling {job.frames_done} / {len(job.frames)} frames, {job.frames_per_second():.0f} fps")
+        elif job.stage == 'solve':
+            self.bake_progress_bar.setFormat(f"Solving {job.frames_solved} / {len(job.frames)} frames")
+        elif job.stage == 'reduce':
+            self.bake_progress_bar.setFormat("Reducing keys...")
+        else:
+            self.bake_progress_bar.setFormat("Writing keys...")
+        maya.utils.executeDeferred(self.run_bake_step, job)
+
+    def cancel_bake(self):
+        if self.bake_job is not None:
+            self.bake_job.cancel()
+            print("Bake cancelled, no keys were changed.")
+        self.end_bake()
+
+    def end_bake(self):
+        self.bake_job = None
+        self.set_bake_progress_visible(False)
+
+    def set_bake_progress_visible(self, visible):
+        if visible != self.bake_progress_frame.isVisible():
+            self.bake_progress_frame.setVisible(visible)
+            self.setFixedHeight(self.height() + (BAKE_PROGRESS_HEIGHT if visible else -BAKE_PROGRESS_HEIGHT))
+
+    @profiling.user_action('FK to IK')
+    def execute_fk_to_ik(self):
+        pinned_objects = self.get_current_pinned_objects()
+        limb = get_limb(pinned_objects)
+        if self.bake_checkbox.isChecked():
+            self.start_bake([limb], 'fk_to_ik')
+        else:
+            match_fk_to_ik(limb['fk_controls'], limb['ik_joints'], uuids=limb['uuids'], control_offsets=limb['control_offsets'])
+
+    @profiling.user_action('IK to FK')
+    def execute_ik_to_fk(self):
+        pinned_objects = self.get_current_pinned_objects()
+        ik_controls = [pinned_objects['IK1']['control_joint_obj'], pinned_objects['IK2']['control_joint_obj'], pinned_objects['IK3']['object_name']]
+        fk_joints = [pinned_objects['FK1']['control_joint_obj'], pinned_objects['FK2']['control_joint_obj'], pinned_objects['FK3']['control_joint_obj']]
+        ik_pole = pinned_objects['IK2']['object_name']
+        limb = get_limb(pinned_objects)
+        if self.bake_checkbox.isChecked():
+            self.start_bake([limb], 'ik_to_fk')
+        else:
+            # get_current_pinned_objects already chose the pole offset, the locator is not read again
+            match_ik_to_fk(ik_controls, fk_joints, ik_pole, None, uuids=limb['uuids'],
+                           pole_offset=limb['pole_offset'], control_offsets=limb['control_offsets'])
+
+    @profiling.user_action('All Limbs')
+    def execute_all_limbs(self, mode):
+        preset_names = self.choose_presets()
+        if not preset_names:
+            return
+        limbs = [get_limb(self.presets[preset_name]) for preset_name in preset_names]
+        if self.bake_checkbox.isChecked():
+            self.start_bake(limbs, mode)
+        else:
+            snap_limbs(limbs, mode)
+
+    def choose_presets(self):
+        '''
+        Asks which presets to match. Returns the checked preset names.
+        '''
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("Match Limb Presets")
+        layout = QtWidgets.QVBoxLayout(dialog)
+        preset_list = QtWidgets.QListWidget(dialog)
+        for preset_name in self.presets.keys():
+            item = QtWidgets.QListWidgetItem(preset_name, preset_list)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+        layout.addWidget(preset_list)
+        buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, parent=dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return []
+        return [preset_list.item(i).text() for i in range(preset_list.count()) if preset_list.item(i).checkState() == QtCore.Qt.Checked]
+
+    def schedule_update_buttons(self):
+        # Selection events are merged into one update that runs when Maya is idle
+        if not self.update_pending:
+            self.update_pending = True
+            maya.utils.executeDeferred(self.update_buttons)
+
+    @profiling.user_action('Selection Changed')
+    def update_buttons(self):
+        self.update_pending = False
+        if not cmds.scriptJob(exists=self.selection_script_job):
+            # The window was closed while the update was queued
+            return
+        selected_objects = cmds.ls(selection=True) or []
+        if selected_objects == self.last_selection:
+            return
+        self.last_selection = selected_objects
+        selected_uuids = cmds.ls(selection=True, uuid=True) if len(selected_objects) == 1 else []
+        for name, button in self.pinButtonList:
+            if not button.pinned:
+                button.update_selection(selected_objects, selected_uuids)
+
+    def create_label(self, text):
+        label = QtWidgets.QLabel(text, self)
+        label.setStyleSheet("QLabel{background-color: transparent; color: #CCCCCC; border: 0px;}")
+        label.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        return label
+
+    @profiling.user_action('Save Preset')
+    def save_current_as_preset(self):
+        while True:
+            preset_name, ok = QtWidgets.QInputDialog.getText(self, "Save Preset", "Enter preset name:")
+            if ok and preset_name:
+                if preset_name in self.presets:
+                    QtWidgets.QMessageBox.warning(self, "Duplicate Preset", "A preset with this name already exists. Please choose a different name.")
+                else:
+                    # Calibration is left to Calibrate Preset, at a pose the user picked
+                    self.presets[preset_name] = self.get_current_pinned_objects()
+                    self.preset_dropdown.addItem(preset_name)
+                    self.save_presets_to_default_set()
+                    break
+            elif not ok:
+                break
+
+    @profiling.user_action('Scan Scene')
+    def scan_scene_presets(self):
+        scanned_presets = scan_scene()
+        for preset_name, preset in scanned_presets.items():
+            if preset_name not in self.presets:
+                self.preset_dropdown.addItem(preset_name)
+            self.presets[preset_name] = preset
+        self.save_presets_to_default_set()
+        print(f"{len(scanned_presets)} limb presets found in the scene, calibrate them at bind pose.")
+
+    def calibrate_preset(self, preset):
+        '''
+        Returns preset with the control offsets of its limb and the offset of its pole reference locator measured,
+        or unchanged when a slot is empty.
+        '''
+        try:
+            limb = get_limb(preset)
+            calibrated = dict(preset, control_offsets=calibrate_limb(limb))
+        except RuntimeError:
+            return preset
+        pole_offset = get_pole_offset(preset['IK1']['object_name'], preset['FK2']['control_joint_obj'], limb['uuids'])
+        if pole_offset:
+            calibrated['pole_offset'] = pole_offset
+        return calibrated
+
+    @profiling.user_action('Calibrate Preset')
+    def calibrate_selected_preset(self):
+        index = self.preset_dropdown.currentIndex()
+        preset_name = self.preset_dropdown.itemText(index)
+        if index <= 0 or preset_name not in self.presets:
+            cmds.warning("Select a preset to calibrate.")
+            return
+        preset = self.calibrate_preset(self.presets[preset_name])
+        if 'control_offsets' not in preset:
+            cmds.warning(f"Cannot calibrate '{preset_name}', some of its controls or joints are missing.")
+            return
+        self.presets[preset_name] = preset
+        self.save_presets_to_default_set()
+        print(f"Preset '{preset_name}' calibrated.")
+
+    @profiling.user_action('Delete Preset')
+    def delete_selected_preset(self):
+        index = self.preset_dropdown.currentIndex()
+        if index > 0:
+            preset_name = self.preset_dropdown.itemText(index)
+            if preset_name in self.presets:
+                del self.presets[preset_name]
+                self.preset_dropdown.removeItem(index)
+                self.save_presets_to_default_set()
+
+    @profiling.profiled('save_presets_to_default_set', payload=lambda args, result: len(args[0].presets))
+    def save_presets_to_default_set(self):
+        self.presets.save()
+
+    def load_presets_from_default_set(self):
+        return PresetStore('defaultObjectSet')
+
+    def populate_dropdown(self):
+        for preset_name in self.presets.keys():
+            self.preset_dropdown.addItem(preset_name)
+
+    def get_current_pinned_objects(self):
+        # Joints picked from a dropdown reuse the UUIDs stored when they were found, only typed names are looked up
+        joint_uuids = get_joint_uuids([button.get_control_joint_obj() for button_name, button in self.pinButtonList])
+        pinned_objects = {}
+        for button_name, button in self.pinButtonList:
+            pinned_objects[button_name] = {
+                'object_name': button.object_name,
+                'object_uuid': button.object_uuid,
+                'pinned': button.pinned,
+                'control_joint_obj': button.get_control_joint_obj(),
+                'control_joint_uuid': joint_uuids.get(button.get_control_joint_obj()),
+                'mode': 'combo_box' if button.combo_box.isVisible() else 'line_edit',
+                'selected_index': button.combo_box.currentIndex()  # Save the selected index
+            }
+        # The loaded preset's cached offsets hold as long as the slots they were measured for still have the same
+        # controls and joints pinned
+        preset = self.presets.get(self.preset_dropdown.currentText()) if self.preset_dropdown.currentIndex() > 0 else {}
+        matching = {slot for slot in PRESET_SLOTS if slot in preset and
+                    (preset[slot]['object_name'], preset[slot]['control_joint_obj'])
+                    == (pinned_objects[slot]['object_name'], pinned_objects[slot]['control_joint_obj'])}
+        # A pole reference locator pinned to IK1 is kept as its offset from FK2, so presets do not need the locator.
+        # A cached offset is used as it is, like All Limbs does; Calibrate Preset measures it again.
+        # Without a cached offset the locator is measured
+        pole_offset = preset.get('pole_offset') if {'IK1', 'FK2'} <= matching else None
+        if not pole_offset:
+            pole_offset = get_pole_offset(pinned_objects['IK1']['object_name'], pinned_objects['FK2']['control_joint_obj'])
+        if pole_offset:
+            pinned_objects['pole_offset'] = pole_offset
+        control_offsets = preset.get('control_offsets')
+        if control_offsets and set(control_offsets) <= matching:
+            pinned_objects['control_offsets'] = control_offsets
+        return pinned_objects
+
+    @profiling.user_action('Load Preset')
+    def load_preset(self, index):
+        # Repaint once after every button has been filled in
+        self.setUpdatesEnabled(False)
+        try:
+            if index == 0 or self.preset_dropdown.count() == 1:
+                selected_objects, selected_uuids = get_selection()
+                # The buttons no longer show what update_buttons last saw, the next selection event must refresh them
+                self.last_selection = None
+                for name, button in self.pinButtonList:
+                    button.pinned = False
+                    button.pin_button.setChecked(False)
+                    button.line_edit.setText("")
+                    button.combo_box.setVisible(True)
+                    button.combo_box.setCurrentIndex(0)
+                    button.line_edit.setVisible(False)
+                    button.update_pin_style()
+                    button.update_selection(selected_objects, selected_uuids)
+                set_style_sheet(self.preset_dropdown, preset_dropdown_style(self.presetBoxColor_0))
+            else:
+                color = "#487593"
+                set_style_sheet(self.preset_dropdown, preset_dropdown_style(color))
+                preset_name = self.preset_dropdown.itemText(index)
+                if preset_name in self.presets:
+                    self.set_pinned_objects(self.presets[preset_name])
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def set_pinned_objects(self, pinned_objects):
+        '''
+        Fills the buttons straight from preset data. The scene selection is left alone.
+        Nodes are found through their stored UUIDs, so renamed nodes still load.
+        '''
+        # The buttons stop showing the selection update_buttons last saw, so reselecting it refreshes them again
+        self.last_selection = None
+        names = get_preset_names(pinned_objects)
+        for button_name, button in self.pinButtonList:
+            pinned_data = pinned_objects.get(button_name)
+            if pinned_data:
+                button.pinned = pinned_data['pinned']
+                button.pin_button.setChecked(button.pinned)
+                button.update_pin_style()
+                object_name = names.get(pinned_data['object_name'])
+                button.show_object(object_name, pinned_data.get('object_uuid') if object_name else None)
+                if pinned_data['mode'] == 'combo_box':
+                    button.combo_box.setVisible(True)
+                    button.line_edit.setVisible(False)
+                    # Set the combo box to the saved index
+                    button.combo_box.setCurrentIndex(pinned_data.get('selected_index', 0))
+                else:
+                    button.combo_box.setVisible(False)
+                    button.line_edit.setVisible(True)
+                    button.line_edit.setText(names.get(pinned_data['control_joint_obj'], pinned_data['control_joint_obj']))
+
+    def closeEvent(self, event):
+        if self.bake_job is not None:
+            self.cancel_bake()
+        if cmds.scriptJob(exists=self.selection_script_job):
+            cmds.scriptJob(kill=self.selection_script_job, force=True)
+        joint_cache.remove_callbacks()
+        joint_index.remove_callbacks()
+        super(PinnedObjectWindow, self).closeEvent(event)
+
+    def button_style(self, button, color, tooltip):
+        button.setStyleSheet(f'''QPushButton{{background-color: {color};border-radius: 3px;}} 
+                             QPushButton:hover {{background-color: {hex_value(color, 1.2)} ;}} 
+                             QPushButton:pressed {{background-color: {hex_value(color, 0.8)} ;}} 
+                             QToolTip {{background-color: {color};color: white; border:0px;}}''')
+        button.setToolTip(f"<html><body><p style='color:white; white-space:nowrap; '>{tooltip}</p></body></html>")
+        #button.setToolTip(f" {tooltip}")
+        button.setFixedHeight(24)
+
+# The open window, so another click of the shelf button raises it instead of building a new one
+window = None
+
+def show():
+    global window
+    if window is not None and isValid(window) and window.isVisible():
+        window.raise_()
+        window.activateWindow()
+        return window
+    if cmds.window("pinnedObjectUI", exists=True):
+        cmds.deleteUI("pinnedObjectUI", wnd=True)
+    maya_main_window = get_maya_main_window()
+    custom_ui = PinnedObjectWindow(parent=maya_main_window)
+    custom_ui.setObjectName("pinnedObjectUI")
+    custom_ui.show()
+    window = custom_ui
+    return custom_ui
@@ -0,0 +1,12 @@
+'''
+The tests run against the in-memory Maya of tests/fake_maya.py, so they need neither Maya nor a license.
+The benchmarks import it from here as well.
+'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fake_maya
+fake_maya.install()
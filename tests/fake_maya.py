@@ -0,0 +1,1173 @@
+'''
+A small in-memory stand-in for maya.cmds and maya.api.OpenMaya, so the tool can be tested and benchmarked without Maya.
+
+install() puts the fake modules into sys.modules before ik_fk_snap is imported.
+The scene graph keeps nodes, DAG parenting, attributes and connections; world matrices are
+computed from translate/rotate/rotateAxis/jointOrient/scale and the pivots the way Maya does.
+Attributes are evaluated at a time: anim curves connected to them are read at that time, and so are
+orient and pole vector constraints. Rotate plane ikHandles solve their chain (see solve_ik).
+Other constraints do not evaluate, they only hold the connections that get_joints and the scanner walk.
+Anim curves can be edited through MFnAnimCurve and MDGModifier, and additive animation layers blend
+their curves by weight, which is what ik_fk_snap.key_writer needs.
+Every cmds call is counted in cmds_calls, so benchmarks can report DG traffic as well as time.
+'''
+import sys
+import types
+import uuid as uuid_module
+from collections import Counter
+
+import numpy as np
+
+from ik_fk_snap import snap_math
+
+ANGLE_ATTRS = ('rotate', 'rotateAxis', 'jointOrient')
+VECTOR_ATTRS = ('translate', 'rotate', 'rotateAxis', 'jointOrient', 'scale', 'rotatePivot', 'rotatePivotTranslate',
+                'scalePivot', 'scalePivotTranslate', 'poleVector', 'constraintRotate', 'constraintTranslate')
+# Tangent types, numbered like MFnAnimCurve's
+TANGENT_GLOBAL, TANGENT_FIXED, TANGENT_LINEAR, TANGENT_FLAT, TANGENT_STEP, TANGENT_AUTO = 0, 1, 2, 3, 5, 11
+ROOT_LAYER = 'BaseAnimation'
+cmds_calls = Counter()
+
+class Node(object):
+    def __init__(self, scene, name, node_type, parent=None, dag=True):
+        self.scene = scene
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.children = []
+        self.dag = dag
+        self.alive = True
+        self.uuid = str(uuid_module.uuid4()).upper()
+        self.attrs = {}
+        # Attributes computed from other nodes, {attribute: function(time)}; constraints put their outputs here
+        self.evaluators = {}
+        self.curve = None
+        # Animation layers: the parent layer and {plug name: anim curve node} of the plugs on the layer
+        self.layer_parent = None
+        self.layer_curves = {}
+        if dag:
+            self.attrs.update({'translate': np.zeros(3), 'rotate': np.zeros(3), 'rotateAxis': np.zeros(3),
+                               'scale': np.ones(3), 'rotateOrder': 0, 'rotatePivot': np.zeros(3),
+                               'rotatePivotTranslate': np.zeros(3), 'scalePivot': np.zeros(3),
+                               'scalePivotTranslate': np.zeros(3)})
+            if node_type == 'joint':
+                self.attrs['jointOrient'] = np.zeros(3)
+        if parent:
+            parent.children.append(self)
+
+    def long_name(self):
+        if not self.dag:
+            return self.name
+        names = []
+        node = self
+        while node:
+            names.append(node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(names))
+
+    def set_parent(self, parent):
+        '''
+        Moves the node under parent keeping its local values, like parent -relative.
+        '''
+        if self.parent:
+            self.parent.children.remove(self)
+        self.parent = parent
+        if parent:
+            parent.children.append(self)
+
+    def partial_name(self):
+        if not self.dag or len(self.scene.by_name.get(self.name, ())) == 1:
+            return self.name
+        return self.long_name()
+
+    def get(self, attr, time=None):
+        '''
+        Returns the value of attr at time (the current time by default), following incoming connections.
+        Vector values are returned as a new array.
+        '''
+        if attr in self.evaluators:
+            value = np.array(self.evaluators[attr](time), dtype=float)
+        else:
+            value = self.attrs[attr]
+            value = np.array(value, dtype=float) if isinstance(value, np.ndarray) else value
+        if not self.scene.connections.get(self):
+            return value
+        if attr in VECTOR_ATTRS:
+            for axis in range(3):
+                source = self.output_of(self.input(attr + 'XYZ'[axis]), time)
+                if source is not None:
+                    value[axis] = source
+            return value
+        source = self.output_of(self.input(attr), time)
+        return value if source is None else source
+
+    def input(self, attr):
+        for source, source_attr, destination, destination_attr in self.scene.connections.get(self, ()):
+            if destination is self and destination_attr == attr and source.alive:
+                return source, source_attr
+        return None
+
+    @staticmethod
+    def output_of(connection, time):
+        '''
+        Returns the value a connection's source plug gives, or None when the source does not compute it.
+        '''
+        if connection is None:
+            return None
+        source, source_attr = connection
+        if source.curve is not None:
+            return source.curve.evaluate(source.scene.time if time is None else time)
+        base, axis = vector_attr(source_attr)
+        if base not in source.evaluators and base not in source.attrs:
+            return None
+        value = source.get(base, time)
+        return float(value[axis]) if axis is not None else value
+
+    def local_matrix(self, time=None):
+        '''
+        Maya's transformation matrix: scale about the scale pivot, rotate about the rotate pivot, then translate.
+        '''
+        attrs = {attr: self.get(attr, time) for attr in VECTOR_ATTRS[:9] if attr in self.attrs}
+        attrs['rotateOrder'] = self.attrs['rotateOrder']
+        matrix = np.identity(4)
+        rotation = (snap_math.euler_to_matrix(attrs['rotateAxis'])
+                    @ snap_math.euler_to_matrix(attrs['rotate'], attrs['rotateOrder'])
+                    @ snap_math.euler_to_matrix(attrs.get('jointOrient', np.zeros(3))))
+        matrix[:3, :3] = rotation * attrs['scale'][:, None]
+        scale_pivot, rotate_pivot = attrs['scalePivot'], attrs['rotatePivot']
+        before_rotation = (scale_pivot - scale_pivot * attrs['scale'] + attrs['scalePivotTranslate'] - rotate_pivot)
+        matrix[3, :3] = (before_rotation @ rotation + rotate_pivot + attrs['rotatePivotTranslate']
+                         + attrs['translate'])
+        return matrix
+
+    def world_rotate_pivot(self, time=None):
+        return snap_math.transform_points(self.get('rotatePivot', time), self.world_matrix(time))
+
+    def parent_matrix(self, time=None):
+        return self.parent.world_matrix(time) if self.parent else np.identity(4)
+
+    def world_matrix(self, time=None):
+        ik = self.scene.ik_joints.get(self)
+        if ik is not None and ik[0].alive:
+            handle, index = ik
+            return solve_ik(handle, time)[index]
+        return self.local_matrix(time) @ self.parent_matrix(time)
+
+class Curve(object):
+    '''
+    The keys of an anim curve, values in internal units. Tangents are (x, y) with x in frames.
+    Fixed tangents use their (x, y), linear and flat ones their own slopes, and every other type
+    the slope between the neighbouring keys, so curves evaluate close to Maya's without its tangent rules.
+    '''
+    def __init__(self):
+        self.times = []
+        self.values = []
+        self.tangent_types = []
+        self.tangents = []
+        self.locks = []
+
+    def find(self, time):
+        for index, key_time in enumerate(self.times):
+            if abs(key_time - time) < 1e-6:
+                return index
+        return None
+
+    def add(self, time, value, in_type=TANGENT_GLOBAL, out_type=TANGENT_GLOBAL):
+        index = self.find(time)
+        if index is None:
+            index = int(np.searchsorted(self.times, time))
+            for keys, default in ((self.times, time), (self.values, value), (self.tangent_types, None),
+                                  (self.tangents, None), (self.locks, None)):
+                keys.insert(index, default)
+        self.values[index] = float(value)
+        self.tangent_types[index] = [in_type, out_type]
+        self.tangents[index] = [(1.0, 0.0), (1.0, 0.0)]
+        self.locks[index] = [True, True]
+        return index
+
+    def remove(self, index):
+        for keys in (self.times, self.values, self.tangent_types, self.tangents, self.locks):
+            del keys[index]
+
+    def slope(self, index, side):
+        '''
+        Returns the slope in value per frame of the in (side 0) or out (side 1) tangent of a key.
+        '''
+        tangent_type = self.tangent_types[index][side]
+        if tangent_type == TANGENT_FIXED:
+            x, y = self.tangents[index][side]
+            return y / x
+        if tangent_type == TANGENT_FLAT or len(self.times) == 1:
+            return 0.0
+        last = len(self.times) - 1
+        if tangent_type == TANGENT_LINEAR:
+            other = index - 1 if side == 0 else index + 1
+            if not 0 <= other <= last:
+                other = index + 1 if side == 0 else index - 1
+        else:
+            index, other = min(index + 1, last), max(index - 1, 0)
+        return (self.values[other] - self.values[index]) / (self.times[other] - self.times[index])
+
+    def evaluate(self, time):
+        if not self.times:
+            return 0.0
+        if time <= self.times[0]:
+            return self.values[0]
+        if time >= self.times[-1]:
+            return self.values[-1]
+        index = int(np.searchsorted(self.times, time, side='right')) - 1
+        if self.tangent_types[index][1] == TANGENT_STEP:
+            return self.values[index]
+        length = self.times[index + 1] - self.times[index]
+        t = (time - self.times[index]) / length
+        return ((2 * t ** 3 - 3 * t ** 2 + 1) * self.values[index]
+                + (t ** 3 - 2 * t ** 2 + t) * length * self.slope(index, 1)
+                + (-2 * t ** 3 + 3 * t ** 2) * self.values[index + 1]
+                + (t ** 3 - t ** 2) * length * self.slope(index + 1, 0))
+
+def solve_ik(handle, time=None):
+    '''
+    Returns the world matrices of the start and mid joint of a rotate plane handle's chain, solved toward the handle.
+    The chain bends in the plane of the pole vector (handle.poleVector, in the space of the handle's parent),
+    with the mid joint on the side of it given by handle.bend, and straightens toward goals out of reach.
+    Each joint keeps its orientation relative to its bone and the chain plane. Twist, roll and ikBlend are ignored.
+    '''
+    start, mid, end = handle.ik_joints
+    start_world = start.local_matrix(time) @ start.parent_matrix(time)
+    mid_world = mid.local_matrix(time) @ start_world
+    rest = [start_world[3, :3], mid_world[3, :3], snap_math.transform_points(end.get('translate', time), mid_world)]
+    upper = np.linalg.norm(rest[1] - rest[0])
+    lower = np.linalg.norm(rest[2] - rest[1])
+
+    axis = handle.world_matrix(time)[3, :3] - rest[0]
+    aim = axis / np.linalg.norm(axis)
+    reach = min(max(np.linalg.norm(axis), abs(upper - lower)), upper + lower)
+    pole = handle.get('poleVector', time) @ handle.parent_matrix(time)[:3, :3]
+    up = pole - aim * np.dot(pole, aim)
+    up /= np.linalg.norm(up)
+    angle = np.arccos(np.clip((upper ** 2 + reach ** 2 - lower ** 2) / (2.0 * upper * reach), -1.0, 1.0))
+    solved = [rest[0], rest[0] + upper * (np.cos(angle) * aim + handle.bend * np.sin(angle) * up), rest[0] + reach * aim]
+
+    def bone_frame(start_position, end_position, normal):
+        direction = (end_position - start_position) / np.linalg.norm(end_position - start_position)
+        return np.array([direction, np.cross(normal, direction), normal])
+
+    rest_normal = np.cross(rest[1] - rest[0], rest[2] - rest[1])
+    rest_normal /= np.linalg.norm(rest_normal)
+    # The normal of the solved plane, which stays defined when the chain is straight
+    normal = -handle.bend * np.cross(aim, up)
+    worlds = []
+    for i, world in enumerate((start_world, mid_world)):
+        rotation = bone_frame(rest[i], rest[i + 1], rest_normal).T @ bone_frame(solved[i], solved[i + 1], normal)
+        world = np.array(world)
+        world[:3, :3] = world[:3, :3] @ rotation
+        world[3, :3] = solved[i]
+        worlds.append(world)
+    return worlds
+
+class Scene(object):
+    def __init__(self):
+        self.nodes = []
+        self.by_name = {}
+        self.by_uuid = {}
+        self.connections = {}
+        self.selection = []
+        self.time = 1.0
+        self.plugins = set()
+        self.callbacks = 0
+        self.script_jobs = set()
+        self.deferred = []
+        # {joint: (ikHandle, index)} for the start and mid joint of every solved chain
+        self.ik_joints = {}
+        # The operations of the ikFkSnapApply commands that cmds.undo and cmds.redo step through
+        self.undo_queue = []
+        self.redo_queue = []
+        self.create_node('objectSet', 'defaultObjectSet', dag=False)
+
+    def create_node(self, node_type, name, parent=None, dag=True):
+        node = Node(self, name, node_type, parent, dag)
+        self.nodes.append(node)
+        self.by_name.setdefault(name, []).append(node)
+        self.by_uuid[node.uuid] = node
+        return node
+
+    def find(self, name):
+        '''
+        Returns the node for a short, partial or long name, or None.
+        '''
+        name = name.split('.', 1)[0]
+        if '|' not in name:
+            nodes = self.by_name.get(name)
+            return nodes[0] if nodes else None
+        for node in self.by_name.get(name.rsplit('|', 1)[-1], ()):
+            long_name = node.long_name()
+            if long_name == name or long_name.endswith('|' + name.lstrip('|')):
+                return node
+        return None
+
+    def get(self, name):
+        node = self.find(name)
+        if node is None:
+            raise ValueError(f"No object matches name: {name}")
+        return node
+
+    def rename(self, node, name):
+        self.by_name[node.name].remove(node)
+        node.name = name
+        self.by_name.setdefault(name, []).append(node)
+
+    def connect(self, source, source_attr, destination, destination_attr):
+        connection = (source, source_attr, destination, destination_attr)
+        self.connections.setdefault(source, []).append(connection)
+        self.connections.setdefault(destination, []).append(connection)
+        return connection
+
+    def disconnect(self, connection):
+        for node in (connection[0], connection[2]):
+            self.connections[node].remove(connection)
+
+    def run_deferred(self):
+        deferred, self.deferred = self.deferred, []
+        for func in deferred:
+            func()
+
+scene = Scene()
+
+def new_scene():
+    global scene
+    scene = Scene()
+    return scene
+
+def split_plug(plug):
+    node, attr = plug.split('.', 1)
+    return scene.get(node), attr
+
+def vector_attr(attr):
+    '''
+    Returns (base attribute, axis index or None) for names like rotateX.
+    '''
+    if attr[-1:] in 'XYZ' and attr[:-1] in VECTOR_ATTRS:
+        return attr[:-1], 'XYZ'.index(attr[-1])
+    return attr, None
+
+# maya.cmds
+def ls(*args, selection=False, shortNames=False, long=False, type=None, uuid=False, **kwargs):
+    if selection:
+        nodes = list(scene.selection)
+    elif args:
+        names = args[0] if isinstance(args[0], (list, tuple)) else args
+        nodes = [scene.find(name) for name in names]
+        nodes = [node for node in nodes if node]
+    else:
+        nodes = [node for node in scene.nodes if node.alive]
+    if type:
+        node_types = type if isinstance(type, (list, tuple)) else [type]
+        nodes = [node for node in nodes if node.type in node_types]
+    if uuid:
+        return [node.uuid for node in nodes]
+    if long:
+        return [node.long_name() for node in nodes]
+    if shortNames:
+        return [node.name for node in nodes]
+    return [node.partial_name() for node in nodes]
+
+def select(*args, clear=False, **kwargs):
+    if clear or not args:
+        scene.selection = []
+        return
+    names = args[0] if isinstance(args[0], (list, tuple)) else args
+    scene.selection = [scene.get(name) for name in names]
+
+def objExists(name):
+    return scene.find(name) is not None
+
+def nodeType(name):
+    return scene.get(name).type
+
+def objectType(name):
+    return scene.get(name).type
+
+def listRelatives(name, shapes=False, parent=False, fullPath=False, **kwargs):
+    node = scene.get(name)
+    if parent:
+        return [node.parent.long_name() if fullPath else node.parent.partial_name()] if node.parent else None
+    children = node.children
+    if shapes:
+        children = [child for child in children if child.type in ('nurbsCurve', 'locator', 'mesh')]
+    if not children:
+        return None
+    return [child.long_name() if fullPath else child.partial_name() for child in children]
+
+def listConnections(nodes, source=True, destination=True, type=None, connections=False, plugs=False,
+                    fullNodeName=False, **kwargs):
+    nodes = nodes if isinstance(nodes, (list, tuple)) else [nodes]
+    result = []
+    for name in nodes:
+        plug_attr = name.split('.', 1)[1] if '.' in name else None
+        node = scene.get(name)
+        for source_node, source_attr, destination_node, destination_attr in scene.connections.get(node, ()):
+            if source and destination_node is node and (plug_attr is None or destination_attr.startswith(plug_attr)):
+                own, other, other_attr = destination_attr, source_node, source_attr
+            elif destination and source_node is node and (plug_attr is None or source_attr.startswith(plug_attr)):
+                own, other, other_attr = source_attr, destination_node, destination_attr
+            else:
+                continue
+            if type and other.type != type:
+                continue
+            other_name = other.long_name() if fullNodeName else other.partial_name()
+            if connections:
+                result.append(f'{name.split(".", 1)[0]}.{own}')
+            result.append(f'{other_name}.{other_attr}' if plugs else other_name)
+    return result or None
+
+def getAttr(plug, **kwargs):
+    node, attr = split_plug(plug)
+    if '[' in attr:
+        attr, index = attr[:-1].split('[')
+        return node.attrs[attr].get(int(index))
+    base, axis = vector_attr(attr)
+    value = node.get(base)
+    if base in ANGLE_ATTRS:
+        value = np.degrees(value)
+    if axis is not None:
+        return float(value[axis])
+    if base in VECTOR_ATTRS:
+        return [tuple(float(v) for v in value)]
+    return value
+
+def setAttr(plug, *values, type=None, **kwargs):
+    node, attr = split_plug(plug)
+    if '[' in attr:
+        attr, index = attr[:-1].split('[')
+        node.attrs.setdefault(attr, {})[int(index)] = values[0]
+        return
+    base, axis = vector_attr(attr)
+    if base in VECTOR_ATTRS:
+        values = np.radians(values) if base in ANGLE_ATTRS else np.array(values, dtype=float)
+        if axis is None:
+            node.attrs[base] = np.array(values, dtype=float)
+        else:
+            node.attrs[base][axis] = values[0]
+    else:
+        node.attrs[base] = values[0]
+
+def addAttr(node, longName=None, multi=False, **kwargs):
+    scene.get(node).attrs[longName] = {} if multi else None
+
+def deleteAttr(plug):
+    node, attr = split_plug(plug)
+    del node.attrs[attr]
+
+def removeMultiInstance(plug, **kwargs):
+    node, attr = split_plug(plug)
+    attr, index = attr[:-1].split('[')
+    node.attrs[attr].pop(int(index), None)
+
+def attributeQuery(attr, node=None, exists=False, **kwargs):
+    return attr in scene.get(node).attrs
+
+def createNode(node_type, name=None, **kwargs):
+    return scene.create_node(node_type, name or node_type + '1', dag=False).name
+
+def xform(name, query=False, worldSpace=False, translation=None, **kwargs):
+    node = scene.get(name)
+    if query:
+        return [float(v) for v in node.world_matrix()[3, :3]]
+    node.attrs['translate'] = snap_math.local_translations(np.array([translation], dtype=float), node.parent_matrix()[None])[0]
+
+def matchTransform(name, target, pos=True, rot=True, **kwargs):
+    node = scene.get(name)
+    target_world = scene.get(target).world_matrix()[None]
+    parent = node.parent_matrix()[None]
+    if rot:
+        node.attrs['rotate'] = snap_math.local_rotations(target_world, parent, node.attrs['rotateAxis'],
+                                                         node.attrs.get('jointOrient', np.zeros(3)),
+                                                         node.attrs['rotateOrder'], node.attrs['rotate'])[0]
+    if pos:
+        # Maya lines up the rotate pivots
+        target_pivot = scene.get(target).world_rotate_pivot()
+        offset = (target_pivot - node.world_rotate_pivot()) @ np.linalg.inv(parent[0])[:3, :3]
+        node.attrs['translate'] = node.attrs['translate'] + offset
+
+def currentTime(*args, query=False, **kwargs):
+    if query:
+        return scene.time
+    scene.time = float(args[0])
+
+def playbackOptions(query=False, minTime=False, maxTime=False, **kwargs):
+    return 1.0 if minTime else 120.0
+
+def undoInfo(**kwargs):
+    return True
+
+def warning(message):
+    pass
+
+def pluginInfo(path, query=False, loaded=False, **kwargs):
+    return path in scene.plugins
+
+def loadPlugin(path, quiet=False):
+    scene.plugins.add(path)
+
+def ikHandle(name, query=False, solver=False, endEffector=False, **kwargs):
+    handle = scene.get(name)
+    if solver:
+        return 'ikRPsolver'
+    if endEffector:
+        return handle.input('endEffector')[0].partial_name()
+
+def ikFkSnapApply():
+    # Like snap_plugin.IkFkSnapApplyCommand: doIt runs the operation, which then sits on the undo queue
+    from ik_fk_snap import transform_writer
+    operation = transform_writer.take_pending()
+    operation.redo()
+    scene.undo_queue.append(operation)
+    scene.redo_queue = []
+
+def undo():
+    operation = scene.undo_queue.pop()
+    operation.undo()
+    scene.redo_queue.append(operation)
+
+def redo():
+    operation = scene.redo_queue.pop()
+    operation.redo()
+    scene.undo_queue.append(operation)
+
+def animLayer(layer=None, query=False, edit=False, root=False, selected=False, mute=False, parent=False,
+              findCurveForPlug=None, attribute=None, **kwargs):
+    if query and root:
+        return ROOT_LAYER if scene.find(ROOT_LAYER) else None
+    node = scene.get(layer)
+    if edit:
+        for plug_name in attribute:
+            add_to_layer(node, plug_name)
+    elif selected:
+        return node.attrs['selected']
+    elif mute:
+        return node.attrs['mute']
+    elif parent:
+        return node.layer_parent.name if node.layer_parent else None
+    elif findCurveForPlug:
+        curve = node.layer_curves.get(findCurveForPlug)
+        return [curve.name] if curve else None
+
+def keyframe(plugs, query=False, time=None, timeChange=False, **kwargs):
+    # Only queries the key times of the curves driving plugs, directly or through a layer blend
+    times = []
+    for plug_name in plugs if isinstance(plugs, (list, tuple)) else [plugs]:
+        node, attr = split_plug(plug_name)
+        connection = node.input(attr)
+        if connection is None:
+            continue
+        if connection[0].type == 'animBlendNodeAdditive':
+            curves = [scene.find(ROOT_LAYER).layer_curves[plug_name]]
+            curves += [layer.layer_curves[plug_name] for layer in connection[0].layers]
+        else:
+            curves = [connection[0]] if connection[0].curve else []
+        times += [key_time for curve in curves for key_time in curve.curve.times if time[0] <= key_time <= time[1]]
+    return times or None
+
+def setKeyframe(plugs, animLayer=None, time=None, **kwargs):
+    # Only keys layer curves at their current value, as get_layer_curves does
+    for plug_name in plugs if isinstance(plugs, (list, tuple)) else [plugs]:
+        curve = scene.get(animLayer).layer_curves[plug_name].curve
+        curve.add(float(time), curve.evaluate(float(time)))
+
+def scriptJob(event=None, exists=None, kill=None, protected=False, force=False, **kwargs):
+    if exists is not None:
+        return exists in scene.script_jobs
+    if kill is not None:
+        scene.script_jobs.discard(kill)
+        return
+    job_id = len(scene.script_jobs) + 1
+    scene.script_jobs.add(job_id)
+    return job_id
+
+def window(name, exists=False, **kwargs):
+    return False
+
+def deleteUI(*args, **kwargs):
+    pass
+
+CMDS_FUNCTIONS = [ls, select, objExists, nodeType, objectType, listRelatives, listConnections, getAttr, setAttr,
+                  addAttr, deleteAttr, removeMultiInstance, attributeQuery, createNode, xform, matchTransform,
+                  currentTime, playbackOptions, undoInfo, warning, pluginInfo, loadPlugin, ikHandle, ikFkSnapApply,
+                  undo, redo, animLayer, keyframe, setKeyframe, scriptJob, window, deleteUI]
+
+def counted(func):
+    def wrapper(*args, **kwargs):
+        cmds_calls[func.__name__] += 1
+        return func(*args, **kwargs)
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+# maya.api.OpenMaya
+class MFn(object):
+    kDagNode = 'dag'
+    kJoint = 'joint'
+    kAnimCurve = 'animCurve'
+
+class MSpace(object):
+    kTransform = 1
+    kWorld = 4
+
+class MObject(object):
+    def __init__(self, node=None):
+        self.node = node
+
+    def hasFn(self, fn_type):
+        if fn_type == MFn.kAnimCurve:
+            return self.node is not None and self.node.curve is not None
+        if fn_type == MFn.kJoint:
+            return self.node is not None and self.node.type == 'joint'
+        return fn_type == MFn.kDagNode and self.node is not None and self.node.dag
+
+class MObjectHandle(object):
+    def __init__(self, node_object):
+        self.node_object = node_object
+
+    def isValid(self):
+        return self.node_object.node is not None and self.node_object.node.alive
+
+    isAlive = isValid
+
+    def object(self):
+        return self.node_object
+
+class MUuid(object):
+    def __init__(self, value):
+        self.value = value
+
+    def asString(self):
+        return self.value
+
+class MSelectionList(object):
+    def __init__(self):
+        self.nodes = []
+        self.node_set = set()
+
+    def add(self, item):
+        node = scene.by_uuid.get(item.value) if isinstance(item, MUuid) else scene.find(item)
+        if node is None or not node.alive:
+            raise RuntimeError("kInvalidParameter: Object does not exist")
+        if node not in self.node_set:
+            self.node_set.add(node)
+            self.nodes.append(node)
+        return self
+
+    def length(self):
+        return len(self.nodes)
+
+    def getDependNode(self, index):
+        return MObject(self.nodes[index])
+
+    def getDagPath(self, index):
+        return MDagPath(self.nodes[index])
+
+class MDagPath(object):
+    def __init__(self, node=None):
+        self.dag_node = node
+
+    @staticmethod
+    def getAPathTo(node_object):
+        return MDagPath(node_object.node)
+
+    def node(self):
+        return MObject(self.dag_node)
+
+    def fullPathName(self):
+        return self.dag_node.long_name()
+
+    def partialPathName(self):
+        return self.dag_node.partial_name()
+
+    def inclusiveMatrix(self):
+        return self.dag_node.world_matrix().ravel().tolist()
+
+class MTime(object):
+    def __init__(self, value=0.0, unit=None):
+        self.value = value
+
+    @staticmethod
+    def uiUnit():
+        return 'film'
+
+    def asUnits(self, unit):
+        return self.value
+
+class MTimeArray(list):
+    pass
+
+class MDoubleArray(list):
+    pass
+
+class MAngle(object):
+    @staticmethod
+    def internalToUI(value):
+        return float(np.degrees(value))
+
+class MDistance(object):
+    @staticmethod
+    def internalToUI(value):
+        return value
+
+class MDGContext(object):
+    def __init__(self, time=None):
+        self.time = time
+
+class MatrixData(object):
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+class MFnMatrixData(object):
+    def __init__(self, data):
+        self.data = data
+
+    def matrix(self):
+        return self.data.matrix.ravel().tolist()
+
+class MPlug(object):
+    def __init__(self, node, attr):
+        self.plug_node = node
+        self.attr = attr
+
+    def elementByLogicalIndex(self, index):
+        return self
+
+    def child(self, index):
+        return MPlug(self.plug_node, self.attr + 'XYZ'[index])
+
+    @property
+    def isDestination(self):
+        return self.plug_node.input(self.attr) is not None
+
+    def source(self):
+        connection = self.plug_node.input(self.attr)
+        return MPlug(*connection) if connection else MPlug(None, None)
+
+    def node(self):
+        return MObject(self.plug_node)
+
+    def asMObject(self, context=None):
+        time = context.time.value if context is not None else None
+        if self.attr == 'worldMatrix':
+            return MatrixData(self.plug_node.world_matrix(time))
+        return MatrixData(self.plug_node.parent_matrix(time))
+
+    def asDouble(self, context=None):
+        base, axis = vector_attr(self.attr)
+        value = self.plug_node.get(base, context.time.value if context is not None else None)
+        return float(value[axis] if axis is not None else value)
+
+    def asInt(self):
+        return int(self.plug_node.attrs[self.attr])
+
+class MFnDependencyNode(object):
+    def __init__(self, node_object):
+        self.fn_node = node_object.node
+
+    def name(self):
+        return self.fn_node.name
+
+    def uuid(self):
+        return MUuid(self.fn_node.uuid)
+
+    def hasAttribute(self, attr):
+        return attr in self.fn_node.attrs
+
+    def findPlug(self, attr, want_networked=False):
+        return MPlug(self.fn_node, attr)
+
+class MFnDagNode(MFnDependencyNode):
+    def fullPathName(self):
+        return self.fn_node.long_name()
+
+class MVector(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.values = np.array([x, y, z], dtype=float)
+
+    x = property(lambda self: self.values[0])
+    y = property(lambda self: self.values[1])
+    z = property(lambda self: self.values[2])
+
+class MEulerRotation(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0, order=0):
+        self.values = np.array([x, y, z], dtype=float)
+        self.order = order
+
+    x = property(lambda self: self.values[0])
+    y = property(lambda self: self.values[1])
+    z = property(lambda self: self.values[2])
+
+class MFnTransform(MFnDagNode):
+    def __init__(self, path):
+        self.fn_node = path.dag_node
+
+    def rotationOrder(self):
+        return self.fn_node.attrs['rotateOrder'] + 1
+
+    def rotation(self, space=MSpace.kTransform, asQuaternion=False):
+        return MEulerRotation(*self.fn_node.get('rotate'), order=self.fn_node.attrs['rotateOrder'])
+
+    def setRotation(self, rotation, space=MSpace.kTransform):
+        self.fn_node.attrs['rotate'] = np.array(rotation.values)
+
+    def translation(self, space=MSpace.kTransform):
+        return MVector(*self.fn_node.get('translate'))
+
+    def setTranslation(self, vector, space=MSpace.kTransform):
+        self.fn_node.attrs['translate'] = np.array(vector.values)
+
+class MMessage(object):
+    @staticmethod
+    def removeCallbacks(callback_ids):
+        scene.callbacks -= len(callback_ids)
+
+def add_callback(*args):
+    scene.callbacks += 1
+    return scene.callbacks
+
+MDGMessage = types.SimpleNamespace(addConnectionCallback=add_callback, addNodeAddedCallback=add_callback,
+                                   addNodeRemovedCallback=add_callback)
+MNodeMessage = types.SimpleNamespace(addNameChangedCallback=add_callback)
+MSceneMessage = types.SimpleNamespace(addCallback=add_callback, kAfterOpen=1, kAfterNew=2, kBeforeOpen=3, kBeforeNew=4)
+
+class MDGModifier(object):
+    '''
+    Queues node creation, renaming and connections. undoIt takes the nodes out of the scene and doIt puts the same
+    nodes back, so MObjects taken from createNode stay valid across undo and redo.
+    '''
+    def __init__(self):
+        self.nodes = []
+        self.names = []
+        self.connections = []
+
+    def createNode(self, node_type):
+        node = scene.create_node(node_type, node_type + '1', dag=False)
+        node.alive = False
+        node.curve = Curve() if node_type.startswith('animCurve') else None
+        self.nodes.append(node)
+        return MObject(node)
+
+    def renameNode(self, node_object, name):
+        self.names.append((node_object.node, name))
+
+    def connect(self, source, destination):
+        self.connections.append((source.plug_node, source.attr, destination.plug_node, destination.attr))
+
+    def doIt(self):
+        for node in self.nodes:
+            node.alive = True
+        for node, name in self.names:
+            scene.rename(node, name)
+        for connection in self.connections:
+            scene.connect(*connection)
+
+    def undoIt(self):
+        for connection in self.connections:
+            scene.disconnect(connection)
+        for node in self.nodes:
+            node.alive = False
+
+OPEN_MAYA_NAMES = ['MFn', 'MSpace', 'MObject', 'MObjectHandle', 'MUuid', 'MSelectionList', 'MDagPath', 'MTime',
+                   'MTimeArray', 'MDoubleArray', 'MAngle', 'MDistance', 'MDGContext', 'MFnMatrixData', 'MPlug',
+                   'MFnDependencyNode', 'MFnDagNode', 'MVector', 'MEulerRotation', 'MFnTransform', 'MDGModifier',
+                   'MMessage', 'MDGMessage', 'MNodeMessage', 'MSceneMessage']
+
+# maya.api.OpenMayaAnim
+class MFnAnimCurve(object):
+    '''
+    Edits the Curve of an anim curve node. Tangents are stored in internal units; setting one side of a key
+    whose tangents are locked sets both sides, and setting a tangent makes it fixed, as in Maya.
+    '''
+    kTangentGlobal, kTangentFixed, kTangentLinear, kTangentFlat, kTangentStep, kTangentAuto = (
+        TANGENT_GLOBAL, TANGENT_FIXED, TANGENT_LINEAR, TANGENT_FLAT, TANGENT_STEP, TANGENT_AUTO)
+
+    def __init__(self, node_object):
+        self.curve_node = node_object.node
+        self.keys = node_object.node.curve
+
+    @property
+    def numKeys(self):
+        return len(self.keys.times)
+
+    def input(self, index):
+        return MTime(self.keys.times[index])
+
+    def value(self, index):
+        return self.keys.values[index]
+
+    def evaluate(self, time):
+        return self.keys.evaluate(time.value)
+
+    def find(self, time):
+        return self.keys.find(time.value)
+
+    def remove(self, index, change=None):
+        self.keys.remove(index)
+
+    def addKeys(self, times, values, tangentInType=TANGENT_GLOBAL, tangentOutType=TANGENT_GLOBAL, keepExistingKeys=False,
+                change=None):
+        if not keepExistingKeys:
+            while self.keys.times:
+                self.keys.remove(0)
+        for time, value in zip(times, values):
+            self.keys.add(time.value, value, tangentInType, tangentOutType)
+
+    def inTangentType(self, index):
+        return self.keys.tangent_types[index][0]
+
+    def outTangentType(self, index):
+        return self.keys.tangent_types[index][1]
+
+    def setInTangentType(self, index, tangent_type, change=None):
+        self.keys.tangent_types[index][0] = tangent_type
+
+    def setOutTangentType(self, index, tangent_type, change=None):
+        self.keys.tangent_types[index][1] = tangent_type
+
+    def getTangentXY(self, index, isInTangent):
+        side = 0 if isInTangent else 1
+        if self.keys.tangent_types[index][side] == TANGENT_FIXED:
+            return tuple(self.keys.tangents[index][side])
+        return 1.0, self.keys.slope(index, side)
+
+    def setTangent(self, index, x, y, isInTangent, change=None, convertUnits=True):
+        if convertUnits and self.curve_node.type == 'animCurveTA':
+            y = float(np.radians(y))
+        sides = (0, 1) if self.keys.locks[index][0] else (0,) if isInTangent else (1,)
+        for side in sides:
+            self.keys.tangents[index][side] = (x, y)
+            self.keys.tangent_types[index][side] = TANGENT_FIXED
+
+    def tangentsLocked(self, index):
+        return self.keys.locks[index][0]
+
+    def weightsLocked(self, index):
+        return self.keys.locks[index][1]
+
+    def setTangentsLocked(self, index, locked, change=None):
+        self.keys.locks[index][0] = locked
+
+    def setWeightsLocked(self, index, locked, change=None):
+        self.keys.locks[index][1] = locked
+
+def execute_deferred(func, *args):
+    scene.deferred.append(lambda: func(*args))
+
+def install():
+    '''
+    Registers the fake maya, maya.cmds, maya.utils, maya.OpenMayaUI, maya.api.OpenMaya and maya.api.OpenMayaAnim modules.
+    '''
+    maya = types.ModuleType('maya')
+    cmds = types.ModuleType('maya.cmds')
+    for func in CMDS_FUNCTIONS:
+        setattr(cmds, func.__name__, counted(func))
+    utils = types.ModuleType('maya.utils')
+    utils.executeDeferred = execute_deferred
+    open_maya_ui = types.ModuleType('maya.OpenMayaUI')
+    open_maya_ui.MQtUtil = types.SimpleNamespace(mainWindow=lambda: None)
+    api = types.ModuleType('maya.api')
+    open_maya = types.ModuleType('maya.api.OpenMaya')
+    for name in OPEN_MAYA_NAMES:
+        setattr(open_maya, name, globals()[name])
+    open_maya_anim = types.ModuleType('maya.api.OpenMayaAnim')
+    open_maya_anim.MFnAnimCurve = MFnAnimCurve
+    maya.cmds, maya.utils, maya.OpenMayaUI, maya.api, api.OpenMaya = cmds, utils, open_maya_ui, api, open_maya
+    api.OpenMayaAnim = open_maya_anim
+    sys.modules.update({'maya': maya, 'maya.cmds': cmds, 'maya.utils': utils, 'maya.OpenMayaUI': open_maya_ui,
+                        'maya.api': api, 'maya.api.OpenMaya': open_maya, 'maya.api.OpenMayaAnim': open_maya_anim})
+
+# Rig building
+def add_constraint(constraint_type, name, targets, driven, outputs=(('constraintRotate', 'rotate'),)):
+    '''
+    Connects a constraint from targets to driven. An orientConstraint keeps the orientation driven has
+    relative to its first target now and evaluates; the other types only hold the connections.
+    '''
+    constraint = scene.create_node(constraint_type, name, driven)
+    if constraint_type == 'orientConstraint':
+        offset = rotation(driven.world_matrix()) @ rotation(targets[0].world_matrix()).T
+
+        def evaluate(time):
+            world = np.identity(4)
+            world[:3, :3] = offset @ rotation(targets[0].world_matrix(time))
+            return snap_math.local_rotations(world, driven.parent_matrix(time), driven.attrs['rotateAxis'],
+                                             driven.attrs.get('jointOrient', np.zeros(3)), driven.attrs['rotateOrder'])
+        constraint.evaluators['constraintRotate'] = evaluate
+    for i, target in enumerate(targets):
+        scene.connect(target, 'parentMatrix', constraint, f'target[{i}].targetParentMatrix')
+        scene.connect(target, 'translate', constraint, f'target[{i}].targetTranslate')
+        scene.connect(constraint, f'w{i}', constraint, f'target[{i}].targetWeight')
+    scene.connect(driven, 'parentInverseMatrix', constraint, 'constraintParentInverseMatrix')
+    for constraint_attr, driven_attr in outputs:
+        for axis in 'XYZ':
+            scene.connect(constraint, constraint_attr + axis, driven, driven_attr + axis)
+    return constraint
+
+def rotation(matrix):
+    return snap_math.rotation_matrices(matrix)
+
+def add_ik_handle(name, joints, parent, pole=None, rest_pole=None):
+    '''
+    Makes a rotate plane ikHandle for three joints, parented under parent where the last joint is.
+    rest_pole is the world pole vector the handle starts with, by default the direction the mid joint
+    sticks out of the chain; the side of it the mid joint is on is kept when solve_ik bends the chain.
+    pole gets a poleVectorConstraint, which aims the pole vector from the first joint at it.
+    '''
+    start, mid, end = joints
+    positions = [joint.world_matrix()[3, :3] for joint in joints]
+    aim = snap_math.normalize(positions[2] - positions[0])
+    mid_offset = positions[1] - positions[0]
+    mid_offset = mid_offset - aim * np.dot(mid_offset, aim)
+    rest_pole = mid_offset if rest_pole is None else np.asarray(rest_pole, dtype=float)
+
+    handle = scene.create_node('ikHandle', name, parent)
+    parent_world = handle.parent_matrix()
+    handle.attrs.update({'poleVector': rest_pole @ np.linalg.inv(parent_world)[:3, :3], 'twist': 0.0, 'roll': 0.0,
+                         'ikBlend': 1.0})
+    handle.attrs['translate'] = snap_math.local_translations(positions[2], parent_world)
+    handle.bend = 1.0 if np.dot(mid_offset, rest_pole) >= 0.0 else -1.0
+    effector = scene.create_node('ikEffector', name.replace('ikHandle', 'effector'), mid)
+    scene.connect(start, 'message', handle, 'startJoint')
+    scene.connect(effector, 'handlePath[0]', handle, 'endEffector')
+    for axis in 'XYZ':
+        scene.connect(end, f'translate{axis}', effector, f'translate{axis}')
+    if pole is not None:
+        constraint = add_constraint('poleVectorConstraint', name.replace('ikHandle', 'poleVectorConstraint'), [pole], handle,
+                                    outputs=(('constraintTranslate', 'poleVector'),))
+
+        def evaluate(time):
+            start_position = (start.local_matrix(time) @ start.parent_matrix(time))[3, :3]
+            return (pole.world_matrix(time)[3, :3] - start_position) @ np.linalg.inv(handle.parent_matrix(time))[:3, :3]
+        constraint.evaluators['constraintTranslate'] = evaluate
+    handle.ik_joints = list(joints)
+    scene.ik_joints[start] = (handle, 0)
+    scene.ik_joints[mid] = (handle, 1)
+    return handle
+
+def animate(node, attribute, frames, values):
+    '''
+    Keys the three channels of a vector attribute of node on frames, values (N,3) in internal units.
+    '''
+    curves = []
+    for axis, channel_values in zip('XYZ', np.asarray(values, dtype=float).T):
+        curve = create_curve(f'{node.name}_{attribute}{axis}', attribute, frames, channel_values)
+        scene.connect(curve, 'output', node, attribute + axis)
+        curves.append(curve)
+    return curves
+
+def create_curve(name, attribute, frames=(), values=()):
+    curve = scene.create_node('animCurveTA' if attribute in ANGLE_ATTRS else 'animCurveTL', name, dag=False)
+    curve.curve = Curve()
+    for frame, value in zip(frames, values):
+        curve.curve.add(float(frame), float(value))
+    return curve
+
+def add_anim_layer(name, weight=1.0, parent=None):
+    '''
+    Makes an additive animation layer under parent (the base layer by default), creating the base layer when needed.
+    '''
+    root = scene.find(ROOT_LAYER)
+    if root is None:
+        root = scene.create_node('animLayer', ROOT_LAYER, dag=False)
+        root.attrs.update({'weight': 1.0, 'mute': False, 'selected': False})
+    layer = scene.create_node('animLayer', name, dag=False)
+    layer.attrs.update({'weight': float(weight), 'mute': False, 'selected': False})
+    layer.layer_parent = parent or root
+    return layer
+
+def add_to_layer(layer, plug_name):
+    '''
+    Adds a plug to layer: the plug is driven by a blend node adding the layer curve, times the weights of the layer
+    and the layers it is nested in, to the base curve (the plug's anim curve, or one keyed at its value).
+    '''
+    node, attr = split_plug(plug_name)
+    connection = node.input(attr)
+    if connection is None or connection[0].type != 'animBlendNodeAdditive':
+        base, axis = vector_attr(attr)
+        if connection is None:
+            value = node.get(base)
+            base_curve = create_curve(plug_name.replace('.', '_'), base, [scene.time], [value[axis] if axis is not None else value])
+        else:
+            base_curve = connection[0]
+            scene.disconnect(next(c for c in scene.connections[node] if c[2] is node and c[3] == attr))
+        blend = scene.create_node('animBlendNodeAdditive', f'{plug_name.replace(".", "_")}_blend', dag=False)
+        blend.layers = []
+        scene.find(ROOT_LAYER).layer_curves[plug_name] = base_curve
+
+        def evaluate(time):
+            time = scene.time if time is None else time
+            value = base_curve.curve.evaluate(time)
+            for blend_layer in blend.layers:
+                weight = 1.0
+                ancestor = blend_layer
+                while ancestor.layer_parent:
+                    weight *= 0.0 if ancestor.attrs['mute'] else ancestor.get('weight', time)
+                    ancestor = ancestor.layer_parent
+                value += weight * blend_layer.layer_curves[plug_name].curve.evaluate(time)
+            return value
+        blend.evaluators['output'] = evaluate
+        scene.connect(blend, 'output', node, attr)
+    else:
+        blend = connection[0]
+    blend.layers.append(layer)
+    layer.layer_curves[plug_name] = create_curve(f'{plug_name.replace(".", "_")}_{layer.name}', vector_attr(attr)[0])
+
+def build_chain(prefix, parent=None):
+    joints = []
+    for i, translate in enumerate([(0, 10, 0), (0, -5, 1), (0, -5, -1)]):
+        joint = scene.create_node('joint', f'{prefix}{i + 1}_jnt', joints[-1] if joints else parent)
+        joint.attrs['translate'] = np.array(translate, dtype=float)
+        joint.attrs['jointOrient'] = np.radians([0, 0, 10 * i])
+        joints.append(joint)
+    return joints
+
+def build_control(name, parent=None):
+    control = scene.create_node('transform', name, parent)
+    scene.create_node('nurbsCurve', name + 'Shape', control)
+    return control
+
+def build_limb(index):
+    '''
+    Builds a three chain limb (FK, IK and a bind chain blended between them) with FK controls,
+    an ikHandle with an IK control and a pole vector constraint. Returns the preset for it.
+    '''
+    rig = scene.create_node('transform', f'limb{index}_grp')
+    rig.attrs['translate'] = np.array([index * 3.0, 0, 0])
+    fk_joints = build_chain(f'limb{index}_fk', rig)
+    ik_joints = build_chain(f'limb{index}_ik', rig)
+    bind_joints = build_chain(f'limb{index}_bind', rig)
+
+    fk_controls = []
+    for i, joint in enumerate(fk_joints):
+        control = build_control(f'limb{index}_fk{i + 1}_ctrl', fk_controls[-1] if fk_controls else rig)
+        control.attrs['translate'] = np.array(joint.attrs['translate'])
+        control.attrs['rotate'] = np.radians([20 * (i + 1), 0, 0])
+        add_constraint('parentConstraint', f'limb{index}_fk{i + 1}_parentConstraint', [control], joint)
+        fk_controls.append(control)
+    for i, joint in enumerate(bind_joints):
+        add_constraint('parentConstraint', f'limb{index}_bind{i + 1}_parentConstraint', [ik_joints[i], fk_joints[i]], joint)
+
+    # The IK control sits on the last IK joint with the handle under it, the pole in the plane of the chain
+    positions = [joint.world_matrix()[3, :3] for joint in ik_joints]
+    ik_ctrl = build_control(f'limb{index}_ik_ctrl', rig)
+    ik_ctrl.attrs['translate'] = snap_math.local_translations(positions[2], rig.world_matrix())
+    ik_pole = build_control(f'limb{index}_pole_ctrl', rig)
+    ik_pole.attrs['translate'] = snap_math.local_translations(snap_math.pole_positions(*positions), rig.world_matrix())
+    add_ik_handle(f'limb{index}_ikHandle', ik_joints, ik_ctrl, ik_pole)
+    add_constraint('orientConstraint', f'limb{index}_ik_orientConstraint', [ik_ctrl], ik_joints[2])
+
+    def slot(node, joint):
+        return {'object_name': node.name, 'object_uuid': node.uuid, 'pinned': True, 'control_joint_obj': joint.name,
+                'control_joint_uuid': joint.uuid, 'mode': 'line_edit', 'selected_index': 0}
+    return {'FK1': slot(fk_controls[0], fk_joints[0]), 'FK2': slot(fk_controls[1], fk_joints[1]),
+            'FK3': slot(fk_controls[2], fk_joints[2]), 'IK1': slot(ik_joints[0], ik_joints[0]),
+            'IK2': slot(ik_pole, ik_joints[1]), 'IK3': slot(ik_ctrl, ik_joints[2])}
+
+def build_scene(limb_count):
+    '''
+    Starts a new scene with limb_count limbs. Returns their presets.
+    '''
+    new_scene()
+    return [build_limb(index) for index in range(limb_count)]
@@ -0,0 +1,52 @@
+import numpy as np
+
+import fake_maya
+from ik_fk_snap import core
+
+def start_bake():
+    limb = core.get_limb(fake_maya.build_scene(1)[0])
+    job = core.BakeJob([limb], 'fk_to_ik', 1, 20, predict_ik=False, chunk_seconds=0.0)
+    assert job.step()
+    return limb, job
+
+def test_bake_cancels_when_a_node_is_deleted():
+    limb, job = start_bake()
+    fake_maya.scene.get(limb['ik_joints'][1]).alive = False
+    assert not job.step()
+    assert job.cancelled and not job.chunks and not job.callback_ids
+
+def test_bake_cancels_on_new_scene():
+    limb, job = start_bake()
+    job.on_scene_change(None)
+    assert not job.step()
+    assert job.cancelled and not job.callback_ids
+
+def test_reduced_bake_keeps_keys_off_step():
+    limb = core.get_limb(fake_maya.build_scene(1)[0])
+    control = fake_maya.scene.get(limb['fk_controls'][1])
+    fake_maya.animate(control, 'rotate', [1.0, 4.5, 9.0, 19.0], np.tile(control.attrs['rotate'], (4, 1)))
+    job = core.BakeJob([limb], 'fk_to_ik', 1, 19, step=2, layer=None, tolerances={'rotate': 0.01}, predict_ik=False)
+    assert 4.5 in job.frames and 9.0 in job.frames
+    job.run()
+    assert {1.0, 4.5, 9.0, 19.0} <= set(fake_maya.scene.get(f"{control.name}_rotateX").curve.times)
+
+def test_chunked_bake_matches_whole_bake():
+    keys = []
+    for chunk_seconds in (None, 0.0):
+        limb = core.get_limb(fake_maya.build_scene(1)[0])
+        ik_ctrl = fake_maya.scene.get(limb['ik_ctrl'])
+        # Turn the control more than once around, so the euler angles have to continue across chunks
+        fake_maya.animate(ik_ctrl, 'rotate', [1.0, 30.0], [[0.0, 0.0, 0.0], [0.0, 0.0, 4.0 * np.pi]])
+        job = core.BakeJob([limb], 'fk_to_ik', 1, 30, layer=None, tolerances={'rotate': 0.01}, chunk_seconds=chunk_seconds)
+        if chunk_seconds is None:
+            job.run()
+        else:
+            stages = []
+            progress = [job.progress()[0]]
+            while job.step():
+                stages.append(job.stage)
+                progress.append(job.progress()[0])
+            assert stages.count('solve') > 1 and stages.count('reduce') > 1
+            assert progress == sorted(progress) and job.progress()[0] == job.progress()[1]
+        keys.append({node.name: (node.curve.times, node.curve.values) for node in fake_maya.scene.nodes if node.curve})
+    assert keys[0] == keys[1]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+import fake_maya
+from ik_fk_snap import core, snap_math
+
+FRAMES = np.arange(1.0, 21.0)
+
+def test_two_bone_ik_keeps_bones_in_pole_plane():
+    rng = np.random.default_rng(0)
+    root, goal, pole_vector = rng.normal(size=(3, 50, 3)) * 4.0
+    mid, end, normal = snap_math.two_bone_ik(root, goal, pole_vector, 5.0, 4.0)
+    assert np.allclose(np.linalg.norm(mid - root, axis=-1), 5.0)
+    assert np.allclose(np.linalg.norm(end - mid, axis=-1), 4.0)
+    # The mid joint, the goal and the pole vector all lie in the plane through the root with that normal
+    for vector in (mid - root, goal - root, pole_vector):
+        assert np.allclose(np.sum(vector * normal, axis=-1), 0.0)
+
+@pytest.mark.parametrize('bend', (1.0, -1.0))
+def test_two_bone_ik_bend_side(bend):
+    mid, end, normal = snap_math.two_bone_ik([[0.0, 0.0, 0.0]], [[0.0, 0.0, 8.0]], [[0.0, 1.0, 0.0]], 5.0, 5.0, bend)
+    assert np.allclose(end, [[0.0, 0.0, 8.0]])
+    assert np.allclose(mid, [[0.0, 3.0 * bend, 4.0]])
+
+def test_two_bone_ik_straightens_out_of_reach():
+    mid, end, normal = snap_math.two_bone_ik([[1.0, 0.0, 0.0]], [[1.0, 0.0, 20.0]], [[0.0, 1.0, 0.0]], 5.0, 4.0)
+    assert np.allclose(mid, [[1.0, 0.0, 5.0]])
+    assert np.allclose(end, [[1.0, 0.0, 9.0]])
+
+def build_ik_limb(ik_ctrl_positions, bend=1.0):
+    '''
+    Builds one limb with its IK control keyed through ik_ctrl_positions (rig space) over FRAMES,
+    and the IK handle bending to the given side of its pole vector.
+    '''
+    limb = core.get_limb(fake_maya.build_scene(1)[0])
+    ik_ctrl = fake_maya.scene.get(limb['ik_ctrl'])
+    fake_maya.animate(ik_ctrl, 'translate', FRAMES, ik_ctrl.attrs['translate'] + ik_ctrl_positions)
+    fake_maya.animate(ik_ctrl, 'rotate', FRAMES, np.radians(np.outer(FRAMES, [3.0, -2.0, 1.0])))
+    fake_maya.scene.get('limb0_ikHandle').bend = bend
+    return limb
+
+def predict(limb):
+    model, reason = core.get_ik_model(limb)
+    assert reason is None
+    limb, node_objects = core.resolve_limb(limb)
+    node_objects.update(core.get_node_objects([model['handle']]))
+    matrix_requests, vector_requests = core.get_ik_model_requests(model)
+    joint_requests = [(joint, 'worldMatrix') for joint in limb['ik_joints']]
+    samples = core.sample_matrices(matrix_requests + joint_requests, FRAMES, node_objects)
+    vectors = core.sample_vectors(vector_requests, FRAMES, node_objects)
+    checks = [samples[request] for request in joint_requests]
+    return core.predict_ik_worlds(model, samples, vectors, [check[0] for check in checks]), checks
+
+@pytest.mark.parametrize('bend', (1.0, -1.0))
+def test_predicted_ik_matches_solver(bend):
+    # Swing the control around in front of the chain, staying in reach
+    angles = np.linspace(0.0, 1.5, len(FRAMES))[:, None]
+    positions = np.hstack([np.sin(angles) * 2.0, np.zeros_like(angles) + 1.0, np.cos(angles) * 2.0 - 2.0])
+    worlds, checks = predict(build_ik_limb(positions, bend))
+    for world, check in zip(worlds, checks):
+        np.testing.assert_allclose(world, check, atol=1e-9)
+
+def test_predicted_ik_straightens_out_of_reach():
+    positions = np.outer(np.linspace(0.0, 1.0, len(FRAMES)), [0.0, -15.0, 10.0])
+    worlds, checks = predict(build_ik_limb(positions))
+    for world, check in zip(worlds, checks):
+        np.testing.assert_allclose(world, check, atol=1e-9)
+    positions = [snap_math.translations(world[-1]) for world in worlds]
+    assert np.isclose(np.linalg.norm(positions[2] - positions[0]),
+                      np.linalg.norm(positions[1] - positions[0]) + np.linalg.norm(positions[2] - positions[1]))
+
+def test_bake_with_predicted_ik_matches_sampled_ik():
+    angles = np.linspace(0.0, 1.5, len(FRAMES))[:, None]
+    positions = np.hstack([np.sin(angles) * 2.0, np.zeros_like(angles), np.cos(angles) * 2.0 - 2.0])
+    limb = build_ik_limb(positions)
+    expected, node_objects = core.solve_limbs([limb], 'fk_to_ik', FRAMES, predict_ik=False)
+    plan = core.prepare_limbs([limb], 'fk_to_ik', FRAMES, predict_ik=True)
+    assert [model['handle'] for model in plan['models']] == ['limb0_ikHandle']
+    samples, vectors = core.sample_limbs(plan, FRAMES)
+    results = core.solve_samples(plan, FRAMES, samples, vectors)
+    assert [(node, attribute) for node, attribute, values in results] == [(node, attribute) for node, attribute, values in expected]
+    for (node, attribute, values), (_, _, expected_values) in zip(results, expected):
+        np.testing.assert_allclose(values, expected_values, atol=1e-6)
@@ -0,0 +1,46 @@
+import pytest
+
+import fake_maya
+from ik_fk_snap import core
+
+def rename(node, name):
+    fake_maya.scene.by_name[node.name].remove(node)
+    node.name = name
+    fake_maya.scene.by_name.setdefault(name, []).append(node)
+
+@pytest.fixture
+def joint_cache():
+    core.joint_cache.install_callbacks()
+    yield core.joint_cache
+    core.joint_cache.remove_callbacks()
+
+def test_duplicate_joint_names_keep_their_uuids(joint_cache):
+    fake_maya.build_scene(2)
+    joint = fake_maya.scene.get('limb1_fk1_jnt')
+    rename(joint, 'limb0_fk1_jnt')
+    joints = core.get_joints(['limb1_fk1_ctrl'])
+    assert joints == [joint.partial_name()]
+    fake_maya.cmds_calls.clear()
+    assert core.get_joint_uuids(joints) == {joints[0]: joint.uuid}
+    assert not fake_maya.cmds_calls
+
+def test_renamed_joint_leaves_the_cache(joint_cache):
+    fake_maya.build_scene(1)
+    assert core.get_joints(['limb0_fk2_ctrl']) == ['limb0_fk2_jnt']
+    joint = fake_maya.scene.get('limb0_fk2_jnt')
+    rename(joint, 'limb0_elbow_jnt')
+    joint_cache.on_name_changed(fake_maya.MObject(joint), 'limb0_fk2_jnt', None)
+    assert core.get_joints(['limb0_fk2_ctrl']) == ['limb0_elbow_jnt']
+
+def test_is_joint_tells_paths_apart():
+    fake_maya.new_scene()
+    for parent_name, node_type in (('grp_a', 'transform'), ('grp_b', 'joint')):
+        parent = fake_maya.scene.create_node('transform', parent_name)
+        fake_maya.scene.create_node(node_type, 'elbow', parent)
+    core.joint_index.install_callbacks()
+    try:
+        assert core.joint_index.is_joint('|grp_b|elbow')
+        assert not core.joint_index.is_joint('|grp_a|elbow')
+        assert core.joint_index.is_joint('elbow')
+    finally:
+        core.joint_index.remove_callbacks()
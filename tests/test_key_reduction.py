@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from ik_fk_snap import key_reduction
+
+def get_fitted(frames, values, indices, slopes):
+    return key_reduction.hermite(frames, frames[indices], values[indices], slopes)
+
+@pytest.mark.parametrize('vector', [False, True])
+@pytest.mark.parametrize('tolerance', [1e-1, 1e-3])
+def test_reduced_keys_stay_within_tolerance(vector, tolerance):
+    frames = np.arange(1.0, 121.0)
+    values = np.stack([np.sin(frames * 0.1), np.cos(frames * 0.05) * 2.0, np.where(frames > 60, 1.0, 0.0)], axis=1)
+    indices, slopes, max_error = key_reduction.reduce_keys(frames, values, tolerance, vector=vector)
+    errors = key_reduction.get_errors(values, get_fitted(frames, values, indices, slopes), vector)
+    assert len(indices) < len(frames)
+    assert errors.max() <= tolerance
+    assert max_error == pytest.approx(errors.max())
+
+def test_reduction_keeps_endpoints_and_keep_frames():
+    frames = np.arange(0.0, 50.0)
+    values = np.full((50, 3), 2.0)
+    indices, slopes, max_error = key_reduction.reduce_keys(frames, values, 1e-3, keep_frames=(10.0, 33.0, 70.0))
+    assert list(frames[indices]) == [0.0, 10.0, 33.0, 49.0]
+    assert max_error == 0.0
+
+def test_short_bakes_keep_every_frame():
+    frames = np.array([1.0, 2.0])
+    indices, slopes, max_error = key_reduction.reduce_keys(frames, np.array([[0.0], [1.0]]), 1e-3)
+    assert list(indices) == [0, 1]
+    assert np.allclose(slopes, 1.0)
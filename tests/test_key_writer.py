@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import fake_maya
+from ik_fk_snap import core, key_writer
+
+FRAMES = np.arange(10.0, 21.0)
+
+def build_control(animated=True):
+    '''
+    Returns a control whose translate is keyed every 5 frames from 0 to 30 when animated.
+    '''
+    fake_maya.new_scene()
+    control = fake_maya.scene.create_node('transform', 'ctrl')
+    if animated:
+        frames = np.arange(0.0, 31.0, 5.0)
+        fake_maya.animate(control, 'translate', frames, np.stack([frames, -frames, frames * 0.5], axis=1))
+    return control
+
+def bake_values():
+    return np.stack([np.sin(FRAMES * 0.3), np.cos(FRAMES * 0.2), FRAMES * 0.1], axis=1)
+
+def set_keys(attribute='translate', values=None, **kwargs):
+    values = bake_values() if values is None else values
+    return key_writer.set_keys([('ctrl', attribute, values)], FRAMES, core.get_node_objects(['ctrl']), **kwargs)
+
+def evaluate(control, attribute, frames):
+    return np.array([control.get(attribute, frame) for frame in frames])
+
+def test_bake_into_existing_curve_keeps_keys_outside_range():
+    control = build_control()
+    curves = [node.curve for node in fake_maya.scene.nodes if node.curve]
+    report = set_keys()
+    assert report == {'keys': 33, 'removed': 0, 'errors': {}}
+    assert [node.curve for node in fake_maya.scene.nodes if node.curve] == curves
+    assert curves[1].times == [0.0, 5.0] + list(FRAMES) + [25.0, 30.0]
+    assert curves[1].values[:2] + curves[1].values[-2:] == [0.0, -5.0, -25.0, -30.0]
+    np.testing.assert_allclose(evaluate(control, 'translate', FRAMES), bake_values())
+
+def test_bake_creates_missing_curves():
+    control = build_control(animated=False)
+    set_keys()
+    curve = fake_maya.scene.get('ctrl_translateY')
+    assert curve.alive and curve.curve.times == list(FRAMES)
+    np.testing.assert_allclose(evaluate(control, 'translate', FRAMES), bake_values())
+
+def test_bake_into_half_weight_layer():
+    control = build_control()
+    base = evaluate(control, 'translate', FRAMES)
+    fake_maya.add_anim_layer('layer1', weight=0.5)
+    set_keys(layer='layer1')
+    np.testing.assert_allclose(evaluate(control, 'translate', FRAMES), bake_values())
+    # The base curves keep their keys, the layer curves carry twice the difference
+    assert fake_maya.scene.get('ctrl_translateX').curve.times == list(np.arange(0.0, 31.0, 5.0))
+    layer_curve = fake_maya.scene.get('ctrl_translateX_layer1').curve
+    np.testing.assert_allclose([layer_curve.evaluate(frame) for frame in FRAMES], (bake_values() - base)[:, 0] * 2.0)
+
+def test_bake_into_muted_layer_fails():
+    build_control()
+    fake_maya.add_anim_layer('layer1').attrs['mute'] = True
+    with pytest.raises(RuntimeError, match='muted'):
+        set_keys(layer='layer1')
+
+def test_reduced_rotate_keys_get_tangents_in_ui_units():
+    control = build_control()
+    values = np.stack([np.sin(FRAMES * 0.1), FRAMES * 0.05, np.zeros_like(FRAMES)], axis=1)
+    report = set_keys('rotate', values, tolerances={'rotate': 0.1})
+    assert report['removed'] > 0 and report['errors']['rotate'] <= 0.1
+    # The curves follow the fixed tangents between the kept keys, which were given in degrees per frame
+    np.testing.assert_allclose(evaluate(control, 'rotate', FRAMES), values, atol=np.radians(0.1))
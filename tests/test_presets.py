@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import fake_maya
+from ik_fk_snap import core
+
+@pytest.fixture
+def calibrated_preset():
+    '''
+    A calibrated preset saved on defaultObjectSet and read back, the way Load Preset gets it.
+    '''
+    preset = fake_maya.build_scene(1)[0]
+    preset['control_offsets'] = core.calibrate_limb(core.get_limb(preset))
+    store = core.PresetStore('defaultObjectSet')
+    store['limb0'] = preset
+    store.save()
+    return core.PresetStore('defaultObjectSet')['limb0']
+
+def test_preset_names_skip_non_slot_entries(calibrated_preset):
+    names = core.get_preset_names(calibrated_preset)
+    for slot in core.PRESET_SLOTS:
+        assert names[calibrated_preset[slot]['object_name']] == calibrated_preset[slot]['object_name']
+        assert names[calibrated_preset[slot]['control_joint_obj']] == calibrated_preset[slot]['control_joint_obj']
+
+def test_scanned_presets_resolve():
+    fake_maya.build_scene(2)
+    for preset in core.scan_scene().values():
+        assert 'control_offsets' not in preset
+        names = core.get_preset_names(preset)
+        assert all(preset[slot]['object_name'] in names and preset[slot]['control_joint_obj'] in names
+                   for slot in core.PRESET_SLOTS)
+
+def test_legacy_presets_migrate_on_save():
+    preset = fake_maya.build_scene(1)[0]
+    fake_maya.addAttr('defaultObjectSet', longName='presets', dataType='string')
+    fake_maya.setAttr('defaultObjectSet.presets', json.dumps({'limb0': preset}), type='string')
+    fake_maya.cmds_calls.clear()
+    store = core.PresetStore('defaultObjectSet')
+    assert store.keys() == ['limb0'] and store['limb0'] == preset
+    # Reading leaves the scene alone
+    assert not {'addAttr', 'setAttr', 'deleteAttr'} & set(fake_maya.cmds_calls)
+    store.save()
+    assert core.PresetStore('defaultObjectSet')['limb0'] == preset
+    assert fake_maya.attributeQuery('presets', node='defaultObjectSet', exists=True)
+
+def test_window_loads_calibrated_preset(calibrated_preset):
+    QtWidgets = pytest.importorskip('PySide2.QtWidgets')
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    from ik_fk_snap import ui
+    window = ui.PinnedObjectWindow()
+    window.last_selection = [calibrated_preset['FK1']['object_name']]
+    window.set_pinned_objects(calibrated_preset)
+    assert window.last_selection is None
+    for slot, button in window.pinButtonList:
+        assert button.object_name == calibrated_preset[slot]['object_name']
+        assert button.get_control_joint_obj() == calibrated_preset[slot]['control_joint_obj']
+    window.close()
+    assert app is not None
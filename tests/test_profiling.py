@@ -0,0 +1,26 @@
+from ik_fk_snap import profiling
+
+@profiling.profiled(payload=lambda args, result: len(args[0]) * len(args[1]))
+def sample(nodes, frames=(1.0, 2.0)):
+    return {node: list(frames) for node in nodes}
+
+@profiling.profiled(payload=lambda args, result: args[0]['missing'])
+def broken_payload(limbs):
+    return limbs
+
+def setup_function(function):
+    profiling.reset()
+    profiling.enable()
+
+def teardown_function(function):
+    profiling.disable()
+    profiling.reset()
+
+def test_payload_sees_keyword_arguments():
+    assert sample(nodes=['a', 'b'], frames=[1.0, 2.0, 3.0]) == {'a': [1.0, 2.0, 3.0], 'b': [1.0, 2.0, 3.0]}
+    assert sample(['a', 'b']) == {'a': [1.0, 2.0], 'b': [1.0, 2.0]}
+    assert [event['payload'] for event in profiling.events] == [6, 4]
+
+def test_failing_payload_keeps_the_result():
+    assert broken_payload(limbs={'limb0': {}}) == {'limb0': {}}
+    assert profiling.events[-1]['payload'] == 1
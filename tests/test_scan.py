@@ -0,0 +1,16 @@
+import fake_maya
+from ik_fk_snap import core
+
+def test_scan_finds_every_limb():
+    presets = fake_maya.build_scene(2)
+    limbs = core.find_limbs()
+    assert [limb['ik_ctrl'].rsplit('|', 1)[-1] for limb in limbs] == [preset['IK3']['object_name'] for preset in presets]
+
+def test_scan_skips_limb_without_ik_control():
+    fake_maya.build_scene(2)
+    # Without the orient constraint and with the handle moved to the rig group (no curve shape) only the pole
+    # control is left
+    fake_maya.scene.get('limb0_ik_orientConstraint').alive = False
+    fake_maya.scene.get('limb0_ikHandle').set_parent(fake_maya.scene.get('limb0_grp'))
+    limbs = core.find_limbs()
+    assert [limb['handle'].rsplit('|', 1)[-1] for limb in limbs] == ['limb1_ikHandle']
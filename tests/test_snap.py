@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import fake_maya
+from ik_fk_snap import core, snap_math
+
+PIVOTS = {
+    'none': {},
+    'frozen': {'rotatePivot': [1.0, -2.0, 0.5], 'scalePivot': [1.0, -2.0, 0.5]},
+    'moved': {'rotatePivot': [0.5, 1.0, -1.5], 'rotatePivotTranslate': [0.2, 0.0, -0.3],
+              'scalePivot': [-1.0, 0.5, 0.0], 'scalePivotTranslate': [0.0, 0.1, 0.0], 'scale': [1.0, 2.0, 0.5]}
+}
+
+def build_limb(pivots):
+    limb = core.get_limb(fake_maya.build_scene(1)[0])
+    ik_ctrl = fake_maya.scene.get(limb['ik_ctrl'])
+    for attribute, value in pivots.items():
+        ik_ctrl.attrs[attribute] = np.array(value)
+    # Pose the FK chain away from the IK chain, so the snap has to move the controls
+    fake_maya.scene.get(limb['fk_controls'][1]).attrs['rotate'] = np.radians([35.0, 10.0, -20.0])
+    return limb, ik_ctrl
+
+def snap_ik_to_fk(backend, pivots):
+    limb, ik_ctrl = build_limb(pivots)
+    ik_controls = [limb['ik_joints'][0], limb['ik_joints'][1], limb['ik_ctrl']]
+    core.match_ik_to_fk(ik_controls, limb['fk_joints'], limb['ik_pole'], None, backend=backend)
+    return limb, ik_ctrl
+
+@pytest.mark.parametrize('pivots', PIVOTS.values(), ids=PIVOTS.keys())
+def test_api_snap_matches_cmds(pivots):
+    limb, ik_ctrl = snap_ik_to_fk('cmds', pivots)
+    expected = ik_ctrl.world_matrix()
+    limb, ik_ctrl = snap_ik_to_fk('api', pivots)
+    np.testing.assert_allclose(ik_ctrl.world_matrix(), expected, atol=1e-9)
+    fk3_joint = fake_maya.scene.get(limb['fk_joints'][2])
+    np.testing.assert_allclose(ik_ctrl.world_rotate_pivot(), fk3_joint.world_rotate_pivot(), atol=1e-9)
+
+def reach_ik_control(limb):
+    # Put the handle on the control's rotate pivot, as a rig built with those pivots would have it, and the
+    # pivot where the chain's end is at rest (without the handle)
+    ik_ctrl = fake_maya.scene.get(limb['ik_ctrl'])
+    handle = fake_maya.scene.get(limb['ik_ctrl'].rsplit('_', 2)[0] + '_ikHandle')
+    handle.alive = False
+    end = fake_maya.scene.get(limb['ik_joints'][2]).world_matrix()[3, :3]
+    handle.alive = True
+    handle.attrs['translate'] = snap_math.local_translations(ik_ctrl.world_rotate_pivot(), ik_ctrl.world_matrix())
+    ik_ctrl.attrs['translate'] = ik_ctrl.attrs['translate'] + (end - ik_ctrl.world_rotate_pivot()) @ np.linalg.inv(
+        ik_ctrl.parent_matrix())[:3, :3]
+
+def test_calibrated_snap_keeps_offset_with_pivots():
+    limb, ik_ctrl = build_limb(PIVOTS['moved'])
+    reach_ik_control(limb)
+    offsets = {slot: np.reshape(offset, (4, 4)) for slot, offset in core.calibrate_limb(limb).items()}
+    core.match_ik_to_fk([limb['ik_joints'][0], limb['ik_joints'][1], limb['ik_ctrl']], limb['fk_joints'],
+                        limb['ik_pole'], None, control_offsets=offsets)
+    fk3_joint = fake_maya.scene.get(limb['fk_joints'][2])
+    np.testing.assert_allclose(ik_ctrl.world_matrix(), offsets['IK3'] @ fk3_joint.world_matrix(), atol=1e-9)
+
+def test_calibration_rejects_unreached_ik_control():
+    limb, ik_ctrl = build_limb(PIVOTS['frozen'])
+    reach_ik_control(limb)
+    assert set(core.calibrate_limb(limb)) == set(core.PRESET_SLOTS) - {'IK1', 'IK2'}
+    ik_ctrl.attrs['translate'] = ik_ctrl.attrs['translate'] + [0.0, 0.0, 20.0]
+    assert 'IK3' not in core.calibrate_limb(limb)
+
+def test_calibration_rejects_unconstrained_joint():
+    limb, ik_ctrl = build_limb(PIVOTS['none'])
+    reach_ik_control(limb)
+    fake_maya.scene.connections.pop(fake_maya.scene.get(limb['ik_joints'][2]))
+    assert 'IK3' not in core.calibrate_limb(limb)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from ik_fk_snap import snap_math
+
+@pytest.mark.parametrize('rotate_order', range(6))
+def test_euler_round_trip(rotate_order):
+    rng = np.random.default_rng(rotate_order)
+    angles = rng.uniform(-np.pi + 0.01, np.pi - 0.01, (50, 3))
+    # Keep the middle axis away from gimbal lock, where the angles are not unique
+    middle = snap_math.ROTATE_ORDER_AXES[rotate_order][1]
+    angles[:, middle] = rng.uniform(-np.pi / 2 + 0.1, np.pi / 2 - 0.1, 50)
+    rotations = snap_math.euler_to_matrix(angles, rotate_order)
+    result = snap_math.matrix_to_euler(rotations, rotate_order)
+    assert np.allclose(result, angles)
+    assert np.allclose(snap_math.euler_to_matrix(result, rotate_order), rotations)
+
+@pytest.mark.parametrize('rotate_order', range(6))
+def test_euler_gimbal_keeps_rotation(rotate_order):
+    angles = np.zeros((1, 3))
+    angles[0, snap_math.ROTATE_ORDER_AXES[rotate_order]] = (0.3, np.pi / 2, -0.4)
+    rotations = snap_math.euler_to_matrix(angles, rotate_order)
+    result = snap_math.matrix_to_euler(rotations, rotate_order)
+    assert np.allclose(snap_math.euler_to_matrix(result, rotate_order), rotations)
+
+def test_unwrap_removes_turns():
+    angles = np.zeros((4, 3))
+    angles[:, 0] = (np.pi - 0.1, -np.pi + 0.1, -np.pi + 0.3, np.pi - 0.1)
+    unwrapped = snap_math.unwrap_euler(angles)
+    assert np.allclose(unwrapped[:, 0], (np.pi - 0.1, np.pi + 0.1, np.pi + 0.3, np.pi - 0.1))
+    assert np.abs(np.diff(unwrapped, axis=0)).max() < np.pi
+
+def test_unwrap_moves_to_reference_turn():
+    angles = np.full((3, 3), 0.2)
+    unwrapped = snap_math.unwrap_euler(angles, reference=(4 * np.pi, -2 * np.pi + 0.5, 0.0))
+    assert np.allclose(unwrapped[0], (4 * np.pi + 0.2, -2 * np.pi + 0.2, 0.2))
+    assert np.allclose(unwrapped - unwrapped[0], 0.0)
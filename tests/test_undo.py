@@ -0,0 +1,75 @@
+import maya.cmds as cmds
+import numpy as np
+
+import fake_maya
+from ik_fk_snap import core, key_writer
+
+FRAMES = np.arange(10.0, 21.0)
+
+def get_transforms():
+    return {(node.name, attribute): np.array(node.attrs[attribute]) for node in fake_maya.scene.nodes
+            if node.alive and node.dag for attribute in ('translate', 'rotate')}
+
+def assert_transforms_equal(transforms, expected):
+    assert transforms.keys() == expected.keys()
+    for key, value in expected.items():
+        np.testing.assert_array_equal(transforms[key], value, err_msg=str(key))
+
+def test_snap_undo_and_redo():
+    limb = core.get_limb(fake_maya.build_scene(1)[0])
+    before = get_transforms()
+    core.snap_limbs([limb], 'fk_to_ik')
+    snapped = get_transforms()
+    assert any(not np.array_equal(snapped[key], value) for key, value in before.items())
+    cmds.undo()
+    assert_transforms_equal(get_transforms(), before)
+    cmds.redo()
+    assert_transforms_equal(get_transforms(), snapped)
+
+def get_keys(curve_node):
+    fn_curve = fake_maya.MFnAnimCurve(fake_maya.MObject(curve_node))
+    return [(fn_curve.input(i).value, fn_curve.value(i), fn_curve.inTangentType(i), fn_curve.outTangentType(i),
+             fn_curve.getTangentXY(i, True), fn_curve.getTangentXY(i, False), fn_curve.tangentsLocked(i),
+             fn_curve.weightsLocked(i)) for i in range(fn_curve.numKeys)]
+
+def test_bake_undo_restores_tangents_and_locks():
+    fake_maya.new_scene()
+    control = fake_maya.scene.create_node('transform', 'ctrl')
+    key_frames = np.arange(0.0, 31.0, 5.0)
+    curves = fake_maya.animate(control, 'rotate', key_frames, np.radians(np.outer(np.sin(key_frames), [30.0, -10.0, 5.0])))
+    # Keys in the bake range with broken fixed tangents, unlocked weights, a flat and a linear side
+    keys = curves[0].curve
+    keys.tangent_types[2] = [fake_maya.TANGENT_FIXED, fake_maya.TANGENT_FIXED]
+    keys.tangents[2] = [(1.0, 0.25), (2.0, -0.5)]
+    keys.locks[2] = [False, False]
+    keys.tangent_types[3] = [fake_maya.TANGENT_FLAT, fake_maya.TANGENT_LINEAR]
+    keys.locks[3] = [True, False]
+    before = [get_keys(curve) for curve in curves]
+
+    values = np.stack([np.sin(FRAMES * 0.1), FRAMES * 0.05, np.zeros_like(FRAMES)], axis=1)
+    key_writer.set_keys([('ctrl', 'rotate', values)], FRAMES, core.get_node_objects(['ctrl']), tolerances={'rotate': 0.1})
+    baked = [get_keys(curve) for curve in curves]
+    assert baked != before
+    cmds.undo()
+    assert [get_keys(curve) for curve in curves] == before
+    cmds.redo()
+    assert [get_keys(curve) for curve in curves] == baked
+
+def test_bake_undo_removes_new_curves():
+    fake_maya.new_scene()
+    control = fake_maya.scene.create_node('transform', 'ctrl')
+    values = np.stack([FRAMES, -FRAMES, FRAMES * 0.5], axis=1)
+    key_writer.set_keys([('ctrl', 'translate', values)], FRAMES, core.get_node_objects(['ctrl']))
+    operation = fake_maya.scene.undo_queue[-1]
+    curve_objects = [curve for curve, attribute, frames, curve_values, slopes in operation.curves]
+    cmds.undo()
+    assert not any(fake_maya.MObjectHandle(curve).isValid() for curve in curve_objects)
+    np.testing.assert_array_equal(control.get('translate', FRAMES[-1]), [0.0, 0.0, 0.0])
+    cmds.redo()
+    # The modifier brings back the same nodes, so the curves the operation holds stay valid
+    assert all(fake_maya.MObjectHandle(curve).isValid() for curve in curve_objects)
+    assert [curve.node for curve in curve_objects] == [fake_maya.scene.get(f'ctrl_translate{axis}') for axis in 'XYZ']
+    np.testing.assert_array_equal([control.get('translate', frame) for frame in FRAMES], values)
+    cmds.undo()
+    cmds.redo()
+    np.testing.assert_array_equal([control.get('translate', frame) for frame in FRAMES], values)